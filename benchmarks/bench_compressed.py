@@ -0,0 +1,107 @@
+"""Benchmark reading compressed test vector files.
+
+Compares reading the plain file with reading gzip, BGZF (block gzip as
+written by bgzip), bz2, xz and zstd (if available) compressed copies using
+compressed.openFile(), and with decompressing the whole file first.
+"""
+
+import argparse
+import bz2
+import gzip
+import io
+import lzma
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from generate import generate
+from testvector import TestVector
+import compressed
+
+BgzfBlockSize = 0xff00 # uncompressed bytes per member, as used by bgzip
+
+def bgzfCompress(data, level=6):
+    """Returns data compressed as BGZF, gzip members with a 'BC' extra
+    subfield holding the member size, terminated by an empty member."""
+    members = []
+    for offset in range(0, len(data), BgzfBlockSize) or [0]:
+        block = data[offset:offset + BgzfBlockSize]
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        deflated = compressor.compress(block) + compressor.flush()
+        header = b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00"
+        size = len(header) + 2 + len(deflated) + 8
+        members.append(header + (size - 1).to_bytes(2, 'little') + deflated +
+            zlib.crc32(block).to_bytes(4, 'little') + len(block).to_bytes(4, 'little'))
+    members.append(bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000"))
+    return b"".join(members)
+
+def codecs():
+    result = {
+        'gzip': (gzip.compress, gzip.decompress),
+        'bgzf': (bgzfCompress, gzip.decompress),
+        'bz2': (bz2.compress, bz2.decompress),
+        'xz': (lzma.compress, lzma.decompress),
+    }
+    if compressed.zstd is not None and hasattr(compressed.zstd, 'ZstdCompressor'):
+        compressor = compressed.zstd.ZstdCompressor()
+        result['zstd'] = (compressor.compress, lambda data: compressed.createDecompressor('zstd').decompress(data))
+    return result
+
+def timeRead(filename, repeat):
+    """Returns minimum time of reading file using openFile()."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        testvector = TestVector()
+        with compressed.openFile(filename) as f:
+            testvector.read(f)
+        best = min(best, time.perf_counter() - start)
+    return best, len(testvector)
+
+def timeSerial(filename, decompress, repeat):
+    """Returns minimum time of decompressing the whole file, then parsing."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with open(filename, 'rb') as f:
+            data = decompress(f.read())
+        TestVector().read(io.BytesIO(data))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument('--orbits', type=int, default=10)
+    argp.add_argument('--occupancy', type=float, default=0.3)
+    argp.add_argument('--repeat', type=int, default=3)
+    args = argp.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        f = io.StringIO()
+        generate(f, args.orbits, args.occupancy)
+        data = f.getvalue().encode()
+        plain = os.path.join(tmp, 'bench.txt')
+        with open(plain, 'wb') as f:
+            f.write(data)
+        reference, rows = timeRead(plain, args.repeat)
+        print("{} rows, {:.1f} MB, workers {}".format(rows, len(data) / 1e6, os.cpu_count()))
+        print("{:<6} {:>9} {:>10} {:>10} {:>8}".format("codec", "size MB", "read", "serial", "vs plain"))
+        print("{:<6} {:>9.1f} {:>8.0f}ms {:>10} {:>8}".format("plain", len(data) / 1e6, reference * 1e3, "", ""))
+        for codec, (compress, decompress) in codecs().items():
+            filename = os.path.join(tmp, 'bench.txt.' + codec)
+            with open(filename, 'wb') as f:
+                f.write(compress(data))
+            with open(filename, 'rb') as f:
+                assert compressed.detectCompression(f) == codec
+            elapsed, count = timeRead(filename, args.repeat)
+            assert count == rows
+            serial = timeSerial(filename, decompress, args.repeat)
+            print("{:<6} {:>9.1f} {:>8.0f}ms {:>8.0f}ms {:>7.2f}x".format(
+                codec, os.path.getsize(filename) / 1e6, elapsed * 1e3, serial * 1e3, elapsed / reference))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark attribute statistics of the statistics panel.
+
+Times AttributeStatistics.summarize() over all rows (first pass and
+cached), over a BX range and after appending an orbit, and compares the
+first pass with decoding every non-empty cell by Format.values(), as the
+details panel does.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from generate import generate
+from testvector import TestVector
+from histogram import AttributeStatistics
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1e3
+
+def cellwise(testvector, cols):
+    """Decode every non-empty cell one by one."""
+    for col in cols:
+        fmt = testvector.formats[col]
+        for row in range(len(testvector)):
+            value = testvector.value(row, col)
+            if value:
+                fmt.values(value)
+
+def main():
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument('--orbits', type=int, default=20)
+    argp.add_argument('--occupancy', type=float, default=0.3)
+    args = argp.parse_args()
+
+    f = io.StringIO()
+    generate(f, args.orbits + 1, args.occupancy)
+    lines = f.getvalue().encode().splitlines(True)
+    testvector = TestVector()
+    testvector.read(io.BytesIO(b"".join(lines[:args.orbits * 3564])))
+    statistics = AttributeStatistics(testvector)
+    rows = len(testvector)
+    print("{} rows, {} object slots".format(rows, len(statistics.cols)))
+    print("{:<24} {:>10.1f}ms".format("all rows", timed(statistics.summarize)))
+    print("{:<24} {:>10.3f}ms".format("all rows (cached)", timed(statistics.summarize)))
+    print("{:<24} {:>10.1f}ms".format("BX range", timed(statistics.summarize, rows // 3, rows // 3 + 3564)))
+    orbit = TestVector()
+    orbit.read(io.BytesIO(b"".join(lines[args.orbits * 3564:])))
+    testvector.extend(orbit.bx, [orbit.column(col) for col in range(len(orbit.formats))])
+    statistics.update(rows)
+    print("{:<24} {:>10.1f}ms".format("appended orbit", timed(statistics.summarize)))
+    print("{:<24} {:>10.1f}ms".format("cell by cell", timed(cellwise, testvector, statistics.cols)))
+    print("memory {:.1f} kB".format(statistics.memoryUsage() / 1e3))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark table repaints while scrolling over all columns of an orbit.
+
+Compares the cached, delegate painted rendering path of DataTableModel with
+the previous path formatting every cell on each DisplayRole request.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from generate import generate
+from testvector import TestVector
+import gui
+
+class UncachedDataTableModel(gui.DataTableModel):
+    """Previous rendering path, formats every cell on request."""
+
+    def data(self, index, role):
+        if not index.isValid():
+            return QtCore.QVariant()
+        fmt = self.testvector.formats[index.column()]
+        value = self.testvector.value(index.row(), index.column())
+        if role == QtCore.Qt.UserRole:
+            return (fmt, value)
+        if role == QtCore.Qt.DisplayRole:
+            return fmt.format(value)
+        return QtCore.QVariant()
+
+def createView(model, delegate):
+    view = QtWidgets.QTableView()
+    view.setFont(QtGui.QFont("Monospace", 10))
+    view.setShowGrid(False)
+    view.verticalHeader().setDefaultSectionSize(20)
+    view.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+    view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+    if delegate:
+        view.setItemDelegate(delegate(view))
+    view.setModel(model)
+    view.resize(1920, 1080)
+    # Show all 59 columns at once, wide columns are clipped.
+    for col in range(model.columnCount(QtCore.QModelIndex())):
+        view.setColumnWidth(col, 32)
+    view.show()
+    return view
+
+def measure(app, view, frames):
+    """Returns list of repaint times while scrolling by one page per frame."""
+    scrollBar = view.verticalScrollBar()
+    times = []
+    for frame in range(frames):
+        scrollBar.setValue((frame * 50) % max(1, scrollBar.maximum()))
+        app.processEvents()
+        start = time.perf_counter()
+        view.viewport().repaint()
+        times.append(time.perf_counter() - start)
+    return times
+
+def main():
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument('--orbits', type=int, default=1)
+    argp.add_argument('--frames', type=int, default=200)
+    args = argp.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv)
+    with tempfile.NamedTemporaryFile('w+', suffix='.txt') as f:
+        generate(f, args.orbits)
+        f.flush()
+        testvector = TestVector()
+        with open(f.name, 'rb') as fb:
+            testvector.read(fb)
+
+    for name, modelClass, delegate in (
+        ("uncached", UncachedDataTableModel, None),
+        ("cached", gui.DataTableModel, gui.CellDelegate),
+    ):
+        view = createView(modelClass(testvector), delegate)
+        measure(app, view, 10) # warm up
+        times = sorted(measure(app, view, args.frames))
+        mean = sum(times) / len(times)
+        print("{:<10} mean {:6.2f} ms  p95 {:6.2f} ms  {:6.1f} fps".format(
+            name, mean * 1e3, times[int(len(times) * .95)] * 1e3, 1. / mean))
+        view.close()
+
+if __name__ == '__main__':
+    main()
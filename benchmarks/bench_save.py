@@ -0,0 +1,69 @@
+"""Benchmark saving cell edits.
+
+Edits a few cells of a synthetic file and compares journal.save(), writing
+only the modified lines in place, with writing the whole test vector using
+journal.saveAs(), for dense and lazy (memory mapped) test vectors.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from generate import generate
+from testvector import TestVector, LazyTestVector
+import journal
+
+def load(filename, lazy):
+    if lazy:
+        testvector = LazyTestVector()
+        testvector.open(filename)
+    else:
+        testvector = TestVector()
+        with open(filename, 'rb') as f:
+            testvector.read(f)
+    return testvector
+
+def edit(testvector, count, seed):
+    """Returns journal with count random cells set to random values."""
+    editJournal = journal.EditJournal(testvector)
+    rng = random.Random(seed)
+    for _ in range(count):
+        row = rng.randrange(len(testvector))
+        col = rng.randrange(len(testvector.formats))
+        editJournal.set(row, col, rng.getrandbits(testvector.formats[col].width))
+    return editJournal
+
+def main():
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument('--orbits', type=int, default=40)
+    argp.add_argument('--occupancy', type=float, default=0.3)
+    argp.add_argument('--edits', type=int, default=5)
+    args = argp.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'bench.txt')
+        with open(filename, 'w') as f:
+            generate(f, args.orbits, args.occupancy)
+        print("{} orbits, {:.1f} MB, {} edits".format(args.orbits, os.path.getsize(filename) / 1e6, args.edits))
+        print("{:<6} {:>10} {:>10}".format("mode", "save", "save as"))
+        for lazy in (False, True):
+            testvector = load(filename, lazy)
+            editJournal = edit(testvector, args.edits, seed=int(lazy))
+            start = time.perf_counter()
+            mode = journal.save(filename, testvector, editJournal)
+            elapsed = time.perf_counter() - start
+            assert mode == 'in-place'
+            start = time.perf_counter()
+            journal.saveAs(os.path.join(tmp, 'copy.txt'), testvector)
+            full = time.perf_counter() - start
+            print("{:<6} {:>8.1f}ms {:>8.0f}ms".format("lazy" if lazy else "dense", elapsed * 1e3, full * 1e3))
+            if lazy:
+                testvector.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark attaching to shared test vectors versus parsing the file.
+
+Times parsing a file, publishing it to a SharedStore and attaching to it,
+then starts a second process which either parses the file or attaches to
+the shared entry and reads all columns, reporting its time and growth of
+its private memory (resident set minus shared pages, Linux only).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+Root = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+sys.path.insert(0, Root)
+
+from generate import generate
+from shared import SharedStore
+import reader
+
+Child = """
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+import numpy as np
+import reader
+from shared import SharedStore
+def private():
+    try:
+        with open('/proc/self/statm') as f:
+            fields = f.read().split()
+        return (int(fields[1]) - int(fields[2])) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return 0
+before = private()
+start = time.perf_counter()
+if {attach!r}:
+    store = SharedStore({directory!r})
+    key, testvector = store.attach({filename!r})
+else:
+    testvector = reader.readTestVector({filename!r})
+for col in range(len(testvector.formats)):
+    np.asarray(testvector.column(col)).sum()
+print(json.dumps({{'time': time.perf_counter() - start, 'private': private() - before}}))
+"""
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1e3, result
+
+def child(filename, directory, attach):
+    script = Child.format(root=Root, filename=filename, directory=directory, attach=attach)
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument('--orbits', type=int, default=20)
+    argp.add_argument('--occupancy', type=float, default=0.3)
+    args = argp.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'bench.txt')
+        with open(filename, 'w') as f:
+            generate(f, args.orbits, args.occupancy)
+        store = SharedStore(os.path.join(tmp, 'shared'))
+        elapsed, testvector = timed(reader.readTestVector, filename)
+        print("{} rows, {:.1f} MB".format(len(testvector), os.path.getsize(filename) / 1e6))
+        print("{:<24} {:>10.1f}ms".format("parse", elapsed))
+        print("{:<24} {:>10.1f}ms".format("publish", timed(store.store, filename, testvector)[0]))
+        elapsed, (key, attached) = timed(store.attach, filename)
+        print("{:<24} {:>10.1f}ms".format("attach", elapsed))
+        for name, attach in (("process parsing", False), ("process attaching", True)):
+            result = child(filename, store.directory, attach)
+            print("{:<24} {:>10.1f}ms {:>8.1f} MB private".format(name, result['time'] * 1e3, result['private'] / 1e6))
+        store.release(key)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark dense versus sparse test vector storage over occupancies.
+
+Reports memory and the time of formatting table chunks, reading single
+values and densifying whole columns, used to choose the density threshold
+of SparseTestVector.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from generate import generate
+from testvector import TestVector, SparseTestVector
+
+ChunkSize = 256 # rows formatted at once by DataTableModel
+
+def nbytes(testvector):
+    return testvector._bx[:len(testvector)].nbytes + sum(testvector.column(col).nbytes for col in range(len(testvector.formats)))
+
+def measure(testvector, repeat):
+    """Returns times (ms) of formatting a chunk of every column, reading
+    single values and densifying all columns."""
+    columns = range(len(testvector.formats))
+    rows = len(testvector)
+    start = time.perf_counter()
+    for i in range(repeat):
+        offset = (i * 7919 * ChunkSize) % max(1, rows - ChunkSize)
+        for col in columns:
+            testvector.formatRange(col, offset, offset + ChunkSize)
+    chunk = (time.perf_counter() - start) / repeat * 1e3
+    start = time.perf_counter()
+    for i in range(repeat):
+        for col in columns:
+            testvector.value((i * 7919) % rows, col)
+    value = (time.perf_counter() - start) / repeat / len(columns) * 1e3
+    start = time.perf_counter()
+    for col in columns:
+        testvector.column(col)
+    column = (time.perf_counter() - start) * 1e3
+    return chunk, value, column
+
+def main():
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument('--orbits', type=int, default=10)
+    argp.add_argument('--repeat', type=int, default=200)
+    argp.add_argument('--occupancy', type=float, nargs='+', default=[0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.7])
+    args = argp.parse_args()
+
+    print("{:>9} {:>10} {:>10} {:>7} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+        "occupancy", "dense MB", "sparse MB", "ratio",
+        "chunk d", "chunk s", "value d", "value s", "column d", "column s"))
+    for occupancy in args.occupancy:
+        f = io.StringIO()
+        generate(f, args.orbits, occupancy)
+        data = f.getvalue().encode()
+        dense = TestVector()
+        dense.read(io.BytesIO(data))
+        sparse = SparseTestVector()
+        sparse.threshold = 1.0 # keep all columns sparse
+        sparse.read(io.BytesIO(data))
+        d = measure(dense, args.repeat)
+        s = measure(sparse, args.repeat)
+        print("{:>9.2f} {:>10.2f} {:>10.2f} {:>7.1f} {:>7.2f}ms {:>7.2f}ms {:>7.4f}ms {:>7.4f}ms {:>7.1f}ms {:>7.1f}ms".format(
+            occupancy, nbytes(dense) / 1e6, sparse.nbytes() / 1e6, nbytes(dense) / sparse.nbytes(),
+            d[0], s[0], d[1], s[1], d[2], s[2]))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Benchmark cold start times of the viewer and the command line tool.
+
+Every case runs in a fresh interpreter (with bytecode caching enabled),
+timed from process start to exit:
+
+  version   viewer.py --version, must not import Qt or NumPy
+  tvtool    tvtool.py --help, must not import Qt
+  core      importing the modules used by tvtool and worker processes,
+            must not import Qt
+  window    viewer.py with a file argument up to the moment files are
+            opened, the main window must be visible by then
+
+The exit status is non-zero if a check fails or the median of a case
+exceeds its limit (--limit name=ms), e.g. to guard startup in CI:
+
+  python3 benchmarks/bench_startup.py --limit version=150 --limit window=1500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+Root = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+sys.path.insert(0, Root)
+
+from generate import generate
+
+Report = "import json, sys; print(json.dumps({'qt': 'PyQt5' in sys.modules, 'numpy': 'numpy' in sys.modules}))"
+
+def versionScript():
+    return "\n".join((
+        "import sys, viewer",
+        "sys.argv = ['viewer.py', '--version']",
+        "try:",
+        "    viewer.main()",
+        "except SystemExit:",
+        "    pass",
+        Report,
+    ))
+
+def tvtoolScript():
+    return "\n".join((
+        "import sys, runpy",
+        "sys.argv = ['tvtool.py', '--help']",
+        "try:",
+        "    runpy.run_path('tvtool.py', run_name='__main__')",
+        "except SystemExit:",
+        "    pass",
+        Report,
+    ))
+
+def coreScript():
+    return "\n".join((
+        "import testvector, cache, shared, compressed, query, export, histogram, journal, reader",
+        Report,
+    ))
+
+def windowScript(filename):
+    """Runs the viewer, replacing MainWindow.loadDocuments() by a function
+    reporting whether the window is visible and quitting."""
+    return "\n".join((
+        "import json, sys, viewer, gui",
+        "sys.argv = ['viewer.py', '--no-cache', {!r}]".format(filename),
+        "def loadDocuments(self, filenames):",
+        "    print(json.dumps({'visible': self.isVisible(), 'documents': self.mdiArea.count()}))",
+        "    gui.QtWidgets.QApplication.quit()",
+        "gui.MainWindow.loadDocuments = loadDocuments",
+        "viewer.main()",
+    ))
+
+def run(script, env):
+    """Returns elapsed time (seconds) and the JSON object printed last."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', script], cwd=Root, env=env, capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - start
+    return elapsed, json.loads(result.stdout.strip().splitlines()[-1])
+
+def check(name, info):
+    """Returns list of failed checks of a case."""
+    failures = []
+    if name != 'window' and info['qt']:
+        failures.append("{} imports Qt".format(name))
+    if name == 'version' and info['numpy']:
+        failures.append("version imports NumPy")
+    if name == 'window' and (not info['visible'] or info['documents']):
+        failures.append("window not shown before opening files")
+    return failures
+
+def main():
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument('--repeat', type=int, default=5, help="number of runs per case (default: 5)")
+    argp.add_argument('--limit', action='append', default=[], metavar='<name>=<ms>', help="maximum median time of a case")
+    args = argp.parse_args()
+    limits = {name: float(value) for name, value in (limit.split('=') for limit in args.limit)}
+
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'bench.txt')
+        with open(filename, 'w') as f:
+            generate(f, 1)
+        cases = {
+            'version': versionScript(),
+            'tvtool': tvtoolScript(),
+            'core': coreScript(),
+            'window': windowScript(filename),
+        }
+        for name, script in cases.items():
+            run(script, env) # write bytecode, warm file system cache
+            times = []
+            for _ in range(args.repeat):
+                elapsed, info = run(script, env)
+                times.append(elapsed * 1e3)
+                failures.extend(check(name, info))
+            median = statistics.median(times)
+            line = "{:<8} min {:8.1f} ms  median {:8.1f} ms".format(name, min(times), median)
+            if name in limits:
+                line += "  limit {:.0f} ms".format(limits[name])
+                if median > limits[name]:
+                    failures.append("{} exceeds limit".format(name))
+            print(line)
+    for failure in sorted(set(failures)):
+        print("FAILED: {}".format(failure))
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
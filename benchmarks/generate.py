@@ -0,0 +1,55 @@
+"""Deterministic synthetic test vector generator used by the benchmarks."""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from testvector import TestVector
+
+BxPerOrbit = 3564
+
+def randomBits(rng, width, density):
+    """Returns random value of width bits, every bit set with probability
+    density."""
+    value = 0
+    for bit in range(width):
+        if rng.random() < density:
+            value |= 1 << bit
+    return value
+
+def generate(f, orbits=1, occupancy=0.3, seed=0, density=None):
+    """Write test vector of orbits * 3564 lines to text file object, every
+    object slot is non-zero with probability occupancy, reserved bits are
+    zero. Bits of non-zero bit vector columns (external, algorithms) are set
+    with probability density, or uniformly random if density is None."""
+    rng = random.Random(seed)
+    formats = TestVector().formats
+    for bx in range(orbits * BxPerOrbit):
+        items = ["{:04d}".format(bx % BxPerOrbit)]
+        for fmt in formats:
+            value = 0
+            if rng.random() < occupancy:
+                if density is not None and fmt.bitvector:
+                    value = randomBits(rng, fmt.width, density)
+                else:
+                    value = rng.getrandbits(fmt.width) & ~fmt.reservedbits
+            items.append(fmt.format(value))
+        f.write(" ".join(items))
+        f.write("\n")
+
+def main():
+    argp = argparse.ArgumentParser(description="generate synthetic test vector file")
+    argp.add_argument('filename', help="output file")
+    argp.add_argument('--orbits', type=int, default=1, help="number of orbits")
+    argp.add_argument('--occupancy', type=float, default=0.3, help="fraction of non-zero object slots")
+    argp.add_argument('--density', type=float, help="fraction of set bits in external and algorithms columns (default: uniform)")
+    argp.add_argument('--seed', type=int, default=0, help="random seed")
+    args = argp.parse_args()
+    with open(args.filename, 'w') as f:
+        generate(f, args.orbits, args.occupancy, args.seed, args.density)
+
+if __name__ == '__main__':
+    main()
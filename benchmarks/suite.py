@@ -0,0 +1,176 @@
+"""Benchmark suite timing parser, decoding, table model and details panel.
+
+Results are written as JSON, a previous result file can be passed using
+--compare to print relative timings, e.g.
+
+  python3 benchmarks/suite.py --orbits 10 --output before.json
+  python3 benchmarks/suite.py --orbits 10 --output after.json --compare before.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+from PyQt5 import QtCore, QtWidgets
+
+from generate import generate
+from testvector import TestVector
+import gui
+
+ViewportRows = 50
+
+def timeit(function, repeat):
+    """Returns list of run times of function in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+def benchRead(filename):
+    def run():
+        testvector = TestVector()
+        with open(filename, 'rb') as f:
+            testvector.read(f)
+    return run
+
+def benchDecode(testvector):
+    def run():
+        for col, fmt in enumerate(testvector.formats):
+            fmt.decodeArray(testvector.column(col))
+    return run
+
+def benchModelData(model):
+    """Request DisplayRole and UserRole of all cells of viewports spread
+    over the table."""
+    rows = model.rowCount(QtCore.QModelIndex())
+    columns = model.columnCount(QtCore.QModelIndex())
+    starts = np.linspace(0, max(0, rows - ViewportRows), 10).astype(int)
+    def run():
+        for start in starts:
+            # Drop cached text, every viewport is rendered for the first time.
+            model.updateRows(0)
+            for row in range(start, min(rows, start + ViewportRows)):
+                for col in range(columns):
+                    index = model.index(row, col)
+                    model.data(index, QtCore.Qt.DisplayRole)
+                    model.data(index, QtCore.Qt.UserRole)
+    return run
+
+def benchDetails(model, widget):
+    """Load and repaint details of the algorithms column for consecutive
+    rows."""
+    col = [fmt.name for fmt in model.testvector.formats].index('algorithms')
+    rows = min(100, model.rowCount(QtCore.QModelIndex()))
+    def run():
+        previous = QtCore.QModelIndex()
+        for row in range(rows):
+            current = model.index(row, col)
+            widget.load(current, previous)
+            widget.repaint()
+            previous = current
+    return run
+
+def revision():
+    """Returns git revision of the working tree or None."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def summarize(times, count=1):
+    """Returns statistics of run times in milliseconds, per item if count is
+    given."""
+    times = [t / count for t in times]
+    return {
+        'min': min(times) * 1e3,
+        'median': statistics.median(times) * 1e3,
+        'mean': statistics.mean(times) * 1e3,
+        'repeat': len(times),
+    }
+
+def main():
+    argp = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argp.add_argument('--orbits', type=int, default=10, help="number of orbits (default: 10)")
+    argp.add_argument('--occupancy', type=float, default=0.3, help="fraction of non-zero object slots")
+    argp.add_argument('--density', type=float, default=0.05, help="fraction of set bits in external and algorithms columns")
+    argp.add_argument('--seed', type=int, default=0, help="random seed")
+    argp.add_argument('--repeat', type=int, default=5, help="number of repetitions")
+    argp.add_argument('--output', help="write results to JSON file")
+    argp.add_argument('--compare', help="previous JSON results to compare with")
+    args = argp.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'bench.txt')
+        with open(filename, 'w') as f:
+            generate(f, args.orbits, args.occupancy, args.seed, args.density)
+        size = os.path.getsize(filename)
+        results['read'] = summarize(timeit(benchRead(filename), args.repeat))
+        results['read']['MB/s'] = size / 1e6 / (results['read']['min'] / 1e3)
+        testvector = TestVector()
+        with open(filename, 'rb') as f:
+            testvector.read(f)
+    results['decode'] = summarize(timeit(benchDecode(testvector), args.repeat))
+    model = gui.DataTableModel(testvector)
+    model.fetchAll()
+    cells = 10 * ViewportRows * model.columnCount(QtCore.QModelIndex())
+    times = timeit(benchModelData(model), args.repeat)
+    results['model.data'] = summarize(times)
+    results['model.data per cell'] = summarize(times, cells)
+    widget = gui.DetailsWidget(None)
+    widget.resize(400, 800)
+    widget.show()
+    app.processEvents()
+    results['details.load'] = summarize(timeit(benchDetails(model, widget), args.repeat), 100)
+
+    report = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'revision': revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'qt': QtCore.QT_VERSION_STR,
+        'machine': platform.machine(),
+        'parameters': {
+            'orbits': args.orbits,
+            'occupancy': args.occupancy,
+            'density': args.density,
+            'seed': args.seed,
+            'rows': len(testvector),
+            'bytes': size,
+        },
+        'results': results,
+    }
+
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f).get('results', {})
+    for name, result in results.items():
+        line = "{:<22} min {:9.3f} ms  median {:9.3f} ms".format(name, result['min'], result['median'])
+        if name in previous:
+            line += "  {:+6.1f} %".format((result['min'] / previous[name]['min'] - 1) * 100)
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+if __name__ == '__main__':
+    main()
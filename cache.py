@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from testvector import TestVector
+import timing
+
+# -----------------------------------------------------------------------------
+#  Test vector cache
+# -----------------------------------------------------------------------------
+
+def defaultCacheDir():
+    """Returns default cache directory, can be set by TESTVECTOR_CACHE_DIR."""
+    path = os.environ.get('TESTVECTOR_CACHE_DIR')
+    if path:
+        return path
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'testvector-editor')
+
+class TestVectorCache:
+    """Persistent on-disk cache of parsed test vectors.
+
+    Every entry is a directory holding one .npy file per column (loaded memory
+    mapped) and a meta.json file. Entries are keyed by path, size, mtime and a
+    content hash sampled from the head, middle and tail of the file. Line
+    indices of lazy test vectors are kept as <hash>.idx files. The least
+    recently used entries and indices are evicted if the cache exceeds maxsize
+    bytes. Other files in the directory are never touched.
+    """
+
+    version = 2
+    samplesize = 1024 * 1024
+
+    # Names of entry directories and index files created by the cache.
+    entryPattern = re.compile(r'^[0-9a-f]{40}$')
+    indexPattern = re.compile(r'^[0-9a-f]{40}\.idx$')
+
+    def __init__(self, directory=None, maxsize=4 * 1024 ** 3):
+        self.directory = directory or defaultCacheDir()
+        self.maxsize = maxsize
+
+    def key(self, filename):
+        """Returns cache key of file."""
+        filename = os.path.abspath(filename)
+        st = os.stat(filename)
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update("{}\0{}\0{}\0{}".format(self.version, filename, st.st_size, st.st_mtime_ns).encode())
+        with open(filename, 'rb') as f:
+            for offset in sorted({0, max(0, st.st_size // 2 - self.samplesize // 2), max(0, st.st_size - self.samplesize)}):
+                f.seek(offset)
+                digest.update(f.read(self.samplesize))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def indexPath(self, filename):
+        """Returns path for persisting the line index of a lazy test vector,
+        the index itself is validated against size and mtime of the file."""
+        digest = hashlib.blake2b(os.path.abspath(filename).encode(), digest_size=20)
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, "{}.idx".format(digest.hexdigest()))
+        try:
+            os.utime(path) # mark as recently used
+        except OSError:
+            pass
+        return path
+
+    def contains(self, filename):
+        """Returns True if there is an entry for the current file content."""
+        try:
+            return os.path.isfile(os.path.join(self.path(self.key(filename)), 'meta.json'))
+        except OSError:
+            return False
+
+    def remove(self, filename):
+        """Remove entry of file, memory mapped columns stay valid on POSIX."""
+        try:
+            shutil.rmtree(self.path(self.key(filename)), ignore_errors=True)
+        except OSError:
+            pass
+
+    @timing.timed()
+    def load(self, filename):
+        """Returns cached test vector or None if there is no valid entry.
+        Columns are memory mapped copy-on-write."""
+        try:
+            key = self.key(filename)
+        except OSError:
+            return None
+        return self.loadEntry(key)
+
+    def loadEntry(self, key):
+        """Returns test vector of entry key or None."""
+        try:
+            path = self.path(key)
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+            testvector = TestVector()
+            if meta['columns'] != len(testvector.formats):
+                return None
+            bx = np.load(os.path.join(path, 'bx.npy'), mmap_mode='c')
+            columns = [np.load(os.path.join(path, '{}.npy'.format(col)), mmap_mode='c') for col in range(meta['columns'])]
+            os.utime(os.path.join(path, 'meta.json')) # mark as recently used
+        except (OSError, ValueError, KeyError):
+            return None
+        testvector.assign(bx, columns)
+        testvector.offset = meta.get('offset', 0)
+        testvector.checksum = meta.get('checksum', 0)
+        testvector.lines = meta.get('lines', 0)
+        testvector.partial = meta.get('partial', 0)
+        return testvector
+
+    @timing.timed()
+    def store(self, filename, testvector, key=None):
+        """Store parsed test vector, evicts old entries if required. Pass the
+        key computed before parsing if the file might change meanwhile."""
+        key = key or self.key(filename)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=self.directory)
+        try:
+            self.writeEntry(tmp, filename, testvector)
+            shutil.rmtree(self.path(key), ignore_errors=True)
+            os.rename(tmp, self.path(key))
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.evict()
+
+    def writeEntry(self, path, filename, testvector):
+        """Write columns and meta.json of test vector to directory path."""
+        np.save(os.path.join(path, 'bx.npy'), testvector.bx)
+        for col in range(len(testvector.formats)):
+            np.save(os.path.join(path, '{}.npy'.format(col)), testvector.column(col))
+        meta = {
+            'filename': os.path.abspath(filename),
+            'rows': len(testvector),
+            'columns': len(testvector.formats),
+            'created': time.time(),
+            'offset': testvector.offset,
+            'checksum': testvector.checksum,
+            'lines': testvector.lines,
+            'partial': testvector.partial,
+        }
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+    def entries(self):
+        """Returns list of (last used, size, path) tuples of cache entries and
+        persisted indices."""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if self.indexPattern.match(name) and os.path.isfile(path):
+                    st = os.stat(path)
+                    entries.append((st.st_mtime, st.st_size, path))
+                elif self.entryPattern.match(name) and os.path.isfile(os.path.join(path, 'meta.json')):
+                    size = sum(entry.stat().st_size for entry in os.scandir(path))
+                    entries.append((os.stat(os.path.join(path, 'meta.json')).st_mtime, size, path))
+            except OSError:
+                continue # removed meanwhile
+        return entries
+
+    def size(self):
+        return sum(size for used, size, path in self.entries())
+
+    def removePath(self, path):
+        """Remove entry directory or index file."""
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def evict(self):
+        """Remove least recently used entries and indices exceeding maxsize."""
+        entries = sorted(self.entries(), reverse=True)
+        total = 0
+        for used, size, path in entries:
+            total += size
+            if total > self.maxsize:
+                self.removePath(path)
+
+    def clear(self):
+        """Remove all cache entries, persisted indices and temporary
+        directories left by interrupted stores. The directory itself and
+        other files are kept."""
+        if not os.path.isdir(self.directory):
+            return
+        for used, size, path in self.entries():
+            self.removePath(path)
+        for name in os.listdir(self.directory):
+            if name.startswith('.tmp-'):
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
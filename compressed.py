@@ -0,0 +1,270 @@
+import bz2
+import collections
+import concurrent.futures
+import lzma
+import os
+import queue
+import threading
+import zlib
+
+try:
+    from compression import zstd # Python >= 3.14
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+# -----------------------------------------------------------------------------
+#  Compressed input
+# -----------------------------------------------------------------------------
+
+Magics = (
+    (b"\x1f\x8b", 'gzip'),
+    (b"BZh", 'bz2'),
+    (b"\xfd7zXZ\x00", 'xz'),
+    (b"\x28\xb5\x2f\xfd", 'zstd'),
+)
+
+# File name extensions of compressed files.
+Extensions = ('.gz', '.bgz', '.bz2', '.xz', '.zst')
+
+def stripExtension(filename):
+    """Returns file name without extension of compressed files, e.g.
+    'sample.txt' for 'sample.txt.gz'."""
+    root, ext = os.path.splitext(filename)
+    return root if ext.lower() in Extensions else filename
+
+def detectCompression(f):
+    """Returns codec of binary file object by its magic bytes ('gzip', 'bz2',
+    'xz' or 'zstd') or None for uncompressed files. BGZF files (block gzip)
+    are reported as 'bgzf'. The file position is restored."""
+    pos = f.tell()
+    header = f.read(18)
+    f.seek(pos)
+    for magic, codec in Magics:
+        if header.startswith(magic):
+            if codec == 'gzip' and isBgzfHeader(header):
+                return 'bgzf'
+            return codec
+    return None
+
+def isCompressed(filename):
+    with open(filename, 'rb') as f:
+        return detectCompression(f) is not None
+
+def isBgzfHeader(header):
+    """BGZF members have the FEXTRA flag set and a 'BC' extra subfield
+    holding the size of the member."""
+    return len(header) >= 18 and header[3] & 4 and header[12:14] == b"BC"
+
+def createDecompressor(codec):
+    if codec in ('gzip', 'bgzf'):
+        return zlib.decompressobj(wbits=31)
+    if codec == 'bz2':
+        return bz2.BZ2Decompressor()
+    if codec == 'xz':
+        return lzma.LZMADecompressor()
+    if codec == 'zstd':
+        if zstd is None:
+            raise ValueError("reading zstd compressed files requires the zstandard module")
+        if hasattr(zstd, 'ZstdDecompressor') and hasattr(zstd.ZstdDecompressor, 'decompressobj'):
+            return zstd.ZstdDecompressor().decompressobj()
+        return zstd.ZstdDecompressor()
+    raise ValueError("unsupported compression: {}".format(codec))
+
+def iterStream(f, codec, chunksize):
+    """Yields tuples of decompressed data and compressed file position,
+    concatenated members (gzip) or streams (bz2, xz, zstd) are decoded one
+    after another."""
+    decompressor = createDecompressor(codec)
+    pending = False
+    while True:
+        data = f.read(chunksize)
+        if not data:
+            break
+        position = f.tell()
+        while data:
+            yield decompressor.decompress(data), position
+            pending = True
+            if not decompressor.eof:
+                break
+            # Next member, trailing zero padding is ignored.
+            data = decompressor.unused_data
+            pending = False
+            if not data.strip(b"\0"):
+                break
+            decompressor = createDecompressor(codec)
+    if pending:
+        raise OSError("compressed file ended before the end of stream was reached")
+
+def iterBgzfMembers(f):
+    """Yields BGZF members (complete gzip members of at most 64 kB) read
+    from file object, sizes are taken from their 'BC' extra subfield."""
+    while True:
+        header = f.read(12)
+        if not header:
+            break
+        if len(header) < 12 or not header.startswith(b"\x1f\x8b") or not header[3] & 4:
+            raise OSError("invalid BGZF member at offset {}".format(f.tell() - len(header)))
+        xlen = int.from_bytes(header[10:12], 'little')
+        extra = f.read(xlen)
+        size = None
+        pos = 0
+        while pos + 4 <= len(extra):
+            length = int.from_bytes(extra[pos + 2:pos + 4], 'little')
+            if extra[pos:pos + 2] == b"BC" and length == 2:
+                size = int.from_bytes(extra[pos + 4:pos + 6], 'little') + 1
+            pos += 4 + length
+        if size is None:
+            raise OSError("BGZF member without size at offset {}".format(f.tell() - len(header) - xlen))
+        rest = f.read(size - 12 - xlen)
+        if len(rest) != size - 12 - xlen:
+            raise OSError("compressed file ended before the end of stream was reached")
+        yield header + extra + rest
+
+def decompressMembers(members):
+    """Decompress list of gzip members, zlib releases the GIL so batches are
+    decompressed in parallel by worker threads."""
+    return b"".join(zlib.decompress(member, 31) for member in members)
+
+def iterBgzf(f, workers, batchsize=16):
+    """Yields tuples of decompressed data and compressed file position,
+    batches of members are decompressed in parallel keeping their order."""
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        pending = collections.deque()
+        batch = []
+        for member in iterBgzfMembers(f):
+            batch.append(member)
+            if len(batch) == batchsize:
+                pending.append((executor.submit(decompressMembers, batch), f.tell()))
+                batch = []
+            if len(pending) > workers * 2:
+                future, position = pending.popleft()
+                yield future.result(), position
+        if batch:
+            pending.append((executor.submit(decompressMembers, batch), f.tell()))
+        while pending:
+            future, position = pending.popleft()
+            yield future.result(), position
+
+class DecompressedFile:
+    """Read only binary file object decompressing a file on a background
+    thread, so decompression is pipelined with parsing. BGZF files are
+    decompressed by a pool of threads."""
+
+    chunksize = 256 * 1024 # compressed bytes read at once
+    depth = 32 # decompressed chunks buffered ahead
+
+    def __init__(self, f, codec, workers=None):
+        self.f = f
+        self.codec = codec
+        self.workers = workers or os.cpu_count() or 1
+        self.buffer = b""
+        self.pos = 0
+        self.compressedPos = 0
+        self.eof = False
+        self.queue = queue.Queue(self.depth)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def run(self):
+        try:
+            if self.codec == 'bgzf':
+                chunks = iterBgzf(self.f, self.workers)
+            else:
+                chunks = iterStream(self.f, self.codec, self.chunksize)
+            for chunk in chunks:
+                if self.stopped.is_set():
+                    return
+                self.put(chunk)
+        except Exception as exception:
+            self.put(exception)
+        self.put(None)
+
+    def put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def fetch(self):
+        """Returns next decompressed chunk or None at end of file."""
+        if self.eof:
+            return None
+        item = self.queue.get()
+        if item is None:
+            self.eof = True
+            return None
+        if isinstance(item, Exception):
+            self.eof = True
+            if not isinstance(item, (OSError, ValueError)):
+                raise OSError("invalid {} data: {}".format(self.codec, item)) from item
+            raise item
+        data, self.compressedPos = item
+        return data
+
+    def read(self, size=-1):
+        chunks = [self.buffer]
+        count = len(self.buffer)
+        while size < 0 or count < size:
+            data = self.fetch()
+            if data is None:
+                break
+            chunks.append(data)
+            count += len(data)
+        data = b"".join(chunks)
+        self.buffer = b""
+        if 0 <= size < len(data):
+            data, self.buffer = data[:size], data[size:]
+        self.pos += len(data)
+        return data
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self.pos
+
+    def fileno(self):
+        return self.f.fileno()
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+        self.f.close()
+
+def openFile(filename):
+    """Returns binary file object of file, compressed files are decompressed
+    transparently."""
+    f = open(filename, 'rb')
+    try:
+        codec = detectCompression(f)
+    except OSError:
+        f.close()
+        raise
+    if codec is None:
+        return f
+    if codec == 'zstd' and zstd is None:
+        f.close()
+        raise ValueError("reading zstd compressed files requires the zstandard module")
+    return DecompressedFile(f, codec)
+
+def compressedPosition(f):
+    """Returns position in the underlying file, used for progress of file
+    objects returned by openFile()."""
+    if isinstance(f, DecompressedFile):
+        return f.compressedPos
+    return f.tell()
@@ -0,0 +1,77 @@
+import numpy as np
+
+# -----------------------------------------------------------------------------
+#  Test vector diff
+# -----------------------------------------------------------------------------
+
+def compareMask(fmt, ignore=()):
+    """Returns bit mask of bits compared for format, ignoring attributes
+    listed in ignore by name (e.g. 'reserved') or by format and name
+    (e.g. 'muon.reserved'). Wide formats return an array of 64 bit words."""
+    mask = (1 << fmt.width) - 1
+    for attr in fmt.attributes:
+        if attr.name in ignore or "{}.{}".format(fmt.name, attr.name) in ignore:
+            mask &= ~attr.bitmask
+    if fmt.width > 64:
+        return np.array([(mask >> (64 * i)) & 0xffffffffffffffff for i in range(fmt.words)], dtype=np.uint64)
+    return fmt.dtype(mask)
+
+class TestVectorDiff:
+    """Vectorized cell wise comparison of two test vectors.
+
+    Rows are compared by position, rows present in only one of the test vectors
+    mismatch in every column. The mismatch mask has shape (rows, columns).
+    """
+
+    def __init__(self, reference, other, ignore=()):
+        self.reference = reference
+        self.other = other
+        self.ignore = frozenset(ignore)
+        self.rows = max(len(reference), len(other))
+        common = min(len(reference), len(other))
+        self.masks = [compareMask(fmt, self.ignore) for fmt in reference.formats]
+        self.mask = np.ones((self.rows, len(reference.formats)), dtype=bool)
+        for col, fmt in enumerate(reference.formats):
+            delta = self.delta(col, 0, common)
+            self.mask[:common, col] = delta.any(axis=1) if delta.ndim > 1 else delta != 0
+        self.rowMask = self.mask.any(axis=1)
+        self.counts = self.mask.sum(axis=0)
+        # Flat indices of mismatching cells in row major order.
+        self.cells = np.flatnonzero(self.mask)
+
+    def delta(self, col, start, stop):
+        """Returns masked XOR of both test vectors for a column."""
+        a = self.reference.column(col)[start:stop]
+        b = self.other.column(col)[start:stop]
+        return (a ^ b) & self.masks[col]
+
+    def count(self):
+        """Returns total number of mismatching cells."""
+        return len(self.cells)
+
+    def isMismatch(self, row, col):
+        return bool(self.mask[row, col])
+
+    def attributes(self, row, col):
+        """Returns list of names of mismatching attributes of a cell."""
+        if row >= min(len(self.reference), len(self.other)):
+            return list(self.reference.formats[col].names)
+        fmt = self.reference.formats[col]
+        values = fmt.decodeArray(self.delta(col, row, row + 1))[0]
+        return [name for name, value in zip(fmt.names, values) if value]
+
+    def next(self, row, col, backward=False, column=None):
+        """Returns (row, col) of next (or previous) mismatch after cell, or
+        None. Restricts the search to a single column if column is given."""
+        columns = self.mask.shape[1]
+        if column is not None:
+            rows = np.flatnonzero(self.mask[:, column])
+            pos = np.searchsorted(rows, row, side='left' if backward else 'right')
+            pos = pos - 1 if backward else pos
+            return (int(rows[pos]), column) if 0 <= pos < len(rows) else None
+        cell = row * columns + col
+        pos = np.searchsorted(self.cells, cell, side='left' if backward else 'right')
+        pos = pos - 1 if backward else pos
+        if not 0 <= pos < len(self.cells):
+            return None
+        return divmod(int(self.cells[pos]), columns)
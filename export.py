@@ -0,0 +1,296 @@
+import os
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+
+from testvector import TestVector
+
+class ExportCancelled(RuntimeError): pass
+
+# -----------------------------------------------------------------------------
+#  Export fields
+# -----------------------------------------------------------------------------
+
+class ExportField:
+    """Output column, either the raw value of a format or one of its decoded
+    attributes (index into Format.decodeArray()). Decoded bit vectors are a
+    single field of shape (width,) holding one byte per bit."""
+
+    def __init__(self, col, fmt, attr=None, index=None):
+        self.col = col
+        self.fmt = fmt
+        self.attr = attr
+        self.index = index
+        if fmt.bitvector and attr is None and index is not None:
+            self.name = "{}.bits".format(fmt.label())
+            self.dtype = np.dtype(np.uint8)
+            self.shape = (fmt.width,)
+        elif attr is not None:
+            self.name = "{}.{}".format(fmt.label(), attr.name)
+            self.dtype = np.min_scalar_type((1 << attr.bitwidth) - 1)
+            self.shape = ()
+        else:
+            self.name = fmt.label()
+            self.dtype = np.dtype(fmt.dtype)
+            self.shape = (fmt.words,) if fmt.width > 64 else ()
+
+    @property
+    def decoded(self):
+        return self.index is not None
+
+    def headers(self):
+        """Returns CSV column names of the field."""
+        if self.fmt.bitvector and self.decoded:
+            return ["{}.{}".format(self.fmt.label(), i) for i in range(self.fmt.width)]
+        return [self.name]
+
+    def values(self, column, decoded=None):
+        """Returns field array of a column chunk, decoded is the result of
+        decodeArray() of the chunk (shared by all fields of a column)."""
+        if not self.decoded:
+            return column
+        if self.fmt.bitvector:
+            return decoded
+        return decoded[:, self.index].astype(self.dtype)
+
+    def text(self, values):
+        """Returns list of CSV cells for every row, a list per sub-column for
+        decoded bit vectors."""
+        if self.fmt.bitvector and self.decoded:
+            return [cells.tolist() for cells in np.array(['0', '1'])[values].T]
+        if self.decoded:
+            return [values.astype(str).tolist()]
+        return [self.fmt.formatColumn(values).astype(str).tolist()]
+
+def exportFields(formats, objects=None, decoded=False):
+    """Returns list of export fields for formats selected by name or label
+    (all if objects is empty), e.g. objects={'muon', 'jet[0]'}. Decoded fields
+    omit reserved attributes, formats without attributes are exported raw."""
+    fields = []
+    for col, fmt in enumerate(formats):
+        if objects and fmt.name not in objects and fmt.label() not in objects:
+            continue
+        if not decoded or not fmt.attributes:
+            fields.append(ExportField(col, fmt))
+        elif fmt.bitvector:
+            fields.append(ExportField(col, fmt, index=0))
+        else:
+            for index, attr in enumerate(fmt.attributes):
+                if attr.name != "reserved":
+                    fields.append(ExportField(col, fmt, attr, index))
+    return fields
+
+# -----------------------------------------------------------------------------
+#  Row sources
+# -----------------------------------------------------------------------------
+
+def iterRows(testvector, columns=None, start=0, stop=None, chunksize=65536):
+    """Yields tuples of BX array and list of column arrays (None for columns
+    not listed in columns) for chunks of rows start to stop of a loaded test
+    vector."""
+    stop = len(testvector) if stop is None else min(stop, len(testvector))
+    columns = set(range(len(testvector.formats)) if columns is None else columns)
+    for offset in range(start, stop, chunksize):
+        end = min(offset + chunksize, stop)
+        yield testvector.bx[offset:end], [
+            testvector.column(col, offset, end) if col in columns else None
+            for col in range(len(testvector.formats))]
+
+def iterFile(f, start=0, stop=None, blocksize=None, diagnostics=None):
+    """Yields tuples of BX array and list of column arrays of rows start to
+    stop parsed from binary file object block by block, memory use does not
+    depend on the file size."""
+    testvector = TestVector()
+    row = 0
+    for bx, columns in testvector.parse(f, blocksize, diagnostics=diagnostics):
+        first = max(start - row, 0)
+        last = len(bx) if stop is None else min(stop - row, len(bx))
+        row += len(bx)
+        if last > first:
+            yield bx[first:last], [column[first:last] for column in columns]
+        if stop is not None and row >= stop:
+            break
+
+# -----------------------------------------------------------------------------
+#  Writers
+# -----------------------------------------------------------------------------
+
+class ExportWriter:
+    """Base class of writers, output is written to a temporary path next to
+    path and renamed on close(), abort() removes partial output."""
+
+    extension = None
+
+    def __init__(self, path, fields):
+        self.path = path
+        self.fields = fields
+        self.rows = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.tmp = tempfile.mkdtemp(prefix='.export-', dir=directory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, bx, values):
+        """Write chunk of rows, values is list of field arrays."""
+        raise NotImplementedError()
+
+    def finish(self):
+        """Returns path of completed output inside the temporary directory."""
+        raise NotImplementedError()
+
+    def close(self):
+        result = self.finish()
+        if os.path.isdir(self.path) and not os.path.islink(self.path):
+            shutil.rmtree(self.path)
+        os.replace(result, self.path)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def abort(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+class CsvWriter(ExportWriter):
+    """Writes comma separated values with a header line, raw values as hex,
+    decoded attributes as decimal numbers."""
+
+    extension = '.csv'
+
+    def __init__(self, path, fields):
+        super(CsvWriter, self).__init__(path, fields)
+        self.f = open(os.path.join(self.tmp, 'export.csv'), 'w')
+        headers = ['bx']
+        for field in fields:
+            headers.extend(field.headers())
+        self.f.write(",".join(headers) + "\n")
+
+    def write(self, bx, values):
+        cells = [bx.astype(str).tolist()]
+        for field, array in zip(self.fields, values):
+            cells.extend(field.text(array))
+        if len(bx):
+            self.f.write("\n".join(map(",".join, zip(*cells))) + "\n")
+        self.rows += len(bx)
+
+    def finish(self):
+        self.f.close()
+        return self.f.name
+
+    def abort(self):
+        self.f.close()
+        super(CsvWriter, self).abort()
+
+class NpyColumn:
+    """Appends rows to a .npy file of unknown length, the header is written
+    with fixed size and rewritten with the final shape on close()."""
+
+    HeaderSize = 128
+
+    def __init__(self, filename, dtype, shape=()):
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self.shape = tuple(shape)
+        self.rows = 0
+        self.f = open(filename, 'wb')
+        self.writeHeader()
+
+    def writeHeader(self):
+        header = repr({
+            'descr': np.lib.format.dtype_to_descr(self.dtype),
+            'fortran_order': False,
+            'shape': (self.rows,) + self.shape,
+        })
+        size = self.HeaderSize - len(np.lib.format.MAGIC_PREFIX) - 4
+        self.f.seek(0)
+        self.f.write(np.lib.format.magic(1, 0))
+        self.f.write(size.to_bytes(2, 'little'))
+        self.f.write(header.ljust(size - 1).encode('latin1') + b"\n")
+
+    def write(self, array):
+        self.f.write(np.ascontiguousarray(array, dtype=self.dtype).tobytes())
+        self.rows += len(array)
+
+    def close(self):
+        self.writeHeader()
+        self.f.close()
+
+class NpyWriter(ExportWriter):
+    """Writes a directory holding one .npy file per field and bx.npy."""
+
+    extension = ''
+
+    def __init__(self, path, fields):
+        super(NpyWriter, self).__init__(path, fields)
+        self.directory = os.path.join(self.tmp, 'export')
+        os.mkdir(self.directory)
+        self.bx = NpyColumn(os.path.join(self.directory, 'bx.npy'), np.int64)
+        self.columns = [NpyColumn(os.path.join(self.directory, field.name + '.npy'), field.dtype, field.shape) for field in fields]
+
+    def write(self, bx, values):
+        self.bx.write(bx)
+        for column, array in zip(self.columns, values):
+            column.write(array)
+        self.rows += len(bx)
+
+    def finish(self):
+        for column in [self.bx] + self.columns:
+            column.close()
+        return self.directory
+
+    def abort(self):
+        for column in [self.bx] + self.columns:
+            column.f.close()
+        super(NpyWriter, self).abort()
+
+class NpzWriter(NpyWriter):
+    """Writes a compressed .npz bundle, loadable using numpy.load(), columns
+    are written as .npy files first and then added one by one."""
+
+    extension = '.npz'
+
+    def finish(self):
+        directory = super(NpzWriter, self).finish()
+        filename = os.path.join(self.tmp, 'export.npz')
+        with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            for name in ['bx'] + [field.name for field in self.fields]:
+                path = os.path.join(directory, name + '.npy')
+                archive.write(path, name + '.npy')
+                os.remove(path)
+        return filename
+
+Writers = {
+    'csv': CsvWriter,
+    'npy': NpyWriter,
+    'npz': NpzWriter,
+}
+
+# -----------------------------------------------------------------------------
+#  Export
+# -----------------------------------------------------------------------------
+
+def export(chunks, fields, writer, progress=None, cancelled=None):
+    """Write chunks yielded by iterRows() or iterFile() using writer, returns
+    number of rows written. Calls progress with the rows written after every
+    chunk, stops if cancelled returns True."""
+    with writer:
+        for bx, columns in chunks:
+            if cancelled and cancelled():
+                raise ExportCancelled()
+            decoded = {}
+            values = []
+            for field in fields:
+                column = columns[field.col]
+                if field.decoded and field.col not in decoded:
+                    decoded[field.col] = field.fmt.decodeArray(column)
+                values.append(field.values(column, decoded.get(field.col)))
+            writer.write(bx, values)
+            if progress:
+                progress(writer.rows)
+    return writer.rows
@@ -0,0 +1,2826 @@
+from PyQt5 import QtCore
+from PyQt5 import QtGui
+from PyQt5 import QtWidgets
+
+import functools
+import multiprocessing
+import shutil
+import signal
+import sys, os
+import tempfile
+
+import numpy as np
+
+from testvector import TestVector, SparseTestVector, LazyTestVector, Diagnostics
+from cache import TestVectorCache
+from shared import SharedStore
+from reader import FileReadError, NoSuchFileError, UnknownFileTypeError
+import reader
+import query
+from diff import TestVectorDiff
+from overview import OverviewSummary
+from histogram import AttributeStatistics
+import export
+import compressed
+import journal
+import timing
+from viewer import __version__
+
+# -----------------------------------------------------------------------------
+#  Exception handler.
+# -----------------------------------------------------------------------------
+
+def fileExceptionHandler(f):
+    """Function decorator returning a exception handler function."""
+    def _critical(title, *args):
+        QtWidgets.QMessageBox.critical(None, title, " ".join((str(arg) for arg in args)))
+    @functools.wraps(f)
+    def _exceptionHandler(*args, **kwargs):
+        try:
+            f(*args, **kwargs)
+        except FileReadError as exception:
+            _critical("Read error", "<strong>Failed to read from file:</strong><br/>", exception)
+        except NoSuchFileError as exception:
+            _critical("No such file", "<strong>No such file to open:</strong><br/>", exception)
+        except UnknownFileTypeError as exception:
+            _critical("Unknown filetype", "<strong>Unknown file type:</strong><br/>", exception)
+        except:
+            raise
+    return _exceptionHandler
+
+# -----------------------------------------------------------------------------
+#  Main window class.
+# -----------------------------------------------------------------------------
+
+class MainWindow(QtWidgets.QMainWindow):
+
+    AppTitle = "Testvector Viewer"
+    AppVersion = __version__
+
+    # Files larger than this are opened in lazy (memory mapped) mode.
+    LazyThreshold = 512 * 1024 * 1024
+
+    def __init__(self, parent = None):
+        super(MainWindow, self).__init__(parent)
+        self.lazy = False
+        self.sparse = True
+        self.cache = None
+        self.shared = None
+        self.exportThreads = []
+        self.openThreads = []
+        self.timingDialog = None
+        # Setup main window.
+        self.setWindowTitle(self.AppTitle)
+        self.setWindowIcon(QtGui.QIcon.fromTheme('utilities-system-monitor'))
+        self.resize(1000, 700)
+
+        # Create menus, toolbars and status bar.
+        self.createActions()
+        self.createToolbars()
+        self.createMenubar()
+        self.createStatusbar()
+
+        # Setup central MDI area.
+        self.mdiArea = MdiArea(self)
+        self.mdiArea.currentChanged.connect(self.updateEditActions)
+        self.setCentralWidget(self.mdiArea)
+
+        # Keep memory of documents within budget, see --memory-budget.
+        self.documentManager = DocumentManager(self.mdiArea, 0, self)
+        self.memoryTimer = QtCore.QTimer(self)
+        self.memoryTimer.setInterval(1000)
+        self.memoryTimer.timeout.connect(self.updateMemory)
+        self.memoryTimer.start()
+
+    def createActions(self):
+        """Create actions used in menu bar and tool bars."""
+
+        # Action for opening a new connections file.
+        self.openAct = QtWidgets.QAction("&Open...", self)
+        self.openAct.setShortcut(QtGui.QKeySequence.Open)
+        self.openAct.setStatusTip("Open an existing file")
+        self.openAct.setIcon(QtGui.QIcon.fromTheme('document-open'))
+        self.openAct.triggered.connect(self.onOpen)
+
+        # Actions for saving edits of the current document.
+        self.saveAct = QtWidgets.QAction("&Save", self)
+        self.saveAct.setShortcut(QtGui.QKeySequence.Save)
+        self.saveAct.setStatusTip("Write edited cells back to the file")
+        self.saveAct.setIcon(QtGui.QIcon.fromTheme('document-save'))
+        self.saveAct.setEnabled(False)
+        self.saveAct.triggered.connect(self.onSave)
+        self.saveAsAct = QtWidgets.QAction("Save &As...", self)
+        self.saveAsAct.setShortcut(QtGui.QKeySequence.SaveAs)
+        self.saveAsAct.setStatusTip("Write the current document to a new file")
+        self.saveAsAct.setEnabled(False)
+        self.saveAsAct.triggered.connect(self.onSaveAs)
+
+        # Action for comparing two files.
+        self.compareAct = QtWidgets.QAction("Co&mpare...", self)
+        self.compareAct.setStatusTip("Compare two test vector files")
+        self.compareAct.triggered.connect(self.onCompare)
+
+        # Action for exporting the current document.
+        self.exportAct = QtWidgets.QAction("&Export...", self)
+        self.exportAct.setStatusTip("Export raw or decoded columns to CSV or NumPy files")
+        self.exportAct.setIcon(QtGui.QIcon.fromTheme('document-save-as'))
+        self.exportAct.triggered.connect(self.onExport)
+
+        self.closeAct = QtWidgets.QAction(self.tr("&Close"), self)
+        self.closeAct.setShortcuts(QtGui.QKeySequence.Close)
+        self.closeAct.setStatusTip("Close the current file")
+        self.closeAct.setEnabled(False)
+        self.closeAct.triggered.connect(self.onClose)
+
+        # Action to quit the application.
+        self.quitAct = QtWidgets.QAction( "&Quit", self)
+        self.quitAct.setShortcut(QtGui.QKeySequence(QtCore.Qt.CTRL + QtCore.Qt.Key_Q))
+        self.quitAct.setStatusTip("Exit")
+        self.quitAct.triggered.connect(self.onQuit)
+
+        # Actions for undoing and redoing cell edits.
+        self.undoAct = QtWidgets.QAction("&Undo", self)
+        self.undoAct.setShortcut(QtGui.QKeySequence.Undo)
+        self.undoAct.setStatusTip("Revert the last cell edit")
+        self.undoAct.setIcon(QtGui.QIcon.fromTheme('edit-undo'))
+        self.undoAct.setEnabled(False)
+        self.undoAct.triggered.connect(self.onUndo)
+        self.redoAct = QtWidgets.QAction("&Redo", self)
+        self.redoAct.setShortcut(QtGui.QKeySequence.Redo)
+        self.redoAct.setStatusTip("Apply the last reverted cell edit again")
+        self.redoAct.setIcon(QtGui.QIcon.fromTheme('edit-redo'))
+        self.redoAct.setEnabled(False)
+        self.redoAct.triggered.connect(self.onRedo)
+
+        # Action for toggling live reload of documents.
+        self.liveAct = QtWidgets.QAction("&Live Reload", self)
+        self.liveAct.setCheckable(True)
+        self.liveAct.setStatusTip("Update documents while their files are written")
+        self.liveAct.toggled.connect(self.onToggleLive)
+
+        # Action for toggling the attribute statistics panel of documents.
+        self.statisticsAct = QtWidgets.QAction("Attribute &Statistics", self)
+        self.statisticsAct.setCheckable(True)
+        self.statisticsAct.setShortcut(QtGui.QKeySequence(QtCore.Qt.CTRL + QtCore.Qt.Key_I))
+        self.statisticsAct.setStatusTip("Show counts, ranges and histograms of object attributes")
+        self.statisticsAct.toggled.connect(self.onToggleStatistics)
+
+        # Actions for skipping empty BX.
+        self.nextNonEmptyAct = QtWidgets.QAction("&Next Non-empty BX", self)
+        self.nextNonEmptyAct.setShortcut(QtGui.QKeySequence(QtCore.Qt.CTRL + QtCore.Qt.Key_Down))
+        self.nextNonEmptyAct.setStatusTip("Go to the next BX with any non-empty object")
+        self.nextNonEmptyAct.triggered.connect(lambda: self.onNextNonEmpty())
+        self.previousNonEmptyAct = QtWidgets.QAction("&Previous Non-empty BX", self)
+        self.previousNonEmptyAct.setShortcut(QtGui.QKeySequence(QtCore.Qt.CTRL + QtCore.Qt.Key_Up))
+        self.previousNonEmptyAct.setStatusTip("Go to the previous BX with any non-empty object")
+        self.previousNonEmptyAct.triggered.connect(lambda: self.onNextNonEmpty(backward=True))
+        self.nextNonEmptyColumnAct = QtWidgets.QAction("Next Non-empty BX in &Column", self)
+        self.nextNonEmptyColumnAct.setShortcut(QtGui.QKeySequence(QtCore.Qt.CTRL + QtCore.Qt.SHIFT + QtCore.Qt.Key_Down))
+        self.nextNonEmptyColumnAct.setStatusTip("Go to the next BX with a non-empty object in the current column")
+        self.nextNonEmptyColumnAct.triggered.connect(lambda: self.onNextNonEmpty(column=True))
+        self.previousNonEmptyColumnAct = QtWidgets.QAction("Previous Non-empty BX in C&olumn", self)
+        self.previousNonEmptyColumnAct.setShortcut(QtGui.QKeySequence(QtCore.Qt.CTRL + QtCore.Qt.SHIFT + QtCore.Qt.Key_Up))
+        self.previousNonEmptyColumnAct.setStatusTip("Go to the previous BX with a non-empty object in the current column")
+        self.previousNonEmptyColumnAct.triggered.connect(lambda: self.onNextNonEmpty(backward=True, column=True))
+
+        # Action for showing timing statistics (see --profile).
+        self.timingAct = QtWidgets.QAction("&Timing Statistics...", self)
+        self.timingAct.setStatusTip("Show call counts and latencies of load and render paths")
+        self.timingAct.setEnabled(timing.isEnabled())
+        self.timingAct.triggered.connect(self.onTiming)
+
+        # Action for toggling status bar.
+        self.statusbarAct = QtWidgets.QAction("&Statusbar", self)
+        self.statusbarAct.setCheckable(True)
+        self.statusbarAct.setChecked(True)
+        self.statusbarAct.setStatusTip("Show or hide the statusbar in the current window")
+        self.statusbarAct.toggled.connect(self.onToggleStatusBar)
+
+        # Actions to show online contents help.
+        self.contentsAct = QtWidgets.QAction("&Contents", self)
+        self.contentsAct.setShortcut(QtGui.QKeySequence(QtCore.Qt.Key_F1))
+        self.contentsAct.triggered.connect(self.onContents)
+
+        # Actions to show about dialog.
+        self.aboutAct = QtWidgets.QAction("&About", self)
+        self.aboutAct.triggered.connect(self.onAbout)
+
+    def createToolbars(self):
+        """Create tool bars and setup their behaviors (floating or static)."""
+
+        self.toolbar = self.addToolBar("Toolbar")
+        self.toolbar.setMovable(False)
+        self.toolbar.setFloatable(False)
+        self.toolbar.addAction(self.openAct)
+        self.toolbar.addAction(self.saveAct)
+        self.toolbar.addSeparator()
+        self.toolbar.addAction(self.undoAct)
+        self.toolbar.addAction(self.redoAct)
+
+        # Create action for toggling the tool bar here.
+        self.toolbarAct = self.toolbar.toggleViewAction() # Get predefined action from toolbar.
+        self.toolbarAct.setStatusTip("Show or hide the toolbar in the current window")
+
+    def createMenubar(self):
+        """Create menu bar with entries."""
+
+        # Menu entry for file actions.
+        self.fileMenu = self.menuBar().addMenu("&File")
+        self.fileMenu.addAction(self.openAct)
+        self.fileMenu.addAction(self.saveAct)
+        self.fileMenu.addAction(self.saveAsAct)
+        self.fileMenu.addAction(self.compareAct)
+        self.fileMenu.addAction(self.exportAct)
+        self.fileMenu.addSeparator()
+        self.fileMenu.addAction(self.closeAct)
+        self.fileMenu.addSeparator()
+        self.fileMenu.addAction(self.quitAct)
+
+        # Menu entry for edit actions.
+        self.editMenu = self.menuBar().addMenu("&Edit")
+        self.editMenu.addAction(self.undoAct)
+        self.editMenu.addAction(self.redoAct)
+
+        # Menu entry for view actions.
+        self.viewMenu = self.menuBar().addMenu("&View")
+        self.viewMenu.addAction(self.toolbar.toggleViewAction())
+        self.viewMenu.addAction(self.statusbarAct)
+        self.viewMenu.addSeparator()
+        self.viewMenu.addAction(self.nextNonEmptyAct)
+        self.viewMenu.addAction(self.previousNonEmptyAct)
+        self.viewMenu.addAction(self.nextNonEmptyColumnAct)
+        self.viewMenu.addAction(self.previousNonEmptyColumnAct)
+        self.viewMenu.addSeparator()
+        self.viewMenu.addAction(self.liveAct)
+        self.viewMenu.addAction(self.statisticsAct)
+        self.viewMenu.addAction(self.timingAct)
+
+        # Menu entry for help actions.
+        self.helpMenu = self.menuBar().addMenu("&Help")
+        self.helpMenu.addAction(self.contentsAct)
+        self.helpMenu.addSeparator()
+        self.helpMenu.addAction(self.aboutAct)
+
+    def createStatusbar(self):
+        """Create status bar and content."""
+        self.statusBar()
+        self.statusBar().showMessage("Ready.")
+        # Progress of documents loading in background.
+        self.progressBar = QtWidgets.QProgressBar(self)
+        self.progressBar.setRange(0, 100)
+        self.progressBar.setMaximumWidth(200)
+        self.progressBar.hide()
+        self.statusBar().addPermanentWidget(self.progressBar)
+        self.cancelButton = QtWidgets.QToolButton(self)
+        self.cancelButton.setIcon(QtGui.QIcon.fromTheme('process-stop'))
+        self.cancelButton.setText("Cancel")
+        self.cancelButton.setToolTip("Cancel loading and exports")
+        self.cancelButton.clicked.connect(self.onCancelLoading)
+        self.cancelButton.hide()
+        self.statusBar().addPermanentWidget(self.cancelButton)
+        # Memory held by documents.
+        self.memoryLabel = QtWidgets.QLabel(self)
+        self.statusBar().addPermanentWidget(self.memoryLabel)
+
+    def onOpen(self):
+        """Select test vector files using a file open dialog."""
+        filenames, _ = QtWidgets.QFileDialog.getOpenFileNames(self,
+            "Open test vector files",
+            os.getcwd(),
+            "TestVector (*.txt *.gz *.bgz *.bz2 *.xz *.zst);;All files (*)"
+        )
+        # Return if user did not select a file.
+        if not filenames:
+            return
+        self.loadDocuments(filenames)
+        self.closeAct.setEnabled(self.mdiArea.count())
+
+    def onCompare(self):
+        """Select reference file and file to compare using file dialogs."""
+        filenames = []
+        for title in ("Select reference test vector file", "Select test vector file to compare"):
+            filename, _ = QtWidgets.QFileDialog.getOpenFileName(self,
+                title,
+                os.getcwd(),
+                "TestVector (*.txt *.gz *.bgz *.bz2 *.xz *.zst);;All files (*)"
+            )
+            # Return if user did not select a file.
+            if not filename:
+                return
+            filenames.append(filename)
+        self.loadDiff(*filenames)
+
+    def onExport(self):
+        """Export the current document in background."""
+        document = self.mdiArea.currentWidget()
+        if not isinstance(document, Document):
+            return
+        testvector = document.model.testvector
+        dialog = ExportDialog(document.filename, len(testvector), self)
+        if dialog.exec_() != QtWidgets.QDialog.Accepted:
+            return
+        thread = ExportThread(testvector, dialog.path(), dialog.format(), dialog.objects(), dialog.decoded(), dialog.startRow(), dialog.stopRow(), self)
+        thread.progress.connect(self.onLoadingProgress)
+        thread.finished.connect(lambda: self.onExportFinished(thread))
+        self.exportThreads.append(thread)
+        self.statusBar().showMessage("Exporting to {}...".format(thread.path))
+        thread.start()
+
+    def onExportFinished(self, thread):
+        self.exportThreads.remove(thread)
+        if thread.error is not None:
+            QtWidgets.QMessageBox.critical(self, "Export failed", "<strong>Failed to export to file:</strong><br/>{}".format(thread.error))
+        elif not thread.cancelled:
+            self.statusBar().showMessage("Exported {} rows to {}".format(thread.rows, thread.path), 2500)
+        self.onLoadingFinished()
+
+    def onSave(self):
+        document = self.mdiArea.currentWidget()
+        if isinstance(document, Document) and document.save():
+            self.statusBar().showMessage("Saved {}".format(document.filename), 2500)
+
+    def onSaveAs(self):
+        document = self.mdiArea.currentWidget()
+        if isinstance(document, Document) and document.saveAs():
+            self.statusBar().showMessage("Saved {}".format(document.filename), 2500)
+
+    def onUndo(self):
+        document = self.mdiArea.currentWidget()
+        if isinstance(document, Document):
+            document.undo()
+
+    def onRedo(self):
+        document = self.mdiArea.currentWidget()
+        if isinstance(document, Document):
+            document.redo()
+
+    def onModifiedChanged(self):
+        """Mark modified documents by an asterisk in their tab title."""
+        document = self.sender()
+        index = self.mdiArea.indexOf(document)
+        if index >= 0:
+            title = os.path.basename(document.filename)
+            self.mdiArea.setTabText(index, title + "*" if document.isModified() else title)
+        self.updateEditActions()
+
+    def updateEditActions(self):
+        """Enable save and undo actions for the current document."""
+        document = self.mdiArea.currentWidget()
+        editable = isinstance(document, Document) and document.journal is not None
+        self.saveAct.setEnabled(editable and document.isModified())
+        self.saveAsAct.setEnabled(isinstance(document, Document))
+        self.undoAct.setEnabled(editable and document.journal.canUndo())
+        self.redoAct.setEnabled(editable and document.journal.canRedo())
+
+    def onClose(self):
+        self.mdiArea.closeDocument()
+        self.closeAct.setEnabled(self.mdiArea.count())
+
+    def onQuit(self):
+        self.close()
+
+    def onToggleLive(self, enabled):
+        """Toggles live reload of all documents."""
+        for document in self.mdiArea.documents():
+            document.setLive(enabled)
+
+    def onToggleStatistics(self, enabled):
+        """Toggles the attribute statistics panel of all documents."""
+        for document in self.mdiArea.documents():
+            if isinstance(document, Document):
+                document.setStatisticsVisible(enabled)
+
+    def onNextNonEmpty(self, backward=False, column=False):
+        """Go to next (or previous) non-empty BX of the current document."""
+        document = self.mdiArea.currentWidget()
+        if isinstance(document, Document):
+            document.nextNonEmpty(backward, column)
+
+    def onCancelLoading(self):
+        """Cancel loading of all documents loading in background and all
+        running exports."""
+        for thread in self.openThreads:
+            thread.cancel()
+            thread.wait()
+        for document in self.mdiArea.documents():
+            document.cancelLoading()
+        for thread in self.exportThreads:
+            thread.cancel()
+            thread.wait()
+
+    def onLoadingProgress(self, value):
+        self.progressBar.setValue(value)
+        self.progressBar.show()
+        self.cancelButton.show()
+
+    def onLoadingFinished(self):
+        if self.exportThreads or self.openThreads:
+            return
+        if not any(document.isLoading() for document in self.mdiArea.documents()):
+            self.progressBar.hide()
+            self.cancelButton.hide()
+            sender = self.sender()
+            if isinstance(sender, Document):
+                message = "Successfully loaded file"
+                if timing.isEnabled() and 'LoadThread.run' in timing.recorder.stats:
+                    message += " in {:.0f} ms".format(timing.recorder.stats['LoadThread.run'].last * 1e3)
+                self.statusBar().showMessage(message, 2500)
+            elif isinstance(sender, DiffDocument) and sender.diff is not None:
+                self.statusBar().showMessage("{} mismatching cells".format(sender.diff.count()), 2500)
+
+    def onFileParsed(self, result):
+        """Open document of file parsed by an open thread."""
+        thread = self.sender()
+        self.onLoadingProgress(thread.done * 100 // len(thread.filenames))
+        self.statusBar().showMessage("Opened {} of {} files...".format(thread.done, len(thread.filenames)))
+        self.loadParsed(*result)
+
+    def onOpenFinished(self, thread):
+        self.openThreads.remove(thread)
+        shutil.rmtree(thread.handoff, ignore_errors=True)
+        # Load files one by one if worker processes failed.
+        for filename in thread.remaining():
+            self.loadDocument(filename)
+        self.statusBar().showMessage("Opened {} of {} files".format(thread.done, len(thread.filenames)), 2500)
+        self.onLoadingFinished()
+
+    def closeEvent(self, event):
+        for document in list(self.mdiArea.documents()):
+            if isinstance(document, Document) and not document.maybeSave():
+                event.ignore()
+                return
+        self.onCancelLoading()
+        super(MainWindow, self).closeEvent(event)
+
+    def onTiming(self):
+        """Show timing statistics panel."""
+        if not self.timingDialog:
+            self.timingDialog = TimingDialog(timing.recorder, self)
+        self.timingDialog.show()
+        self.timingDialog.raise_()
+
+    def updateMemory(self):
+        """Evict documents exceeding the memory budget and show the memory
+        held by documents in the status bar."""
+        manager = self.documentManager
+        manager.enforce()
+        usage = manager.memoryUsage()
+        text = "Memory: {}".format(formatBytes(sum(usage.values())))
+        if manager.budget:
+            text += " / {}".format(formatBytes(manager.budget))
+        self.memoryLabel.setText(text)
+        self.memoryLabel.setToolTip("\n".join("{}: {}{}".format(os.path.basename(document.filename),
+            "evicted" if document.evicted else formatBytes(size), " (shared)" if document.sharedKey else "")
+            for document, size in usage.items()))
+
+    def onToggleStatusBar(self):
+        """Toggles the visibility of the status bar."""
+        self.statusBar().setVisible(self.statusbarAct.isChecked())
+
+    def onContents(self):
+        url = 'http://gtmtca2.hephy.oeaw.ac.at/redmine/projects/tdf/wiki'
+        QtWidgets.QMessageBox.information(self, "Contents", "<p>Please refer to: <a href=\"{0}\">{0}</a></p>".format(url))
+
+    def onAbout(self):
+        QtWidgets.QMessageBox.information(self, "About",
+            "<p><strong>{}</strong></p><p>Graphical tool for viewing memory "
+            "images. This software is written in Python3 using "
+            "the PyQt5 toolkit.</p>"
+            "<p>Version {}</p>"
+            "<p>Authors: Bernhard Arnold <a href=\"mailto:bernhard.arnold"
+            "@cern.ch\">&lt;bernhard.arnold@cern.ch&gt;</a></p>".format(self.AppTitle, self.AppVersion)
+        )
+
+    @timing.timed()
+    @fileExceptionHandler
+    def loadDocument(self, filename):
+        """Load document from filename."""
+        filename = os.path.abspath(filename)
+        if not os.path.isfile(filename):
+            raise NoSuchFileError(filename)
+        # Do not open files twice, just reload them.
+        index = self.findDocument(filename)
+        if index >= 0:
+            document = self.mdiArea.widget(index)
+            self.mdiArea.setCurrentIndex(index)
+            # Keep unsaved edits.
+            if not document.isModified():
+                document.reload()
+            return
+        # Else load from file and create new document tab.
+        self.statusBar().showMessage("Loading...", 2500)
+        self.addDocument(Document(filename, self, self.isLazy(filename), self.cache, self.sparse, shared=self.shared))
+
+    def loadDocuments(self, filenames):
+        """Load documents from filenames. Files not cached are parsed at the
+        same time by a pool of worker processes (if there are multiple
+        cores), their tabs are added as soon as they are parsed."""
+        parallel = len(filenames) > 1 and (os.cpu_count() or 1) > 1
+        pending = []
+        for filename in filenames:
+            filename = os.path.abspath(filename)
+            if parallel and self.needsParsing(filename):
+                pending.append(filename)
+            else:
+                self.loadDocument(filename)
+        if len(pending) == 1:
+            self.loadDocument(pending[0])
+        elif pending:
+            thread = OpenThread(pending, self.cache, self.shared, self)
+            thread.parsed.connect(self.onFileParsed)
+            thread.finished.connect(lambda: self.onOpenFinished(thread))
+            self.openThreads.append(thread)
+            self.onLoadingProgress(0)
+            self.statusBar().showMessage("Opening {} files...".format(len(pending)))
+            thread.start()
+
+    @fileExceptionHandler
+    def loadParsed(self, filename, directory, diagnostics, error):
+        """Add document of file parsed by a worker process, see reader.parseFile()."""
+        if error:
+            name, message = error
+            raise {'FileReadError': FileReadError, 'UnknownFileTypeError': UnknownFileTypeError}[name](message)
+        image = key = None
+        if directory and self.shared and directory == self.shared.directory:
+            attached = self.shared.attach(filename)
+            if attached:
+                key, image = attached
+        elif directory:
+            cache = TestVectorCache(directory)
+            image = cache.load(filename)
+            if not self.cache or directory != self.cache.directory:
+                cache.remove(filename)
+        # Fall back to loading in background.
+        if image is None or self.findDocument(filename) >= 0:
+            if key:
+                self.shared.release(key)
+            self.loadDocument(filename)
+            return
+        self.addDocument(Document(filename, self, False, self.cache, self.sparse, (image, diagnostics, key), self.shared))
+
+    def findDocument(self, filename):
+        """Returns tab index of document of filename or -1."""
+        for index in range(self.mdiArea.count()):
+            document = self.mdiArea.widget(index)
+            if isinstance(document, Document) and document.filename == filename:
+                return index
+        return -1
+
+    def isLazy(self, filename):
+        """Returns True if file is to be opened in lazy (memory mapped) mode.
+        Compressed files can not be mapped, they are always parsed."""
+        lazy = self.lazy or os.path.getsize(filename) > self.LazyThreshold
+        return lazy and not compressed.isCompressed(filename)
+
+    def needsParsing(self, filename):
+        """Returns True if file is not open, cached, shared or opened lazy."""
+        if not os.path.isfile(filename) or self.findDocument(filename) >= 0 or self.isLazy(filename):
+            return False
+        if self.shared and self.shared.contains(filename):
+            return False
+        return not (self.cache and self.cache.contains(filename))
+
+    def addDocument(self, document):
+        """Add document tab."""
+        document.loadingProgress.connect(self.onLoadingProgress)
+        document.loadingFinished.connect(self.onLoadingFinished)
+        document.modifiedChanged.connect(self.onModifiedChanged)
+        document.setLive(self.liveAct.isChecked())
+        document.setStatisticsVisible(self.statisticsAct.isChecked())
+        index = self.mdiArea.addTab(document, QtGui.QIcon.fromTheme('ascii'), os.path.basename(document.filename))
+        self.mdiArea.setCurrentIndex(index)
+
+        # Enable close action
+        self.closeAct.setEnabled(self.mdiArea.count())
+
+    @fileExceptionHandler
+    def loadDiff(self, reference, filename):
+        """Create diff document comparing two files."""
+        for name in (reference, filename):
+            if not os.path.isfile(name):
+                raise NoSuchFileError(name)
+        self.statusBar().showMessage("Comparing...")
+        document = DiffDocument(reference, filename, self, self.cache)
+        document.loadingProgress.connect(self.onLoadingProgress)
+        document.loadingFinished.connect(self.onLoadingFinished)
+        title = "{} \u2194 {}".format(os.path.basename(reference), os.path.basename(filename))
+        index = self.mdiArea.addTab(document, QtGui.QIcon.fromTheme('edit-find-replace'), title)
+        self.mdiArea.setCurrentIndex(index)
+        self.closeAct.setEnabled(self.mdiArea.count())
+
+# -----------------------------------------------------------------------------
+#  Document manager class.
+# -----------------------------------------------------------------------------
+
+def formatBytes(size):
+    """Returns human readable size, e.g. '1.2 GB'."""
+    for unit in ("B", "kB", "MB"):
+        if size < 1024:
+            return "{:.0f} {}".format(size, unit) if unit == "B" else "{:.1f} {}".format(size, unit)
+        size /= 1024
+    return "{:.1f} GB".format(size)
+
+class DocumentManager(QtCore.QObject):
+    """Keeps memory held by documents within a budget (bytes, 0 for no limit).
+    Parsed data of the least recently viewed documents is evicted and rebuilt
+    from the cache or the file when their tab is shown again."""
+
+    def __init__(self, mdiArea, budget=0, parent=None):
+        super(DocumentManager, self).__init__(parent)
+        self.mdiArea = mdiArea
+        self.budget = budget
+        self.history = [] # documents, most recently viewed last
+        mdiArea.currentChanged.connect(self.onCurrentChanged)
+        mdiArea.documentClosed.connect(self.onDocumentClosed)
+
+    def documents(self):
+        return [document for document in self.mdiArea.documents() if isinstance(document, Document)]
+
+    def memoryUsage(self):
+        """Returns dict of document to bytes held."""
+        return {document: document.memoryUsage() for document in self.documents()}
+
+    def onCurrentChanged(self, index):
+        document = self.mdiArea.widget(index)
+        if isinstance(document, Document):
+            if document in self.history:
+                self.history.remove(document)
+            self.history.append(document)
+            if document.evicted:
+                document.rehydrate()
+        self.enforce()
+
+    def onDocumentClosed(self, document):
+        if document in self.history:
+            self.history.remove(document)
+
+    def enforce(self):
+        """Evict least recently viewed documents (never viewed first) until
+        the budget is met, returns list of evicted documents. The current
+        document, documents loading and documents with unsaved edits are
+        kept."""
+        if not self.budget:
+            return []
+        usage = self.memoryUsage()
+        total = sum(usage.values())
+        self.history = [document for document in self.history if document in usage]
+        current = self.mdiArea.currentWidget()
+        evicted = []
+        for document in [document for document in usage if document not in self.history] + self.history:
+            if total <= self.budget:
+                break
+            if document is not current and usage[document] and document.evict():
+                total -= usage[document]
+                evicted.append(document)
+        return evicted
+
+# -----------------------------------------------------------------------------
+#  MDI Area class.
+# -----------------------------------------------------------------------------
+
+class MdiArea(QtWidgets.QTabWidget):
+
+    documentClosed = QtCore.pyqtSignal(object)
+
+    def __init__(self, parent = None):
+        super(MdiArea, self).__init__(parent)
+        self.setDocumentMode(True)
+        self.setTabsClosable(True)
+        self.setMovable(True)
+
+        # Close document by clicking on the tab close button.
+        self.tabCloseRequested.connect(self.closeDocument)
+
+    def currentDocument(self):
+        return self.widget(self.currentIndex())
+
+    def documents(self):
+        for index in range(self.count()):
+            yield self.widget(index)
+
+    def closeDocument(self, index=None):
+        """Close an document by index or current active document.
+        Provided for convenience. Returns False if closing was cancelled.
+        """
+        if index is None:
+            index = self.currentIndex()
+        document = self.widget(index)
+        if isinstance(document, Document) and not document.maybeSave():
+            return False
+        if document:
+            document.cancelLoading()
+            # Stop watching the file of the closed document.
+            document.setLive(False)
+        if isinstance(document, Document):
+            document.release()
+        # Finally remove tab by index.
+        self.removeTab(index)
+        if document:
+            self.documentClosed.emit(document)
+            document.deleteLater()
+        return True
+
+# -----------------------------------------------------------------------------
+#  Document class.
+# -----------------------------------------------------------------------------
+
+def fileStat(filename):
+    """Returns size and modification time of file, or None."""
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+def createTableView(parent):
+    """Create the data table view."""
+    tableView = QtWidgets.QTableView(parent)
+    # Make only single cells selectable.
+    tableView.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+    # Hide the default grid.
+    tableView.setShowGrid(False)
+    # Disable sorting.
+    tableView.setSortingEnabled(False)
+    # Set a monospace font for cell content (as hex values are displayed).
+    tableView.setFont(QtGui.QFont("Monospace", 10))
+    # Paint cells using cached static text.
+    tableView.setItemDelegate(CellDelegate(tableView))
+    # Prevent resizing of the horizontal and vertical headers.
+    horizontalHeader = tableView.horizontalHeader()
+    horizontalHeader.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+    horizontalHeader.setStretchLastSection(True)
+    verticalHeader = tableView.verticalHeader()
+    verticalHeader.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+    verticalHeader.setDefaultSectionSize(20)
+    return tableView
+
+class Document(QtWidgets.QWidget):
+    """Document widget displaying a data table view and a object preview box."""
+
+    loadingProgress = QtCore.pyqtSignal(int)
+    loadingFinished = QtCore.pyqtSignal()
+    modifiedChanged = QtCore.pyqtSignal()
+
+    def __init__(self, filename, parent = None, lazy = False, cache = None, sparse = True, preloaded = None, shared = None):
+        super(Document, self).__init__(parent)
+        self.filename = os.path.abspath(filename)
+        self.preloaded = preloaded # test vector, diagnostics and shared key parsed by a worker
+        self.evicted = False
+        self.viewState = None # restored after loading
+        self.lazy = lazy
+        self.cache = cache
+        self.sparse = sparse
+        self.shared = shared
+        self.sharedKey = None # entry of the shared store held
+        self.loadThread = None
+        self.loadComplete = False
+        self.watcher = None
+        self.updateTimer = QtCore.QTimer(self)
+        self.updateTimer.setSingleShot(True)
+        self.updateTimer.setInterval(250)
+        self.updateTimer.timeout.connect(self.updateFromFile)
+        self.model = None
+        self.journal = None
+        self.savedStat = None
+        self.filterModel = None
+        self.mask = None
+        self.tableView = createTableView(self)
+        self.tableView.verticalScrollBar().valueChanged.connect(self.updateOverviewViewport)
+        self.detailsWidget = DetailsWidget(self)
+        self.detailsWidget.valueEdited.connect(self.onValueEdited)
+        self.detailsWidget.model.editFailed.connect(self.onEditFailed)
+        self.overviewWidget = OverviewWidget(self)
+        self.overviewWidget.clicked.connect(self.onOverviewClicked)
+        # Attribute statistics, computed while the panel is shown.
+        self.statistics = None
+        self.statisticsWidget = StatisticsWidget(self)
+        self.statisticsWidget.scopeChanged.connect(self.refreshStatistics)
+        self.statisticsWidget.hide()
+        self.statisticsTimer = QtCore.QTimer(self)
+        self.statisticsTimer.setSingleShot(True)
+        self.statisticsTimer.setInterval(250)
+        self.statisticsTimer.timeout.connect(self.refreshStatistics)
+        self.warningLabel = self.createWarningLabel()
+        self.filterBar = self.createFilterBar()
+        self.reloadCount = 0
+        self.columnsResized = False
+        sidebar = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        sidebar.addWidget(self.detailsWidget)
+        sidebar.addWidget(self.statisticsWidget)
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Horizontal)
+        splitter.addWidget(self.overviewWidget)
+        splitter.addWidget(self.tableView)
+        splitter.addWidget(sidebar)
+        splitter.setCollapsible(1, False)
+        splitter.setStretchFactor(0, 0)
+        splitter.setStretchFactor(1, 2)
+        splitter.setStretchFactor(2, 1)
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.warningLabel, 0)
+        layout.addWidget(self.filterBar, 0)
+        layout.addWidget(splitter, 1)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        # Load the file.
+        self.reload()
+
+    def createFilterBar(self):
+        """Create bar for filtering rows by query expressions."""
+        self.filterEdit = QtWidgets.QLineEdit(self)
+        self.filterEdit.setPlaceholderText("Query, e.g. muon[*].pt > 40 and muon[*].quality >= 12")
+        self.filterEdit.setClearButtonEnabled(True)
+        self.filterEdit.returnPressed.connect(self.applyFilter)
+        self.filterCheck = QtWidgets.QCheckBox("Only matches", self)
+        self.filterCheck.setToolTip("Show only rows matching the query")
+        self.filterCheck.toggled.connect(self.applyFilter)
+        previousButton = QtWidgets.QToolButton(self)
+        previousButton.setIcon(QtGui.QIcon.fromTheme('go-up'))
+        previousButton.setToolTip("Previous match (Shift+F3)")
+        previousButton.setShortcut(QtGui.QKeySequence(QtCore.Qt.SHIFT + QtCore.Qt.Key_F3))
+        previousButton.clicked.connect(self.previousMatch)
+        nextButton = QtWidgets.QToolButton(self)
+        nextButton.setIcon(QtGui.QIcon.fromTheme('go-down'))
+        nextButton.setToolTip("Next match (F3)")
+        nextButton.setShortcut(QtGui.QKeySequence(QtCore.Qt.Key_F3))
+        nextButton.clicked.connect(self.nextMatch)
+        self.filterLabel = QtWidgets.QLabel(self)
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.filterEdit, 1)
+        layout.addWidget(self.filterCheck)
+        layout.addWidget(previousButton)
+        layout.addWidget(nextButton)
+        layout.addWidget(self.filterLabel)
+        layout.setContentsMargins(4, 4, 4, 0)
+        widget = QtWidgets.QWidget(self)
+        widget.setLayout(layout)
+        return widget
+
+    def createWarningLabel(self):
+        label = QtWidgets.QLabel(self)
+        label.setStyleSheet(
+            "padding: 16px;"
+            "border: 1px solid #ce8720;"
+            "background-color: #f9ac3a;"
+        )
+        label.setWordWrap(True)
+        label.hide()
+        return label
+
+    @timing.timed()
+    def reload(self):
+        """Reload data from file. The file is parsed in a background thread
+        populating the model block by block, lazy documents are mapped."""
+        self.cancelLoading()
+        self.loadComplete = False
+        # Complete a save interrupted by a crash before reading the file.
+        try:
+            recovered = journal.recover(self.filename)
+        except OSError as exception:
+            recovered = "Failed to recover interrupted save of {}: {}.".format(self.filename, exception)
+        cached = None
+        preloaded, self.preloaded = self.preloaded, None
+        previousKey, self.sharedKey = self.sharedKey, None
+        self.evicted = False
+        if self.lazy:
+            image = self.mapFile(self.filename)
+        elif preloaded:
+            cached = preloaded[0]
+            image = cached
+            self.sharedKey = preloaded[2]
+        else:
+            cached = self.loadShared(self.filename)
+            if cached is None:
+                cached = self.loadCached(self.filename)
+            image = cached or (SparseTestVector() if self.sparse else TestVector())
+        self.setDataModel(DataTableModel(image, self))
+        # Released after attaching again, keeping the entry alive.
+        if previousKey:
+            self.shared.release(previousKey)
+        self.clearWarning()
+        if recovered:
+            self.showWarning(recovered if isinstance(recovered, str) else "Completed an interrupted save of {}.".format(self.filename))
+        elif preloaded and preloaded[1]:
+            self.showDiagnostics(preloaded[1])
+        # Lazy documents are not summarized, as this requires parsing all rows.
+        self.overviewWidget.setSummary(None if self.lazy else OverviewSummary(image))
+        self.overviewWidget.setVisible(not self.lazy)
+        if self.lazy or cached:
+            self.resizeColumns()
+            self.loadComplete = True
+            self.setJournal(journal.EditJournal(image))
+            self.updateOverview(0)
+            self.applyFilter()
+            self.restoreViewState()
+        else:
+            self.startLoading(image)
+        self.reloadCount += 1
+
+    def memoryUsage(self):
+        """Returns bytes held by the test vector, overview, statistics and
+        filter."""
+        size = self.model.testvector.memoryUsage() + self.statistics.memoryUsage()
+        summary = self.overviewWidget.summary
+        if summary is not None:
+            size += summary.memoryUsage()
+        if self.mask is not None:
+            size += self.mask.nbytes
+        return size
+
+    def evict(self):
+        """Release the parsed data (and the shared entry held), rebuilt by
+        rehydrate(). Documents loading or with unsaved edits are not evicted,
+        returns True if evicted. The undo history is dropped."""
+        if self.evicted or not self.loadComplete or self.isLoading() or self.isModified():
+            return False
+        self.viewState = self.saveViewState()
+        self.evicted = True
+        self.setDataModel(DataTableModel(TestVector(), self))
+        self.overviewWidget.setSummary(None)
+        self.releaseShared()
+        return True
+
+    def release(self):
+        """Release parsed data and the shared entry of a closed document."""
+        self.statisticsTimer.stop()
+        self.setDataModel(DataTableModel(TestVector(), self))
+        self.overviewWidget.setSummary(None)
+        self.releaseShared()
+
+    def rehydrate(self):
+        """Load evicted document again, from the cache if possible, and
+        restore scroll position and selection. If the file can not be read
+        (e.g. it was removed) the document stays empty showing a warning, it
+        is reloaded when shown again."""
+        if not self.evicted:
+            return
+        try:
+            self.reload()
+        except (FileReadError, NoSuchFileError, UnknownFileTypeError) as exception:
+            self.evicted = True
+            reason = str(exception).replace(self.filename, "").lstrip(": ") or "can not read file"
+            self.showWarning("Failed to reload {}: {}.".format(self.filename, reason))
+
+    def saveViewState(self):
+        """Returns current cell, top row (of the data table model), horizontal
+        scroll position and column widths."""
+        current = self.sourceIndex(self.tableView.currentIndex())
+        top = self.sourceIndex(self.tableView.indexAt(QtCore.QPoint(0, 0)))
+        return {
+            'current': (current.row(), current.column()) if current.isValid() else None,
+            'top': top.row() if top.isValid() else None,
+            'horizontal': self.tableView.horizontalScrollBar().value(),
+            'widths': [self.tableView.columnWidth(col) for col in range(self.model.columnCount(QtCore.QModelIndex()))],
+        }
+
+    def restoreViewState(self):
+        """Restore state saved before eviction once loaded."""
+        state, self.viewState = self.viewState, None
+        if not state:
+            return
+        for col, width in enumerate(state['widths']):
+            self.tableView.setColumnWidth(col, width)
+        rows = len(self.model.testvector)
+        if state['current'] and state['current'][0] < rows:
+            self.selectCell(*state['current'])
+        if state['top'] is not None and state['top'] < rows:
+            self.model.fetchTo(state['top'])
+            index = self.model.index(state['top'], 0)
+            if self.filterModel:
+                index = self.filterModel.mapFromSource(index)
+            if index.isValid():
+                self.tableView.scrollTo(index, QtWidgets.QAbstractItemView.PositionAtTop)
+        self.tableView.horizontalScrollBar().setValue(state['horizontal'])
+        self.updateOverviewViewport()
+
+    def setDataModel(self, model):
+        """Show new data table model, the previous model, its filter and its
+        test vector are released."""
+        previous, previousFilter = self.model, self.filterModel
+        self.model = model
+        self.statistics = AttributeStatistics(model.testvector)
+        self.scheduleStatistics()
+        self.model.edited.connect(self.onCellEdited)
+        self.model.editFailed.connect(self.onEditFailed)
+        self.setJournal(None)
+        self.filterModel = None
+        self.mask = None
+        self.setViewModel(self.model)
+        # Models are children of the document, delete them explicitly.
+        for obsolete in (previousFilter, previous):
+            if obsolete is not None:
+                obsolete.deleteLater()
+
+    def setJournal(self, editJournal):
+        """Cells are editable only with a journal, set once the file is
+        loaded completely."""
+        self.journal = editJournal
+        self.model.journal = editJournal
+        self.detailsWidget.model.editable = editJournal is not None
+        self.modifiedChanged.emit()
+
+    def setViewModel(self, model):
+        """Show data table model or filter proxy model in table view."""
+        if self.tableView.model() is model:
+            return
+        self.tableView.setModel(model)
+        # Attach signals to new assigned model instance.
+        self.tableView.selectionModel().currentChanged.connect(self.detailsWidget.load)
+        self.tableView.selectionModel().selectionChanged.connect(self.onSelectionChanged)
+
+    def sourceIndex(self, index):
+        """Returns index of data table model for index of table view."""
+        if index.isValid() and index.model() is self.filterModel:
+            return self.filterModel.mapToSource(index)
+        return index
+
+    @timing.timed()
+    def applyFilter(self):
+        """Evaluate query of the filter bar, shows only matching rows if
+        selected."""
+        current = self.sourceIndex(self.tableView.currentIndex())
+        previous = self.filterModel
+        expression = self.filterEdit.text().strip()
+        self.mask = None
+        self.filterLabel.clear()
+        if expression:
+            try:
+                self.mask = query.compile(expression).evaluate(self.model.testvector)
+            except (query.QueryError, ValueError) as exception:
+                self.filterLabel.setText("<span style=\"color: #c00;\">{}</span>".format(exception))
+            else:
+                self.filterLabel.setText("{} matches".format(np.count_nonzero(self.mask)))
+                self.model.fetchAll()
+        if self.mask is not None and self.filterCheck.isChecked():
+            self.filterModel = FilterProxyModel(self.mask, self)
+            self.filterModel.setSourceModel(self.model)
+            self.setViewModel(self.filterModel)
+            current = self.filterModel.mapFromSource(current)
+        else:
+            self.filterModel = None
+            self.setViewModel(self.model)
+        if current.isValid():
+            self.tableView.setCurrentIndex(current)
+            self.tableView.scrollTo(current)
+        if previous is not None:
+            previous.deleteLater()
+        self.updateOverviewViewport()
+
+    def nextMatch(self, backward=False):
+        """Select next (or previous) row matching the query."""
+        if self.mask is None:
+            self.applyFilter()
+        if self.mask is None:
+            return
+        index = self.tableView.currentIndex()
+        column = max(0, index.column())
+        if self.filterModel:
+            row = index.row() - 1 if backward else index.row() + 1
+            if not 0 <= row < self.filterModel.rowCount():
+                return
+            index = self.filterModel.index(row, column)
+        else:
+            row = query.nextMatch(self.mask, index.row() if index.isValid() else -1, backward)
+            if row is None:
+                return
+            index = self.model.index(row, column)
+        self.tableView.setCurrentIndex(index)
+        self.tableView.scrollTo(index)
+
+    def previousMatch(self):
+        self.nextMatch(backward=True)
+
+    def nextNonEmpty(self, backward=False, column=False):
+        """Select next (or previous) row with any non-empty object, or with a
+        non-empty object in the current column."""
+        index = self.sourceIndex(self.tableView.currentIndex())
+        row = index.row() if index.isValid() else (len(self.model.testvector) if backward else -1)
+        col = max(0, index.column())
+        columns = [col] if column else None
+        testvector = self.model.testvector
+        while True:
+            row = testvector.nextNonEmpty(row, columns, backward)
+            # Skip rows hidden by the filter.
+            if row is None or not self.filterModel or self.mask[row]:
+                break
+        if row is None:
+            return
+        self.model.fetchTo(row)
+        index = self.model.index(row, col)
+        if self.filterModel:
+            index = self.filterModel.mapFromSource(index)
+        self.tableView.setCurrentIndex(index)
+        self.tableView.scrollTo(index)
+
+    def updateOverview(self, start, stop=None):
+        """Update overview summary for rows changed from row start on (or
+        up to row stop)."""
+        summary = self.overviewWidget.summary
+        if summary is not None:
+            summary.update(start, stop)
+            self.overviewWidget.invalidate()
+            self.updateOverviewViewport()
+
+    def updateStatistics(self, start, stop=None):
+        """Invalidate statistics for rows changed from row start on (or up to
+        row stop)."""
+        self.statistics.update(start, stop)
+        self.scheduleStatistics()
+
+    def scheduleStatistics(self):
+        """Refresh the statistics panel soon, if shown. Changes while loading
+        are collected."""
+        if self.statisticsWidget.isVisibleTo(self):
+            self.statisticsTimer.start()
+
+    def setStatisticsVisible(self, visible):
+        self.statisticsWidget.setVisible(visible)
+        self.scheduleStatistics()
+
+    def onSelectionChanged(self, selected, deselected):
+        if self.statisticsWidget.selectedOnly():
+            self.scheduleStatistics()
+
+    def selectedRange(self):
+        """Returns (start, stop) rows of the data table model spanned by the
+        selection of the table view, or None if nothing is selected."""
+        rows = []
+        for selection in self.tableView.selectionModel().selection():
+            model = selection.model()
+            for row in (selection.top(), selection.bottom()):
+                index = self.sourceIndex(model.index(row, selection.left()))
+                rows.append(index.row())
+        if not rows:
+            return None
+        return min(rows), max(rows) + 1
+
+    @timing.timed()
+    def refreshStatistics(self):
+        """Show statistics over all rows or the selected BX range."""
+        if not self.statisticsWidget.isVisibleTo(self) or self.evicted:
+            return
+        rows = len(self.model.testvector)
+        start, stop = 0, rows
+        if self.statisticsWidget.selectedOnly():
+            start, stop = self.selectedRange() or (0, 0)
+        if (start, stop) == (0, rows):
+            description = "All {} rows".format(rows)
+        elif start < stop:
+            description = "BX {} to {} ({} rows)".format(start + 1, stop, stop - start)
+        else:
+            description = "No rows selected"
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            summaries = self.statistics.summarize(start, stop)
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+        self.statisticsWidget.setSummaries(summaries, description)
+
+    def updateOverviewViewport(self):
+        """Mark rows visible in the table view in the overview."""
+        viewport = self.tableView.viewport()
+        first = self.tableView.indexAt(QtCore.QPoint(0, 0))
+        last = self.tableView.indexAt(QtCore.QPoint(0, viewport.height() - 1))
+        if not first.isValid():
+            self.overviewWidget.setViewport(None)
+            return
+        model = self.tableView.model()
+        if not last.isValid():
+            last = model.index(model.rowCount(QtCore.QModelIndex()) - 1, 0)
+        first, last = self.sourceIndex(first), self.sourceIndex(last)
+        self.overviewWidget.setViewport((first.row(), last.row() + 1))
+
+    def onOverviewClicked(self, row, column):
+        """Scroll table to row and column selected in the overview."""
+        self.model.fetchTo(row)
+        index = self.model.index(row, column)
+        if self.filterModel:
+            # Select the nearest matching row.
+            rows = self.filterModel.rows
+            if not len(rows):
+                return
+            row = min(int(np.searchsorted(rows, row)), len(rows) - 1)
+            index = self.filterModel.index(row, column)
+        self.tableView.setCurrentIndex(index)
+        self.tableView.scrollTo(index, QtWidgets.QAbstractItemView.PositionAtCenter)
+
+    def onCellEdited(self, row, col):
+        """Update overview, statistics, details and filter after a cell
+        changed."""
+        self.updateOverview(row, row + 1)
+        self.updateStatistics(row, row + 1)
+        if self.mask is not None:
+            self.applyFilter()
+        self.detailsWidget.load(self.tableView.currentIndex(), QtCore.QModelIndex())
+        self.modifiedChanged.emit()
+
+    def onValueEdited(self, index, value):
+        """Apply value edited in the details panel."""
+        index = QtCore.QModelIndex(index)
+        if index.model() is self.model:
+            self.model.setData(index, value, QtCore.Qt.UserRole)
+
+    def onEditFailed(self, message):
+        window = self.window()
+        if isinstance(window, QtWidgets.QMainWindow):
+            window.statusBar().showMessage("Invalid value: {}".format(message), 5000)
+
+    def selectCell(self, row, col):
+        """Select cell of data table model (if not hidden by the filter)."""
+        self.model.fetchTo(row)
+        index = self.model.index(row, col)
+        if self.filterModel:
+            index = self.filterModel.mapFromSource(index)
+        if index.isValid():
+            self.tableView.setCurrentIndex(index)
+            self.tableView.scrollTo(index)
+
+    def undo(self):
+        edit = self.journal.undo() if self.journal else None
+        if edit:
+            self.selectCell(edit.row, edit.col)
+            self.model.updateCell(edit.row, edit.col)
+
+    def redo(self):
+        edit = self.journal.redo() if self.journal else None
+        if edit:
+            self.selectCell(edit.row, edit.col)
+            self.model.updateCell(edit.row, edit.col)
+
+    def isModified(self):
+        return self.journal is not None and self.journal.isModified()
+
+    def canSave(self):
+        """Compressed files can only be saved to a new file."""
+        return not compressed.isCompressed(self.filename)
+
+    def save(self):
+        """Write edited cells back to the file, returns True on success.
+        Only modified lines are written, see journal.save()."""
+        if not self.isModified():
+            return True
+        if not self.canSave():
+            return self.saveAs()
+        try:
+            mode = journal.save(self.filename, self.model.testvector, self.journal)
+        except (journal.SaveError, OSError) as exception:
+            QtWidgets.QMessageBox.critical(self, "Save failed", "<strong>Failed to save file:</strong><br/>{}".format(exception))
+            return False
+        self.savedStat = fileStat(self.filename)
+        self.releaseShared() # no longer matches the file
+        # The line index of a lazy document is stale after a rewrite.
+        if mode == 'rewrite' and self.lazy:
+            self.reload()
+        self.modifiedChanged.emit()
+        return True
+
+    def saveAs(self, filename=None):
+        """Write all rows to a new file, selected by a file dialog if not
+        given. Returns True on success."""
+        if filename is None:
+            filename, _ = QtWidgets.QFileDialog.getSaveFileName(self,
+                "Save test vector file",
+                compressed.stripExtension(self.filename),
+                "TestVector (*.txt);;All files (*)"
+            )
+            if not filename:
+                return False
+        filename = os.path.abspath(filename)
+        try:
+            journal.saveAs(filename, self.model.testvector)
+        except (ValueError, OSError) as exception:
+            QtWidgets.QMessageBox.critical(self, "Save failed", "<strong>Failed to save file:</strong><br/>{}".format(exception))
+            return False
+        live = self.watcher is not None
+        self.setLive(False)
+        self.filename = filename
+        self.savedStat = fileStat(filename)
+        if self.lazy:
+            self.reload()
+        else:
+            self.journal.markSaved()
+        self.setLive(live)
+        self.modifiedChanged.emit()
+        return True
+
+    def maybeSave(self):
+        """Ask to save unsaved edits, returns False if cancelled."""
+        if not self.isModified():
+            return True
+        answer = QtWidgets.QMessageBox.question(self, "Unsaved changes",
+            "{} has unsaved changes. Save them?".format(os.path.basename(self.filename)),
+            QtWidgets.QMessageBox.Save | QtWidgets.QMessageBox.Discard | QtWidgets.QMessageBox.Cancel,
+            QtWidgets.QMessageBox.Save)
+        if answer == QtWidgets.QMessageBox.Save:
+            return self.save()
+        return answer == QtWidgets.QMessageBox.Discard
+
+    def resizeColumns(self):
+        """Resize columns to contents of first row, only once per document."""
+        model = self.model
+        if self.columnsResized or not model.rowCount(QtCore.QModelIndex()):
+            return
+        # <hack>
+        # Make sure to not resize for 3564 lines but only for the first, the
+        # row-count must be overwritten.
+        # Replacing the class method by a temporary fake function.
+        rowCount = model.rowCount
+        def fakeRowCount(parent): return 1
+        model.rowCount = fakeRowCount # replace
+        self.tableView.resizeColumnsToContents()
+        model.rowCount = rowCount # restore
+        # </hack>
+        self.tableView.update()
+        self.columnsResized = True
+
+    def startLoading(self, image):
+        """Start parsing file in background thread."""
+        try:
+            f = compressed.openFile(self.filename)
+        except IOError:
+            raise FileReadError(self.filename)
+        except ValueError as exception:
+            raise UnknownFileTypeError("{}: {}".format(self.filename, exception))
+        if self.loadThread is not None:
+            self.loadThread.deleteLater() # finished, see reload()
+        self.loadThread = LoadThread(image, f, self)
+        # Identity of the file as parsed, the file may grow meanwhile.
+        if self.shared:
+            try:
+                self.loadThread.sharedKey = self.shared.key(self.filename)
+            except OSError:
+                pass
+        self.loadThread.blockLoaded.connect(self.onBlockLoaded)
+        self.loadThread.progress.connect(self.loadingProgress)
+        self.loadThread.failed.connect(self.onLoadingFailed)
+        self.loadThread.finished.connect(self.onLoadingFinished)
+        self.loadThread.start()
+
+    def cancelLoading(self):
+        """Cancel background loading, keeps rows loaded so far."""
+        if self.isLoading():
+            self.loadThread.cancel()
+            self.loadThread.wait()
+            model = self.model
+            self.showWarning("Loading cancelled, showing {} rows loaded so far.".format(len(model.testvector)))
+
+    def isLoading(self):
+        return self.loadThread is not None and self.loadThread.isRunning()
+
+    @timing.timed()
+    def onBlockLoaded(self, bx, columns):
+        if self.sender() is not self.loadThread:
+            return # stale block of a previous load
+        model = self.model
+        start = len(model.testvector)
+        model.testvector.extend(bx, columns)
+        self.updateOverview(start)
+        self.updateStatistics(start)
+        # Populate visible area, further rows are fetched on scrolling.
+        scrollBar = self.tableView.verticalScrollBar()
+        if scrollBar.value() == scrollBar.maximum() and model.canFetchMore(QtCore.QModelIndex()):
+            model.fetchMore(QtCore.QModelIndex())
+        self.resizeColumns()
+
+    def onLoadingFailed(self, message):
+        if self.sender() is not self.loadThread:
+            return
+        model = self.model
+        self.showWarning("Failed to load {}: {} (showing {} rows).".format(self.filename, message, len(model.testvector)))
+
+    def onLoadingFinished(self):
+        if self.sender() is not self.loadThread:
+            return
+        thread = self.loadThread
+        self.loadComplete = not thread.cancelled and not thread.error
+        if self.shared and self.loadComplete and not thread.diagnostics:
+            self.share(thread)
+        if self.loadComplete:
+            self.setJournal(journal.EditJournal(self.model.testvector))
+        self.applyFilter()
+        self.restoreViewState()
+        if thread.diagnostics:
+            self.showDiagnostics(thread.diagnostics)
+        # Files with problems are not cached, to report them on every load.
+        if self.cache and self.loadComplete and not thread.diagnostics:
+            try:
+                self.cache.store(self.filename, thread.image)
+            except OSError:
+                pass
+        thread.image = None # held by the model only
+        self.loadingFinished.emit()
+
+    def setLive(self, enabled):
+        """Enable or disable updating the document when its file changes."""
+        if enabled and not self.watcher:
+            self.watcher = QtCore.QFileSystemWatcher([self.filename], self)
+            self.watcher.fileChanged.connect(self.updateTimer.start)
+            self.updateTimer.start()
+        elif not enabled and self.watcher:
+            self.watcher.deleteLater()
+            self.watcher = None
+        if not enabled:
+            self.updateTimer.stop()
+
+    def updateFromFile(self):
+        """Append lines written to the file since the last update, keeping
+        scroll position and selection. The file is read again only if the
+        previously parsed content changed."""
+        if not self.watcher or self.evicted:
+            return
+        # Files replaced by writers are removed from the watcher.
+        if os.path.exists(self.filename) and self.filename not in self.watcher.files():
+            self.watcher.addPath(self.filename)
+        if self.isLoading():
+            self.updateTimer.start()
+            return
+        # Ignore changes written by save().
+        if self.savedStat is not None and self.savedStat == fileStat(self.filename):
+            return
+        if self.isModified():
+            self.showWarning("{} changed on disk, not updated to keep unsaved edits.".format(self.filename))
+            return
+        model = self.model
+        # Compressed files can not be appended to incrementally.
+        if not self.loadComplete or compressed.isCompressed(self.filename):
+            self.reload()
+            return
+        diagnostics = Diagnostics()
+        try:
+            with open(self.filename, 'rb') as f:
+                start = model.testvector.update(f, diagnostics)
+        except (IOError, ValueError) as exception:
+            self.showWarning("Failed to update {}: {}".format(self.filename, exception))
+            return
+        if start is None:
+            self.reload()
+        else:
+            # Appended rows are private, the entry no longer matches the file.
+            self.releaseShared()
+            if diagnostics:
+                self.showDiagnostics(diagnostics)
+            model.updateRows(start)
+            self.updateOverview(start)
+            self.updateStatistics(start)
+            if self.mask is not None:
+                self.applyFilter()
+
+    def loadShared(self, filename):
+        """Returns test vector attached from the shared store or None, the
+        entry is held until released by releaseShared()."""
+        if self.shared:
+            attached = self.shared.attach(filename)
+            if attached:
+                self.sharedKey, image = attached
+                return image
+        return None
+
+    def releaseShared(self):
+        """Release the shared entry held, if any."""
+        if self.sharedKey:
+            self.shared.release(self.sharedKey)
+            self.sharedKey = None
+
+    def share(self, thread):
+        """Publish the test vector parsed by the load thread and continue on
+        the shared copy, releasing the private one. Overview summary and
+        statistics are kept, both copies hold the same rows."""
+        try:
+            self.shared.store(self.filename, thread.image, thread.sharedKey)
+        except OSError:
+            return
+        attached = self.shared.attach(self.filename)
+        if not attached or len(attached[1]) != len(thread.image):
+            if attached:
+                self.shared.release(attached[0])
+            return
+        key, image = attached
+        summary, statistics = self.overviewWidget.summary, self.statistics
+        self.viewState = self.viewState or self.saveViewState()
+        self.setDataModel(DataTableModel(image, self))
+        self.sharedKey = key
+        if summary is not None:
+            summary.testvector = image
+        statistics.testvector = image
+        self.statistics = statistics
+        thread.image = image
+
+    def loadCached(self, filename):
+        """Returns test vector from cache or None."""
+        if self.cache:
+            return self.cache.load(filename)
+        return None
+
+    @timing.timed()
+    def mapFile(self, filename):
+        """Map file for lazy row access, the line index is persisted in the
+        cache directory (if enabled) to speed up reopening."""
+        image = LazyTestVector()
+        try:
+            index = self.cache.indexPath(filename) if self.cache else None
+            image.open(filename, index)
+            if len(image):
+                image.row(0)
+            return image
+        except IOError:
+            raise FileReadError(filename)
+        except:
+            raise UnknownFileTypeError(filename)
+
+    def clearWarning(self):
+        """Clear the warning badge located at the top of the document."""
+        self.warningLabel.clear()
+        self.warningLabel.setToolTip("")
+        self.warningLabel.hide()
+
+    def showDiagnostics(self, diagnostics, limit=20):
+        """Show summary of parse problems in the warning badge, the first
+        problems are listed in its tool tip."""
+        self.showWarning("Problems found in {}: {}.".format(os.path.basename(self.filename), diagnostics.summary()))
+        items = [str(item) for item in list(diagnostics)[:limit]]
+        if len(diagnostics) > limit:
+            items.append("...")
+        self.warningLabel.setToolTip("\n".join(items))
+
+    def showWarning(self, message):
+        """Show a warning badge displaying a message located at the top of the document."""
+        self.warningLabel.setText(message)
+        self.warningLabel.show()
+
+# -----------------------------------------------------------------------------
+#  Background loading thread.
+# -----------------------------------------------------------------------------
+
+class LoadThread(QtCore.QThread):
+    """Parses a test vector file in background, emits every parsed block."""
+
+    blockLoaded = QtCore.pyqtSignal(object, object)
+    progress = QtCore.pyqtSignal(int)
+    failed = QtCore.pyqtSignal(str)
+
+    BlockSize = 2 * 1024 * 1024
+
+    def __init__(self, image, f, parent=None):
+        super(LoadThread, self).__init__(parent)
+        self.image = image
+        self.f = f
+        self.sharedKey = None # see Document.share()
+        self.cancelled = False
+        self.error = None
+        self.diagnostics = Diagnostics()
+
+    def cancel(self):
+        self.cancelled = True
+
+    @timing.timed()
+    def run(self):
+        try:
+            with self.f:
+                size = max(1, os.fstat(self.f.fileno()).st_size)
+                for bx, columns in self.image.parse(self.f, self.BlockSize, diagnostics=self.diagnostics):
+                    if self.cancelled:
+                        break
+                    self.blockLoaded.emit(bx, columns)
+                    self.progress.emit(int(compressed.compressedPosition(self.f) * 100 / size))
+        except Exception as exception:
+            self.error = exception
+            self.failed.emit(str(exception))
+
+class OpenThread(QtCore.QThread):
+    """Parses files at the same time by a pool of worker processes, emits the
+    result of reader.parseFile() for every file as soon as it is available."""
+
+    parsed = QtCore.pyqtSignal(object)
+
+    def __init__(self, filenames, cache, shared=None, parent=None):
+        super(OpenThread, self).__init__(parent)
+        self.filenames = filenames
+        self.cache = cache
+        self.shared = shared
+        self.handoff = tempfile.mkdtemp(prefix='testvector-open-')
+        self.cancelled = False
+        self.done = 0
+        self.error = None
+
+    def cancel(self):
+        self.cancelled = True
+
+    def remaining(self):
+        """Returns files not parsed, e.g. if starting workers failed."""
+        return self.filenames[self.done:] if not self.cancelled else []
+
+    def run(self):
+        try:
+            self.parseAll()
+        except Exception as exception:
+            self.error = exception
+
+    def parseAll(self):
+        tasks = [(filename, self.cache, self.handoff, self.shared) for filename in self.filenames]
+        jobs = min(os.cpu_count() or 1, len(tasks))
+        # Do not fork the GUI process while Qt threads are running.
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        pool = multiprocessing.get_context(method).Pool(jobs, initializer=reader.initWorker)
+        try:
+            results = pool.imap_unordered(reader.parseFile, tasks)
+            while not self.cancelled and self.done < len(tasks):
+                try:
+                    result = results.next(timeout=0.1)
+                except multiprocessing.TimeoutError:
+                    continue
+                # Keep parsed files first, see remaining().
+                self.filenames.remove(result[0])
+                self.filenames.insert(self.done, result[0])
+                self.done += 1
+                self.parsed.emit(result)
+        finally:
+            pool.terminate()
+            pool.join()
+
+# -----------------------------------------------------------------------------
+#  Export dialog and thread classes.
+# -----------------------------------------------------------------------------
+
+class ExportDialog(QtWidgets.QDialog):
+    """Dialog selecting export file, format, objects and row range."""
+
+    Formats = (
+        ('csv', "CSV (*.csv)"),
+        ('npz', "NumPy archive (*.npz)"),
+        ('npy', "NumPy arrays, one file per column (directory)"),
+    )
+
+    def __init__(self, filename, rows, parent=None):
+        super(ExportDialog, self).__init__(parent)
+        self.setWindowTitle("Export")
+        self.basename = os.path.splitext(compressed.stripExtension(filename))[0]
+        self.formatComboBox = QtWidgets.QComboBox(self)
+        for key, title in self.Formats:
+            self.formatComboBox.addItem(title, key)
+        self.formatComboBox.currentIndexChanged.connect(self.onFormatChanged)
+        self.pathEdit = QtWidgets.QLineEdit(self)
+        browseButton = QtWidgets.QPushButton("&Browse...", self)
+        browseButton.clicked.connect(self.onBrowse)
+        pathLayout = QtWidgets.QHBoxLayout()
+        pathLayout.addWidget(self.pathEdit)
+        pathLayout.addWidget(browseButton)
+        self.objectsEdit = QtWidgets.QLineEdit(self)
+        self.objectsEdit.setPlaceholderText("all, e.g. muon,eg[0],algorithms")
+        self.decodedCheckBox = QtWidgets.QCheckBox("Decode attributes, e.g. muon[2].pt", self)
+        self.startSpinBox = QtWidgets.QSpinBox(self)
+        self.startSpinBox.setRange(0, max(0, rows - 1))
+        self.stopSpinBox = QtWidgets.QSpinBox(self)
+        self.stopSpinBox.setRange(1, max(1, rows))
+        self.stopSpinBox.setValue(rows)
+        rangeLayout = QtWidgets.QHBoxLayout()
+        rangeLayout.addWidget(self.startSpinBox)
+        rangeLayout.addWidget(QtWidgets.QLabel("to", self))
+        rangeLayout.addWidget(self.stopSpinBox)
+        buttonBox = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel, self)
+        buttonBox.accepted.connect(self.accept)
+        buttonBox.rejected.connect(self.reject)
+        layout = QtWidgets.QFormLayout()
+        layout.addRow("Format", self.formatComboBox)
+        layout.addRow("File", pathLayout)
+        layout.addRow("Objects", self.objectsEdit)
+        layout.addRow("", self.decodedCheckBox)
+        layout.addRow("Rows", rangeLayout)
+        layout.addRow(buttonBox)
+        self.setLayout(layout)
+        self.onFormatChanged()
+
+    def format(self):
+        return self.formatComboBox.currentData()
+
+    def path(self):
+        return self.pathEdit.text()
+
+    def objects(self):
+        return {name.strip() for name in self.objectsEdit.text().split(',') if name.strip()}
+
+    def decoded(self):
+        return self.decodedCheckBox.isChecked()
+
+    def startRow(self):
+        return self.startSpinBox.value()
+
+    def stopRow(self):
+        return self.stopSpinBox.value()
+
+    def onFormatChanged(self):
+        """Replace extension of the file name by the one of the format."""
+        path = self.path()
+        for writer in export.Writers.values():
+            if writer.extension and path.endswith(writer.extension):
+                path = path[:-len(writer.extension)]
+        self.pathEdit.setText((path or self.basename) + export.Writers[self.format()].extension)
+
+    def onBrowse(self):
+        if self.format() == 'npy':
+            path = QtWidgets.QFileDialog.getExistingDirectory(self, "Export to directory", os.path.dirname(self.path()))
+        else:
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export to file", self.path(), self.formatComboBox.currentText())
+        if path:
+            self.pathEdit.setText(path)
+
+    def accept(self):
+        if not self.path():
+            return
+        if not export.exportFields(TestVector().formats, self.objects()):
+            QtWidgets.QMessageBox.warning(self, "Export", "No object matches {}.".format(self.objectsEdit.text()))
+            return
+        if self.startSpinBox.value() >= self.stopSpinBox.value():
+            QtWidgets.QMessageBox.warning(self, "Export", "Empty row range.")
+            return
+        super(ExportDialog, self).accept()
+
+class ExportThread(QtCore.QThread):
+    """Writes rows of a loaded test vector chunk by chunk in background."""
+
+    progress = QtCore.pyqtSignal(int)
+
+    def __init__(self, testvector, path, format, objects, decoded, start, stop, parent=None):
+        super(ExportThread, self).__init__(parent)
+        self.testvector = testvector
+        self.path = path
+        self.format = format
+        self.fields = export.exportFields(testvector.formats, objects, decoded)
+        # Rows appended by live reload while exporting are not exported.
+        self.startRow = start
+        self.stopRow = min(stop, len(testvector))
+        self.rows = 0
+        self.cancelled = False
+        self.error = None
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        count = max(1, self.stopRow - self.startRow)
+        columns = {field.col for field in self.fields}
+        try:
+            writer = export.Writers[self.format](self.path, self.fields)
+            self.rows = export.export(
+                export.iterRows(self.testvector, columns, self.startRow, self.stopRow),
+                self.fields, writer,
+                progress=lambda rows: self.progress.emit(int(rows * 100 / count)),
+                cancelled=lambda: self.cancelled)
+        except export.ExportCancelled:
+            pass
+        except Exception as exception:
+            self.error = exception
+
+# -----------------------------------------------------------------------------
+#  Timing statistics dialog.
+# -----------------------------------------------------------------------------
+
+class TimingDialog(QtWidgets.QDialog):
+    """Shows call counts and latencies of instrumented functions, refreshed
+    every second while visible."""
+
+    Headers = ("Function", "Calls", "Total [ms]", "Mean [ms]", "Max [ms]")
+
+    def __init__(self, recorder, parent=None):
+        super(TimingDialog, self).__init__(parent)
+        self.recorder = recorder
+        self.setWindowTitle("Timing Statistics")
+        self.resize(640, 400)
+        self.tableWidget = QtWidgets.QTableWidget(0, len(self.Headers), self)
+        self.tableWidget.setHorizontalHeaderLabels(self.Headers)
+        self.tableWidget.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.tableWidget.verticalHeader().hide()
+        self.tableWidget.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        buttonBox = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Close, self)
+        buttonBox.rejected.connect(self.reject)
+        resetButton = buttonBox.addButton("&Reset", QtWidgets.QDialogButtonBox.ResetRole)
+        resetButton.clicked.connect(self.onReset)
+        saveButton = buttonBox.addButton("&Save...", QtWidgets.QDialogButtonBox.ActionRole)
+        saveButton.clicked.connect(self.onSave)
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.tableWidget)
+        layout.addWidget(buttonBox)
+        self.setLayout(layout)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super(TimingDialog, self).showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super(TimingDialog, self).hideEvent(event)
+
+    def refresh(self):
+        summary = self.recorder.summary()
+        self.tableWidget.setRowCount(len(summary))
+        for row, (name, stat) in enumerate(summary):
+            cells = (name, format(stat.count), "{:.1f}".format(stat.total * 1e3),
+                "{:.3f}".format(stat.mean * 1e3), "{:.1f}".format(stat.max * 1e3))
+            for col, text in enumerate(cells):
+                item = QtWidgets.QTableWidgetItem(text)
+                if col:
+                    item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                self.tableWidget.setItem(row, col, item)
+
+    def onReset(self):
+        self.recorder.reset()
+        self.refresh()
+
+    def onSave(self):
+        """Write statistics and Chrome trace to a JSON file."""
+        filename, _ = QtWidgets.QFileDialog.getSaveFileName(self,
+            "Save timing trace",
+            os.path.join(os.getcwd(), "trace.json"),
+            "Chrome trace (*.json);;All files (*)"
+        )
+        if not filename:
+            return
+        try:
+            self.recorder.dump(filename)
+        except OSError as exception:
+            QtWidgets.QMessageBox.critical(self, "Save failed", "<strong>Failed to save file:</strong><br/>{}".format(exception))
+
+# -----------------------------------------------------------------------------
+#  Overview widget class.
+# -----------------------------------------------------------------------------
+
+class OverviewWidget(QtWidgets.QWidget):
+    """Minimap of all rows (vertical) and columns (horizontal). Colors show
+    the fraction of non-empty rows or of bits set per pixel row, the rows
+    visible in the table view are framed. Click or drag to jump."""
+
+    clicked = QtCore.pyqtSignal(int, int)
+
+    ColumnWidth = 2
+
+    def __init__(self, parent=None):
+        super(OverviewWidget, self).__init__(parent)
+        self.summary = None
+        self.image = None
+        self.viewport = None
+        self.mode = 'occupancy'
+        self.setMinimumWidth(self.ColumnWidth * 16)
+        self.setSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Expanding)
+        self.setContextMenuPolicy(QtCore.Qt.ActionsContextMenu)
+        group = QtWidgets.QActionGroup(self)
+        for mode, text in (('occupancy', "Occupancy"), ('bits', "Bits set")):
+            action = QtWidgets.QAction(text, group)
+            action.setCheckable(True)
+            action.setChecked(mode == self.mode)
+            action.triggered.connect(lambda checked, mode=mode: self.setMode(mode))
+            self.addAction(action)
+        self.setToolTip("Overview of non-empty objects, click to jump")
+
+    def sizeHint(self):
+        columns = self.summary.columns if self.summary else 59
+        return QtCore.QSize(columns * self.ColumnWidth, 400)
+
+    def setSummary(self, summary):
+        self.summary = summary
+        self.invalidate()
+
+    def setMode(self, mode):
+        self.mode = mode
+        self.invalidate()
+
+    def setViewport(self, viewport):
+        if viewport != self.viewport:
+            self.viewport = viewport
+            self.update()
+
+    def invalidate(self):
+        """Redraw image on next paint event."""
+        self.image = None
+        self.update()
+
+    @timing.timed()
+    def createImage(self, height):
+        """Render summary into image of one pixel per column and bin."""
+        occupancy, minimum, maximum = self.summary.summarize(height)
+        values = occupancy if self.mode == 'occupancy' else maximum
+        # Non-empty bins are drawn with at least a light shade.
+        shade = np.where(occupancy > 0, 0.2 + 0.8 * values, 0.)
+        palette = self.palette()
+        base = palette.color(QtGui.QPalette.Base)
+        high = QtGui.QColor("#1f4e9c")
+        channels = []
+        for b, h in ((base.red(), high.red()), (base.green(), high.green()), (base.blue(), high.blue())):
+            channels.append((b + (h - b) * shade).astype(np.uint32))
+        pixels = np.ascontiguousarray(0xff000000 | (channels[0] << 16) | (channels[1] << 8) | channels[2], dtype=np.uint32)
+        rows, columns = pixels.shape
+        image = QtGui.QImage(pixels.data, columns, rows, columns * 4, QtGui.QImage.Format_RGB32)
+        return image.copy() # detach from array buffer
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.fillRect(self.rect(), self.palette().color(QtGui.QPalette.Base))
+        if not self.summary or not self.summary.rows:
+            return
+        if self.image is None:
+            self.image = self.createImage(max(1, self.height()))
+        painter.drawImage(self.rect(), self.image)
+        if self.viewport:
+            first, last = self.viewport
+            top = int(first * self.height() / self.summary.rows)
+            bottom = int(last * self.height() / self.summary.rows)
+            painter.setPen(self.palette().color(QtGui.QPalette.Highlight))
+            painter.drawRect(0, top, self.width() - 1, max(2, bottom - top))
+
+    def resizeEvent(self, event):
+        self.image = None
+        super(OverviewWidget, self).resizeEvent(event)
+
+    def cellAt(self, pos):
+        """Returns (row, column) at widget position."""
+        rows, columns = self.summary.rows, self.summary.columns
+        row = int(pos.y() * rows / max(1, self.height()))
+        column = int(pos.x() * columns / max(1, self.width()))
+        return min(max(row, 0), rows - 1), min(max(column, 0), columns - 1)
+
+    def mousePressEvent(self, event):
+        if event.button() == QtCore.Qt.LeftButton and self.summary and self.summary.rows:
+            self.clicked.emit(*self.cellAt(event.pos()))
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & QtCore.Qt.LeftButton and self.summary and self.summary.rows:
+            self.clicked.emit(*self.cellAt(event.pos()))
+
+# -----------------------------------------------------------------------------
+#  Statistics widget
+# -----------------------------------------------------------------------------
+
+class StatisticsWidget(QtWidgets.QWidget):
+    """Shows count, minimum, maximum and mean of every attribute of every
+    object slot over all or the selected rows, and the histogram of the
+    current attribute."""
+
+    scopeChanged = QtCore.pyqtSignal()
+
+    Columns = ("Attribute", "Count", "Min", "Max", "Mean")
+
+    def __init__(self, parent=None):
+        super(StatisticsWidget, self).__init__(parent)
+        self.summaries = []
+        self.selectedCheck = QtWidgets.QCheckBox("Selected rows only", self)
+        self.selectedCheck.setToolTip("Restrict statistics to the BX range of the selection")
+        self.selectedCheck.toggled.connect(self.scopeChanged)
+        self.rangeLabel = QtWidgets.QLabel(self)
+        self.treeWidget = QtWidgets.QTreeWidget(self)
+        self.treeWidget.setHeaderLabels(self.Columns)
+        self.treeWidget.setUniformRowHeights(True)
+        self.treeWidget.setAlternatingRowColors(True)
+        self.treeWidget.header().setSectionResizeMode(QtWidgets.QHeaderView.ResizeToContents)
+        self.treeWidget.currentItemChanged.connect(self.updateHistogram)
+        self.histogramWidget = HistogramWidget(self)
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.selectedCheck)
+        layout.addWidget(self.rangeLabel)
+        layout.addWidget(self.treeWidget, 1)
+        layout.addWidget(self.histogramWidget)
+        layout.setContentsMargins(4, 4, 4, 4)
+        self.setLayout(layout)
+
+    def selectedOnly(self):
+        return self.selectedCheck.isChecked()
+
+    def setSummaries(self, summaries, description):
+        """Show list of ColumnSummary, items (and their expanded state) are
+        kept as long as the columns do not change."""
+        self.rangeLabel.setText(description)
+        tree = self.treeWidget
+        labels = [tree.topLevelItem(i).text(0) for i in range(tree.topLevelItemCount())]
+        if labels != [summary.label for summary in summaries]:
+            tree.clear()
+            for summary in summaries:
+                item = QtWidgets.QTreeWidgetItem(tree, [summary.label])
+                for attribute in summary.attributes:
+                    QtWidgets.QTreeWidgetItem(item, [attribute.name])
+        for i, summary in enumerate(summaries):
+            item = tree.topLevelItem(i)
+            self.setItemTexts(item, summary.count, None, None, None)
+            for j, attribute in enumerate(summary.attributes):
+                self.setItemTexts(item.child(j), attribute.count, attribute.minimum, attribute.maximum, attribute.mean)
+        self.summaries = summaries
+        self.updateHistogram()
+
+    def setItemTexts(self, item, count, minimum, maximum, mean):
+        texts = (
+            format(count),
+            "" if minimum is None else format(minimum),
+            "" if maximum is None else format(maximum),
+            "" if mean is None else "{:.2f}".format(mean),
+        )
+        for col, text in enumerate(texts, 1):
+            item.setText(col, text)
+            item.setTextAlignment(col, QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+
+    def updateHistogram(self):
+        """Show histogram of the current attribute."""
+        item = self.treeWidget.currentItem()
+        parent = item.parent() if item else None
+        if parent is None:
+            self.histogramWidget.setHistogram(None, None)
+            return
+        summary = self.summaries[self.treeWidget.indexOfTopLevelItem(parent)]
+        attribute = summary.attributes[parent.indexOfChild(item)]
+        self.histogramWidget.setHistogram("{}.{}".format(summary.label, attribute.name), attribute)
+
+class HistogramWidget(QtWidgets.QWidget):
+    """Bar chart of the histogram of an attribute, hover a bar for its
+    count."""
+
+    Margin = 4
+
+    def __init__(self, parent=None):
+        super(HistogramWidget, self).__init__(parent)
+        self.title = None
+        self.attribute = None
+        self.setMinimumHeight(140)
+        self.setMouseTracking(True)
+
+    def setHistogram(self, title, attribute):
+        self.title = title
+        self.attribute = attribute
+        self.update()
+
+    def plotRect(self):
+        """Returns area of the bars, below the title and above the axis
+        labels."""
+        height = self.fontMetrics().height()
+        return self.rect().adjusted(self.Margin, self.Margin + height, -self.Margin, -self.Margin - height)
+
+    def binAt(self, x):
+        rect = self.plotRect()
+        bins = len(self.attribute.histogram)
+        index = int((x - rect.left()) * bins / max(1, rect.width()))
+        return index if 0 <= index < bins else None
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        palette = self.palette()
+        painter.fillRect(self.rect(), palette.color(QtGui.QPalette.Base))
+        painter.setPen(palette.color(QtGui.QPalette.Text))
+        if self.attribute is None:
+            painter.drawText(self.rect(), QtCore.Qt.AlignCenter, "Select an attribute")
+            return
+        attribute = self.attribute
+        text = self.rect().adjusted(self.Margin, self.Margin, -self.Margin, -self.Margin)
+        painter.drawText(text, QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop, self.title)
+        if attribute.binwidth > 1:
+            painter.drawText(text, QtCore.Qt.AlignRight | QtCore.Qt.AlignTop, "bin width {}".format(attribute.binwidth))
+        bins = len(attribute.histogram)
+        painter.drawText(text, QtCore.Qt.AlignLeft | QtCore.Qt.AlignBottom, "0")
+        painter.drawText(text, QtCore.Qt.AlignRight | QtCore.Qt.AlignBottom, format(bins * attribute.binwidth - 1))
+        rect = self.plotRect()
+        peak = attribute.histogram.max() if bins else 0
+        if not peak:
+            return
+        heights = attribute.histogram * rect.height() / peak
+        color = QtGui.QColor("#1f4e9c")
+        for index in np.flatnonzero(attribute.histogram):
+            left = rect.left() + index * rect.width() // bins
+            right = rect.left() + (index + 1) * rect.width() // bins
+            height = max(1, int(heights[index]))
+            painter.fillRect(left, rect.bottom() - height + 1, max(1, right - left), height, color)
+
+    def mouseMoveEvent(self, event):
+        if self.attribute is None:
+            return
+        index = self.binAt(event.pos().x())
+        if index is None:
+            QtWidgets.QToolTip.hideText()
+            return
+        width = self.attribute.binwidth
+        low = index * width
+        values = format(low) if width == 1 else "{} to {}".format(low, low + width - 1)
+        QtWidgets.QToolTip.showText(event.globalPos(), "{}: {}".format(values, int(self.attribute.histogram[index])), self)
+
+# -----------------------------------------------------------------------------
+#  Diff document class.
+# -----------------------------------------------------------------------------
+
+class DiffDocument(QtWidgets.QWidget):
+    """Document comparing two test vector files cell by cell, mismatching
+    cells are highlighted."""
+
+    loadingProgress = QtCore.pyqtSignal(int)
+    loadingFinished = QtCore.pyqtSignal()
+
+    def __init__(self, reference, filename, parent = None, cache = None):
+        super(DiffDocument, self).__init__(parent)
+        self.filename = None # not associated with a single file
+        self.filenames = (os.path.abspath(reference), os.path.abspath(filename))
+        self.cache = cache
+        self.reference = None
+        self.other = None
+        self.loadThreads = []
+        self.progress = {}
+        self.pending = 0
+        self.diff = None
+        self.model = None
+        self.tableView = createTableView(self)
+        self.detailsWidget = DiffDetailsWidget(self)
+        self.summaryWidget = self.createSummaryWidget()
+        self.toolBar = self.createToolBar()
+        sidebar = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        sidebar.addWidget(self.detailsWidget)
+        sidebar.addWidget(self.summaryWidget)
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Horizontal)
+        splitter.addWidget(self.tableView)
+        splitter.addWidget(sidebar)
+        splitter.setStretchFactor(0, 2)
+        splitter.setStretchFactor(1, 1)
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.toolBar, 0)
+        layout.addWidget(splitter, 1)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        self.startLoading()
+
+    def startLoading(self):
+        """Load both files from the cache or parse them in background threads
+        (see LoadThread), the files are compared once both are loaded."""
+        images = []
+        for filename in self.filenames:
+            image = self.cache.load(filename) if self.cache else None
+            if image is None:
+                image = TestVector()
+                try:
+                    f = compressed.openFile(filename)
+                except IOError:
+                    raise FileReadError(filename)
+                except ValueError as exception:
+                    raise UnknownFileTypeError("{}: {}".format(filename, exception))
+                thread = LoadThread(image, f, self)
+                thread.filename = filename
+                thread.blockLoaded.connect(self.onBlockLoaded)
+                thread.progress.connect(self.onProgress)
+                thread.finished.connect(self.onThreadFinished)
+                self.loadThreads.append(thread)
+            images.append(image)
+        self.reference, self.other = images
+        self.toolBar.setEnabled(False)
+        self.summaryLabel.setText("Loading...")
+        self.pending = len(self.loadThreads)
+        for thread in self.loadThreads:
+            thread.start()
+        # Both cached, compare once connected to the main window.
+        if not self.pending:
+            QtCore.QTimer.singleShot(0, self.onLoadingFinished)
+
+    def onBlockLoaded(self, bx, columns):
+        self.sender().image.extend(bx, columns)
+
+    def onProgress(self, value):
+        self.progress[self.sender()] = value
+        self.loadingProgress.emit(sum(self.progress.values()) // len(self.filenames))
+
+    def onThreadFinished(self):
+        self.pending -= 1
+        if not self.pending:
+            self.onLoadingFinished()
+
+    def onLoadingFinished(self):
+        """Compare the files if both were loaded completely, files with
+        problems are compared without the skipped rows."""
+        problems = []
+        for thread in self.loadThreads:
+            thread.wait()
+            name = os.path.basename(thread.filename)
+            if thread.cancelled or thread.error:
+                message = "cancelled" if thread.cancelled else thread.error
+                self.summaryLabel.setText("Failed to load {}: {}".format(name, message))
+                self.loadThreads = []
+                self.loadingFinished.emit()
+                return
+            if thread.diagnostics:
+                problems.append("{}: {}".format(name, thread.diagnostics.summary()))
+            elif self.cache:
+                try:
+                    self.cache.store(thread.filename, thread.image)
+                except OSError:
+                    pass
+            thread.image = None # held by the document only
+        self.loadThreads = []
+        self.toolBar.setEnabled(True)
+        self.compare()
+        self.tableView.resizeColumnsToContents()
+        if problems:
+            self.summaryLabel.setToolTip("Problems found, invalid rows skipped:\n" + "\n".join(problems))
+        self.loadingFinished.emit()
+
+    def createToolBar(self):
+        self.ignoreEdit = QtWidgets.QLineEdit(self)
+        self.ignoreEdit.setPlaceholderText("Ignore attributes, e.g. reserved, muon.iso")
+        self.ignoreEdit.setClearButtonEnabled(True)
+        self.ignoreEdit.returnPressed.connect(self.compare)
+        previousButton = QtWidgets.QToolButton(self)
+        previousButton.setIcon(QtGui.QIcon.fromTheme('go-up'))
+        previousButton.setToolTip("Previous mismatch (Shift+F4)")
+        previousButton.setShortcut(QtGui.QKeySequence(QtCore.Qt.SHIFT + QtCore.Qt.Key_F4))
+        previousButton.clicked.connect(self.previousMismatch)
+        nextButton = QtWidgets.QToolButton(self)
+        nextButton.setIcon(QtGui.QIcon.fromTheme('go-down'))
+        nextButton.setToolTip("Next mismatch (F4)")
+        nextButton.setShortcut(QtGui.QKeySequence(QtCore.Qt.Key_F4))
+        nextButton.clicked.connect(self.nextMismatch)
+        self.summaryLabel = QtWidgets.QLabel(self)
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(self.ignoreEdit, 1)
+        layout.addWidget(previousButton)
+        layout.addWidget(nextButton)
+        layout.addWidget(self.summaryLabel)
+        layout.setContentsMargins(4, 4, 4, 0)
+        widget = QtWidgets.QWidget(self)
+        widget.setLayout(layout)
+        return widget
+
+    def createSummaryWidget(self):
+        """Create table listing mismatch counts per column."""
+        widget = QtWidgets.QTreeWidget(self)
+        widget.setRootIsDecorated(False)
+        widget.setHeaderLabels(["Object", "Mismatches"])
+        widget.itemActivated.connect(self.onSummaryActivated)
+        widget.itemClicked.connect(self.onSummaryActivated)
+        return widget
+
+    def compare(self):
+        """Compare test vectors, ignoring attributes listed in the tool bar."""
+        ignore = [name.strip() for name in self.ignoreEdit.text().split(',') if name.strip()]
+        self.diff = TestVectorDiff(self.reference, self.other, ignore)
+        self.model = DiffTableModel(self.diff, self)
+        self.tableView.setModel(self.model)
+        self.tableView.selectionModel().currentChanged.connect(self.onCurrentChanged)
+        self.summaryWidget.clear()
+        for col, count in enumerate(self.diff.counts):
+            if count:
+                item = QtWidgets.QTreeWidgetItem([self.reference.formats[col].label(), format(int(count))])
+                item.setData(0, QtCore.Qt.UserRole, col)
+                self.summaryWidget.addTopLevelItem(item)
+        self.summaryLabel.setText("{} mismatching cells in {} of {} rows".format(
+            self.diff.count(), int(self.diff.rowMask.sum()), self.diff.rows))
+
+    def selectCell(self, row, col):
+        index = self.model.index(row, col)
+        self.tableView.setCurrentIndex(index)
+        self.tableView.scrollTo(index)
+
+    def nextMismatch(self, backward=False, column=None):
+        index = self.tableView.currentIndex()
+        row, col = (index.row(), index.column()) if index.isValid() else (-1, self.model.columnCount(QtCore.QModelIndex()) - 1)
+        cell = self.diff.next(row, col, backward, column)
+        if cell is not None:
+            self.selectCell(*cell)
+
+    def previousMismatch(self):
+        self.nextMismatch(backward=True)
+
+    def onSummaryActivated(self, item):
+        col = item.data(0, QtCore.Qt.UserRole)
+        cell = self.diff.next(-1, col, column=col)
+        if cell is not None:
+            self.selectCell(*cell)
+
+    def onCurrentChanged(self, current, previous):
+        if current.isValid():
+            self.detailsWidget.load(self.diff, current.row(), current.column())
+
+    def isLoading(self):
+        return any(thread.isRunning() for thread in self.loadThreads)
+
+    def cancelLoading(self):
+        for thread in self.loadThreads:
+            thread.cancel()
+            thread.wait()
+
+    def setLive(self, enabled):
+        pass
+
+class DiffDetailsWidget(QtWidgets.QTextEdit):
+    """Shows attributes of a cell of both compared test vectors."""
+
+    def __init__(self, parent = None):
+        super(DiffDetailsWidget, self).__init__(parent)
+        self.setReadOnly(True)
+
+    def load(self, diff, row, col):
+        fmt = diff.reference.formats[col]
+        values = [tv.value(row, col) if row < len(tv) else None for tv in (diff.reference, diff.other)]
+        mismatches = diff.attributes(row, col) if diff.isMismatch(row, col) else []
+        def formatValue(value):
+            return "-" if value is None else "0x{}".format(fmt.format(value))
+        text = [
+            "<p><strong>Object: {}</strong></p>".format(fmt.label()),
+            "<p><strong>BX: {}</strong></p>".format(row + 1),
+            "<p><strong>Reference:</strong> {}</p>".format(formatValue(values[0])),
+            "<p><strong>Compared:</strong> {}</p>".format(formatValue(values[1])),
+            "<hr/>",
+        ]
+        table = []
+        for attr in fmt.attributes:
+            cells = ["-" if value is None else "0x{:x}".format(attr.get(value)) for value in values]
+            style = " style=\"background-color: #f9b2b2;\"" if attr.name in mismatches else ""
+            table.append("<tr{}><td><strong>{}</strong></td><td>{}</td><td>{}</td></tr>".format(style, attr.name, *cells))
+        if table:
+            text.append("<table width=\"100%\">")
+            text.append("<tr style=\"background-color: #eee;\"><th>Attribute</th><th>Reference</th><th>Compared</th></tr>")
+            text.extend(table)
+            text.append("</table>")
+        self.setHtml('\n'.join(text))
+
+# -----------------------------------------------------------------------------
+#  Details widget class.
+# -----------------------------------------------------------------------------
+
+class AttributeTableModel(QtCore.QAbstractTableModel):
+    """Attributes of a single value, the model is reset only if the format
+    changes, otherwise only the values are updated. Editing an attribute
+    emits the new value of the whole object."""
+
+    Headers = ("Attribute", "Dec", "Hex")
+
+    valueEdited = QtCore.pyqtSignal(object)
+    editFailed = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super(AttributeTableModel, self).__init__(parent)
+        self.attributes = []
+        self.values = []
+        self.value = 0
+        self.editable = False
+
+    def setValue(self, fmt, value):
+        self.value = value
+        attributes = fmt.attributes
+        if attributes is not self.attributes:
+            self.beginResetModel()
+            self.attributes = attributes
+            self.values = fmt.values(value)
+            self.endResetModel()
+        else:
+            self.values = fmt.values(value)
+            if self.values:
+                self.dataChanged.emit(self.index(0, 1), self.index(len(self.values) - 1, 2), [QtCore.Qt.DisplayRole])
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.attributes)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.Headers)
+
+    def flags(self, index):
+        flags = super(AttributeTableModel, self).flags(index)
+        if self.editable and index.column() > 0:
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role):
+        if not index.isValid() or role not in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return QtCore.QVariant()
+        row, col = index.row(), index.column()
+        if col == 0:
+            return self.attributes[row].name
+        if col == 1:
+            return format(self.values[row], 'd')
+        return "0x{:x}".format(self.values[row])
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        """Parse edited attribute (decimal or hex), emits valueEdited."""
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+        attr = self.attributes[index.row()]
+        try:
+            number = int(value, 10 if index.column() == 1 else 16)
+        except ValueError:
+            self.editFailed.emit("{!r} is not a number".format(value))
+            return False
+        if number < 0 or number >> attr.bitwidth:
+            self.editFailed.emit("{} exceeds {} bit of {}".format(value, attr.bitwidth, attr.name))
+            return False
+        self.valueEdited.emit((self.value & ~attr.bitmask) | (number << attr.lsb))
+        return True
+
+    def headerData(self, section, orientation, role):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.Headers[section]
+        return QtCore.QVariant()
+
+class DetailsWidget(QtWidgets.QWidget):
+    """Shows object details, attribute values are displayed by a table view
+    so that changing the current cell does not re-layout the panel. Edited
+    attributes are emitted with the index of the data table model."""
+
+    valueEdited = QtCore.pyqtSignal(object, object)
+
+    def __init__(self, parent = None):
+        super(DetailsWidget, self).__init__(parent)
+        self.current = QtCore.QModelIndex()
+        self.objectLabel = QtWidgets.QLabel(self)
+        self.bxLabel = QtWidgets.QLabel(self)
+        self.valueLabel = QtWidgets.QLabel(self)
+        self.valueLabel.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
+        self.valueLabel.setWordWrap(True)
+        self.model = AttributeTableModel(self)
+        self.model.valueEdited.connect(lambda value: self.valueEdited.emit(self.current, value))
+        self.tableView = QtWidgets.QTableView(self)
+        self.tableView.setModel(self.model)
+        self.tableView.setShowGrid(False)
+        self.tableView.setAlternatingRowColors(True)
+        self.tableView.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.tableView.verticalHeader().hide()
+        # Fixed section sizes, the view never measures cell contents.
+        verticalHeader = self.tableView.verticalHeader()
+        verticalHeader.setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        verticalHeader.setDefaultSectionSize(20)
+        horizontalHeader = self.tableView.horizontalHeader()
+        horizontalHeader.setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.objectLabel)
+        layout.addWidget(self.bxLabel)
+        layout.addWidget(self.valueLabel)
+        layout.addWidget(self.tableView, 1)
+        layout.setContentsMargins(4, 4, 4, 4)
+        self.setLayout(layout)
+
+    @timing.timed()
+    def load(self, current, previous):
+        """Update the object preview. Slot called by QTableModel."""
+        # Get the objects raw value.
+        data = current.data(QtCore.Qt.UserRole)
+        if data is None:
+            return
+        fmt, value = data
+        model = current.model()
+        if isinstance(model, QtCore.QAbstractProxyModel):
+            current = model.mapToSource(current)
+        self.current = QtCore.QPersistentModelIndex(current)
+        bx = current.row() + 1 # begins with 1
+        self.objectLabel.setText("<strong>Object: {}</strong>".format(fmt.label()))
+        self.bxLabel.setText("<strong>BX: {}</strong>".format(bx))
+        self.valueLabel.setText("<strong>Value:</strong> 0x{}".format(fmt.format(value)))
+        self.model.setValue(fmt, value)
+
+# -----------------------------------------------------------------------------
+#  Cell delegate
+# -----------------------------------------------------------------------------
+
+class CellDelegate(QtWidgets.QStyledItemDelegate):
+    """Paints cell texts using cached, prepared QStaticText objects. Font,
+    palette and row height are assumed to be constant, call clearCache()
+    after changing them."""
+
+    CacheSize = 8192
+
+    def __init__(self, parent=None):
+        super(CellDelegate, self).__init__(parent)
+        self.clearCache()
+
+    def clearCache(self):
+        self.staticTexts = {}
+        self.metrics = None
+
+    def staticText(self, text, font):
+        """Returns prepared static text, cached by text (evicting the oldest
+        entries first)."""
+        staticText = self.staticTexts.get(text)
+        if staticText is None:
+            staticText = QtGui.QStaticText(text)
+            staticText.setTextFormat(QtCore.Qt.PlainText)
+            staticText.prepare(QtGui.QTransform(), font)
+            if len(self.staticTexts) >= self.CacheSize:
+                del self.staticTexts[next(iter(self.staticTexts))]
+            self.staticTexts[text] = staticText
+        return staticText
+
+    def updateMetrics(self, option):
+        widget = option.widget
+        style = widget.style() if widget else QtWidgets.QApplication.style()
+        margin = style.pixelMetric(QtWidgets.QStyle.PM_FocusFrameHMargin, None, widget) + 1
+        offset = (option.rect.height() - option.fontMetrics.height()) // 2
+        palette = option.palette
+        self.metrics = (option.rect.height(), margin, offset, palette.color(QtGui.QPalette.Text), palette.color(QtGui.QPalette.HighlightedText))
+
+    @timing.timed()
+    def paint(self, painter, option, index):
+        model = index.model()
+        text = model.text(index.row(), index.column()) if isinstance(model, (DataTableModel, FilterProxyModel)) else index.data()
+        rect = option.rect
+        if self.metrics is None or self.metrics[0] != rect.height():
+            self.updateMetrics(option)
+        height, margin, offset, textColor, highlightedTextColor = self.metrics
+        state = option.state
+        if state & QtWidgets.QStyle.State_Selected:
+            painter.fillRect(rect, option.palette.highlight())
+            painter.setPen(highlightedTextColor)
+        else:
+            if isinstance(model, DiffTableModel):
+                background = model.background(index.row(), index.column())
+                if background is not None:
+                    painter.fillRect(rect, background)
+            painter.setPen(textColor)
+        if text:
+            painter.drawStaticText(rect.left() + margin, rect.top() + offset, self.staticText(text, option.font))
+        if state & QtWidgets.QStyle.State_HasFocus:
+            widget = option.widget
+            style = widget.style() if widget else QtWidgets.QApplication.style()
+            focusOption = QtWidgets.QStyleOptionFocusRect()
+            if widget:
+                focusOption.initFrom(widget)
+            focusOption.rect = rect
+            focusOption.state = state
+            style.drawPrimitive(QtWidgets.QStyle.PE_FrameFocusRect, focusOption, painter, widget)
+
+# -----------------------------------------------------------------------------
+#  Data model
+# -----------------------------------------------------------------------------
+
+class DataTableModel(QtCore.QAbstractTableModel):
+    """Table model over a test vector, rows appended to the test vector (while
+    loading) are inserted in chunks using fetchMore().
+
+    Display texts are formatted vectorized in chunks of rows per column and
+    kept in a bounded cache (evicting the oldest chunks first).
+
+    Cells are editable (as hex values) if an edit journal is assigned.
+    """
+
+    edited = QtCore.pyqtSignal(int, int)
+    editFailed = QtCore.pyqtSignal(str)
+
+    FetchSize = 3564 # one orbit
+    ChunkSize = 256
+    CacheSize = 1024 # chunks
+
+    def __init__(self, testvector, parent=None, *args):
+        super(DataTableModel, self).__init__(parent, *args)
+        self.testvector = testvector
+        self.fetched = len(testvector)
+        self.textCache = {}
+        self.journal = None
+
+    @timing.timed()
+    def text(self, row, col):
+        """Returns formatted value of a cell."""
+        chunk, offset = divmod(row, self.ChunkSize)
+        key = (col, chunk)
+        texts = self.textCache.get(key)
+        if texts is None:
+            start = chunk * self.ChunkSize
+            texts = self.testvector.formatRange(col, start, start + self.ChunkSize)
+            if len(self.textCache) >= self.CacheSize:
+                del self.textCache[next(iter(self.textCache))]
+            self.textCache[key] = texts
+        return texts[offset]
+
+    def rowCount(self, parent):
+        return self.fetched
+
+    def canFetchMore(self, parent):
+        return self.fetched < len(self.testvector)
+
+    def updateRows(self, start):
+        """Update rows after the test vector changed from row start on."""
+        self.textCache.clear()
+        count = len(self.testvector)
+        complete = self.fetched >= start
+        if self.fetched > count:
+            self.beginRemoveRows(QtCore.QModelIndex(), count, self.fetched - 1)
+            self.fetched = count
+            self.endRemoveRows()
+        if start < self.fetched:
+            self.dataChanged.emit(self.index(start, 0), self.index(self.fetched - 1, self.columnCount(QtCore.QModelIndex()) - 1))
+        # Insert appended rows if all previous rows were already shown.
+        if complete and self.fetched < count:
+            self.beginInsertRows(QtCore.QModelIndex(), self.fetched, count - 1)
+            self.fetched = count
+            self.endInsertRows()
+
+    def fetchAll(self):
+        """Insert all rows not fetched so far."""
+        count = len(self.testvector)
+        if self.fetched < count:
+            self.beginInsertRows(QtCore.QModelIndex(), self.fetched, count - 1)
+            self.fetched = count
+            self.endInsertRows()
+
+    def fetchTo(self, row):
+        """Insert rows not fetched so far up to (including) row."""
+        count = min(row + 1, len(self.testvector))
+        if self.fetched < count:
+            self.beginInsertRows(QtCore.QModelIndex(), self.fetched, count - 1)
+            self.fetched = count
+            self.endInsertRows()
+
+    def fetchMore(self, parent):
+        count = min(self.FetchSize, len(self.testvector) - self.fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self.fetched, self.fetched + count - 1)
+        self.fetched += count
+        self.endInsertRows()
+
+    def columnCount(self, parent):
+        return len(self.testvector.formats)
+
+    def flags(self, index):
+        flags = super(DataTableModel, self).flags(index)
+        if self.journal is not None:
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    @timing.timed()
+    def data(self, index, role):
+        if not index.isValid():
+            return QtCore.QVariant()
+        if role == QtCore.Qt.UserRole:
+            fmt = self.testvector.formats[index.column()]
+            value = self.testvector.value(index.row(), index.column())
+            return (fmt, value)
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return self.text(index.row(), index.column())
+        return QtCore.QVariant()
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        """Set cell to hex string (edit role) or int (user role), the edit
+        is recorded in the journal."""
+        if not index.isValid() or self.journal is None:
+            return False
+        row, col = index.row(), index.column()
+        try:
+            if role == QtCore.Qt.EditRole:
+                value = int(value.strip() or "0", 16)
+            elif role != QtCore.Qt.UserRole:
+                return False
+            edit = self.journal.set(row, col, value)
+        except ValueError as exception:
+            self.editFailed.emit(str(exception))
+            return False
+        if edit:
+            self.updateCell(row, col)
+        return True
+
+    def updateCell(self, row, col):
+        """Update cell after its value changed."""
+        self.textCache.pop((col, row // self.ChunkSize), None)
+        index = self.index(row, col)
+        self.dataChanged.emit(index, index)
+        self.edited.emit(row, col)
+
+    def headerData(self, col, orientation, role):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return QtCore.QVariant(self.testvector.formats[col].label())
+        if orientation == QtCore.Qt.Vertical and role == QtCore.Qt.DisplayRole:
+            return QtCore.QVariant(col + 1)
+        return QtCore.QVariant()
+
+class DiffTableModel(DataTableModel):
+    """Table model showing the reference test vector of a diff, mismatching
+    cells provide a background color."""
+
+    MismatchColor = QtGui.QColor("#f9b2b2")
+
+    def __init__(self, diff, parent=None, *args):
+        super(DiffTableModel, self).__init__(diff.reference, parent, *args)
+        self.diff = diff
+        self.fetched = diff.rows
+
+    def testvectorAt(self, row):
+        """Returns reference or (for rows not present in reference) compared
+        test vector."""
+        if row < len(self.testvector):
+            return self.testvector
+        return self.diff.other
+
+    def text(self, row, col):
+        if row < len(self.testvector):
+            return super(DiffTableModel, self).text(row, col)
+        return self.diff.other.formatRange(col, row, row + 1)[0]
+
+    def background(self, row, col):
+        return self.MismatchColor if self.diff.mask[row, col] else None
+
+    def data(self, index, role):
+        if not index.isValid():
+            return QtCore.QVariant()
+        row, col = index.row(), index.column()
+        if role == QtCore.Qt.UserRole:
+            testvector = self.testvectorAt(row)
+            return (testvector.formats[col], testvector.value(row, col))
+        if role == QtCore.Qt.DisplayRole:
+            return self.text(row, col)
+        if role == QtCore.Qt.BackgroundRole:
+            return self.background(row, col) or QtCore.QVariant()
+        return QtCore.QVariant()
+
+# -----------------------------------------------------------------------------
+#  Filter proxy model
+# -----------------------------------------------------------------------------
+
+class FilterProxyModel(QtCore.QAbstractProxyModel):
+    """Proxy model showing the rows of the source model selected by a boolean
+    row mask, rows are mapped by index arrays instead of per row callbacks."""
+
+    def __init__(self, mask, parent=None):
+        super(FilterProxyModel, self).__init__(parent)
+        self.rows = np.flatnonzero(mask)
+
+    def setSourceModel(self, model):
+        super(FilterProxyModel, self).setSourceModel(model)
+        model.dataChanged.connect(self.onSourceDataChanged)
+
+    def onSourceDataChanged(self, topLeft, bottomRight, roles=[]):
+        first = int(np.searchsorted(self.rows, topLeft.row()))
+        last = int(np.searchsorted(self.rows, bottomRight.row(), 'right')) - 1
+        if first <= last:
+            self.dataChanged.emit(self.index(first, topLeft.column()), self.index(last, bottomRight.column()), roles)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return self.sourceModel().columnCount(QtCore.QModelIndex())
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if parent.isValid() or not 0 <= row < len(self.rows) or not 0 <= column < self.columnCount():
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        if index is None:
+            return super(FilterProxyModel, self).parent()
+        return QtCore.QModelIndex()
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self.sourceModel().index(int(self.rows[index.row()]), index.column())
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        row = int(np.searchsorted(self.rows, index.row()))
+        if row >= len(self.rows) or self.rows[row] != index.row():
+            return QtCore.QModelIndex()
+        return self.createIndex(row, index.column())
+
+    def text(self, row, col):
+        return self.sourceModel().text(int(self.rows[row]), col)
+
+    def headerData(self, section, orientation, role):
+        if orientation == QtCore.Qt.Vertical:
+            section = int(self.rows[section])
+        return self.sourceModel().headerData(section, orientation, role)
+
+# -----------------------------------------------------------------------------
+#  Main routine
+# -----------------------------------------------------------------------------
+
+def run(args):
+    """Run the application for parsed command line arguments, see
+    viewer.parse_args(). Files are opened once the main window is shown."""
+
+    # Instrument before creating any widgets.
+    if args.profile:
+        timing.enable()
+
+    cache = None if args.no_cache else TestVectorCache()
+    if args.clear_cache:
+        TestVectorCache().clear()
+
+    # Create application and main window.
+    app = QtWidgets.QApplication(sys.argv)
+    window = MainWindow()
+    window.lazy = args.lazy
+    window.sparse = not args.dense
+    window.cache = cache
+    if args.shared:
+        window.shared = SharedStore()
+        window.shared.collect()
+    window.documentManager.budget = args.memory_budget * 1024 ** 2
+    window.show()
+    app.processEvents()
+
+    # Open files given as command line arguments from the event loop.
+    def openFiles():
+        window.loadDocuments(args.filename)
+        if args.diff:
+            window.loadDiff(*args.diff)
+    QtCore.QTimer.singleShot(0, openFiles)
+
+    # Workaround for CTRL+C termination
+
+    # Terminate application on SIG_INT signal.
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    # Run timer once to catch SIG_INT signals.
+    timer = QtCore.QTimer()
+    timer.start(500)
+    timer.timeout.connect(lambda: None)
+
+    # Run execution loop.
+    result = app.exec_()
+    if args.profile:
+        timing.recorder.dump(args.profile)
+    return result
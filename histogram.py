@@ -0,0 +1,217 @@
+import collections
+
+import numpy as np
+
+import timing
+
+# -----------------------------------------------------------------------------
+#  Attribute statistics
+# -----------------------------------------------------------------------------
+
+# Histograms have at most 2 ** BinBits bins, wider attributes are binned.
+BinBits = 7
+
+class AttributeSummary(collections.namedtuple('AttributeSummary', 'name count minimum maximum mean histogram binwidth')):
+    """Statistics of an attribute over the non-empty cells of a column,
+    histogram[i] counts values from i * binwidth to (i + 1) * binwidth
+    (exclusive). Minimum, maximum and mean are None without cells."""
+
+class ColumnSummary(collections.namedtuple('ColumnSummary', 'col label count attributes')):
+    """Number of non-empty cells of a column and list of AttributeSummary."""
+
+class FormatGroup:
+    """Columns (object slots) of one format, statistics of all attributes of
+    all slots are computed in one vectorized pass over a range of rows.
+
+    Statistics of a range are a tuple (count, minimum, maximum, total,
+    histogram) of arrays of shape (slots,), (slots, attributes) and (slots,
+    bins), bins of all attributes concatenated. Results of blocks are kept
+    in arrays with a leading axis of blocks.
+    """
+
+    def __init__(self, formats, cols):
+        fmt = self.fmt = formats[cols[0]]
+        self.cols = cols
+        self.labels = [formats[col].label() for col in cols]
+        shifts = [max(0, attr.bitwidth - BinBits) for attr in fmt.attributes]
+        self.bins = [1 << (attr.bitwidth - shift) for attr, shift in zip(fmt.attributes, shifts)]
+        self.shifts = np.array(shifts, dtype=np.uint64)
+        self.offsets = np.cumsum([0] + self.bins[:-1]).astype(np.uint64)
+        self.size = sum(self.bins)
+        self.blocks = self.empty(0)
+
+    def empty(self, count):
+        slots, attributes = len(self.cols), len(self.fmt.attributes)
+        return (
+            np.zeros((count, slots), dtype=np.int64),
+            np.full((count, slots, attributes), np.iinfo(np.uint64).max, dtype=np.uint64),
+            np.zeros((count, slots, attributes), dtype=np.uint64),
+            np.zeros((count, slots, attributes), dtype=np.float64),
+            np.zeros((count, slots, self.size), dtype=np.int32),
+        )
+
+    def resize(self, blocks):
+        """Keep results of the first blocks, further blocks are empty."""
+        current = len(self.blocks[0])
+        if blocks <= current:
+            self.blocks = tuple(array[:blocks] for array in self.blocks)
+        else:
+            self.blocks = tuple(np.concatenate((array, extra)) for array, extra in zip(self.blocks, self.empty(blocks - current)))
+
+    def memoryUsage(self):
+        return sum(array.nbytes for array in self.blocks)
+
+    def compute(self, columns):
+        """Returns statistics of a range of rows, columns is a dict of column
+        index to array of its values."""
+        slots = len(self.cols)
+        # Slot major order, values of a slot are contiguous for reduceat.
+        columns = np.stack([columns[col] for col in self.cols])
+        mask = columns != 0
+        count = mask.sum(axis=1)
+        values = self.fmt.decodeArray(columns[mask])
+        _, minimum, maximum, total, _ = (array[0] for array in self.empty(1))
+        occupied = np.flatnonzero(count)
+        if len(occupied):
+            offsets = (np.cumsum(count) - count)[occupied]
+            minimum[occupied] = np.minimum.reduceat(values, offsets, axis=0)
+            maximum[occupied] = np.maximum.reduceat(values, offsets, axis=0)
+            total[occupied] = np.add.reduceat(values, offsets, axis=0)
+        slot = np.repeat(np.arange(slots, dtype=np.uint64), count)
+        index = (values >> self.shifts) + self.offsets + slot[:, None] * np.uint64(self.size)
+        histogram = np.bincount(index.ravel(), minlength=slots * self.size).reshape(slots, self.size)
+        return count, minimum, maximum, total, histogram
+
+    def store(self, block, result):
+        for array, values in zip(self.blocks, result):
+            array[block] = values
+
+    def reduce(self, first, last):
+        """Returns statistics of blocks first to last (exclusive)."""
+        count, minimum, maximum, total, histogram = (array[first:last] for array in self.blocks)
+        return (
+            count.sum(axis=0),
+            minimum.min(axis=0, initial=np.iinfo(np.uint64).max),
+            maximum.max(axis=0, initial=0),
+            total.sum(axis=0),
+            histogram.sum(axis=0, dtype=np.int64),
+        )
+
+    @staticmethod
+    def merge(a, b):
+        return (a[0] + b[0], np.minimum(a[1], b[1]), np.maximum(a[2], b[2]), a[3] + b[3], a[4] + b[4])
+
+    def summarize(self, result):
+        """Returns list of ColumnSummary for statistics of a range."""
+        count, minimum, maximum, total, histogram = result
+        summaries = []
+        for slot, col in enumerate(self.cols):
+            n = int(count[slot])
+            attributes = []
+            for i, attr in enumerate(self.fmt.attributes):
+                offset, bins = int(self.offsets[i]), self.bins[i]
+                attributes.append(AttributeSummary(
+                    attr.name, n,
+                    int(minimum[slot, i]) if n else None,
+                    int(maximum[slot, i]) if n else None,
+                    float(total[slot, i]) / n if n else None,
+                    histogram[slot, offset:offset + bins],
+                    1 << int(self.shifts[i]),
+                ))
+            summaries.append(ColumnSummary(col, self.labels[slot], n, attributes))
+        return summaries
+
+class AttributeStatistics:
+    """Count, minimum, maximum, mean and histogram of every attribute of
+    every object slot of a test vector, over non-empty cells. Bit vector
+    formats and formats without attributes are not covered.
+
+    Rows are summarized in blocks of blocksize rows, kept until rows of the
+    block change, so loading, live updates and cell edits recompute only the
+    affected blocks. Ranges are combined from complete blocks and the rows
+    at their edges, results are cached until the test vector changes.
+    """
+
+    blocksize = 65536
+    cachesize = 16
+
+    def __init__(self, testvector):
+        self.testvector = testvector
+        groups = collections.OrderedDict()
+        for col, fmt in enumerate(testvector.formats):
+            if fmt.attributes and not fmt.bitvector:
+                groups.setdefault(type(fmt), []).append(col)
+        self.groups = [FormatGroup(testvector.formats, cols) for cols in groups.values()]
+        self.cols = [col for cols in groups.values() for col in cols]
+        self.clear()
+
+    def clear(self):
+        self.rows = 0
+        self.valid = np.zeros(0, dtype=bool)
+        self.results = collections.OrderedDict()
+        for group in self.groups:
+            group.resize(0)
+
+    def memoryUsage(self):
+        return sum(group.memoryUsage() for group in self.groups)
+
+    def update(self, start=0, stop=None):
+        """Invalidate results for rows changed or appended from row start on,
+        or only for rows start to stop (exclusive) if given."""
+        self.results.clear()
+        first = start // self.blocksize
+        last = len(self.valid) if stop is None else -(-stop // self.blocksize)
+        self.valid[first:last] = False
+
+    @timing.timed()
+    def summarize(self, start=0, stop=None):
+        """Returns list of ColumnSummary (ordered by column) for rows start to
+        stop (exclusive), all rows by default."""
+        rows = len(self.testvector)
+        if rows != self.rows:
+            self.update(min(rows, self.rows))
+            self.rows = rows
+        stop = rows if stop is None else min(stop, rows)
+        start = min(start, stop)
+        key = (start, stop)
+        if key in self.results:
+            self.results.move_to_end(key)
+            return self.results[key]
+        # Complete blocks within the range, rows outside are computed directly.
+        first = -(-start // self.blocksize)
+        last = max(first, stop // self.blocksize)
+        self.prepare(first, last)
+        results = [group.reduce(first, last) for group in self.groups]
+        edges = ((start, min(stop, first * self.blocksize)), (max(start, last * self.blocksize), stop)) if first < last else ((start, stop),)
+        for low, high in edges:
+            if low < high:
+                results = [group.merge(result, partial) for group, result, partial in zip(self.groups, results, self.compute(low, high))]
+        summaries = []
+        for group, result in zip(self.groups, results):
+            summaries.extend(group.summarize(result))
+        summaries.sort(key=lambda summary: summary.col)
+        self.results[key] = summaries
+        if len(self.results) > self.cachesize:
+            self.results.popitem(last=False)
+        return summaries
+
+    def prepare(self, first, last):
+        """Compute blocks first to last (exclusive) not computed so far."""
+        blocks = self.rows // self.blocksize
+        if len(self.valid) != blocks:
+            self.valid = np.concatenate((self.valid[:blocks], np.zeros(max(0, blocks - len(self.valid)), dtype=bool)))
+            for group in self.groups:
+                group.resize(blocks)
+        for block in range(first, last):
+            if self.valid[block]:
+                continue
+            start = block * self.blocksize
+            for group, result in zip(self.groups, self.compute(start, start + self.blocksize)):
+                group.store(block, result)
+            self.valid[block] = True
+
+    def compute(self, start, stop):
+        """Returns list of statistics of every group for rows start to stop
+        (exclusive), reading the rows once."""
+        columns = dict(zip(self.cols, self.testvector.columnRange(self.cols, start, stop)))
+        return [group.compute(columns) for group in self.groups]
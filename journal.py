@@ -0,0 +1,300 @@
+import collections
+import mmap
+import os
+import shutil
+import tempfile
+import zlib
+
+from testvector import LazyTestVector, lineIndex
+
+# -----------------------------------------------------------------------------
+#  Edit journal
+# -----------------------------------------------------------------------------
+
+class Edit(collections.namedtuple('Edit', 'row col old new')):
+    """Single cell edit, values are Python ints."""
+
+class EditJournal:
+    """Undo/redo journal of cell edits of a test vector.
+
+    Values as read from the file are remembered for every edited cell, so
+    the journal knows which cells differ from the file (also after undoing
+    past the last save) and save() can verify lines before replacing them.
+    """
+
+    def __init__(self, testvector):
+        self.testvector = testvector
+        self.undoStack = []
+        self.redoStack = []
+        self.original = {} # (row, col) to value in file
+
+    def apply(self, row, col, value):
+        self.original.setdefault((row, col), self.testvector.value(row, col))
+        self.testvector.setValue(row, col, value)
+
+    def set(self, row, col, value):
+        """Set value of a cell, returns the edit or None if the value did not
+        change. Raises a ValueError if the value exceeds the format width."""
+        old = self.testvector.value(row, col)
+        if value == old:
+            return None
+        self.apply(row, col, value)
+        edit = Edit(row, col, old, value)
+        self.undoStack.append(edit)
+        self.redoStack = []
+        return edit
+
+    def canUndo(self):
+        return bool(self.undoStack)
+
+    def canRedo(self):
+        return bool(self.redoStack)
+
+    def undo(self):
+        """Revert the last edit, returns it or None."""
+        if not self.undoStack:
+            return None
+        edit = self.undoStack.pop()
+        self.apply(edit.row, edit.col, edit.old)
+        self.redoStack.append(edit)
+        return edit
+
+    def redo(self):
+        """Apply the last reverted edit again, returns it or None."""
+        if not self.redoStack:
+            return None
+        edit = self.redoStack.pop()
+        self.apply(edit.row, edit.col, edit.new)
+        self.undoStack.append(edit)
+        return edit
+
+    def changes(self):
+        """Returns dict of cells differing from the file, (row, col) to
+        value in file."""
+        return {cell: value for cell, value in self.original.items() if self.testvector.value(*cell) != value}
+
+    def isModified(self):
+        return bool(self.changes())
+
+    def markSaved(self):
+        """Current values are in the file now, the undo history is kept."""
+        self.original = {}
+
+# -----------------------------------------------------------------------------
+#  Saving edits
+# -----------------------------------------------------------------------------
+
+class SaveError(ValueError): pass
+
+def journalPath(filename):
+    """Returns path of the write-ahead journal of a file."""
+    directory, name = os.path.split(os.path.abspath(filename))
+    return os.path.join(directory, ".{}.tvjournal".format(name))
+
+JournalMagic = b"TVJ1"
+
+def writeJournal(filename, patches):
+    """Write patches (offset, bytes) to the write-ahead journal, the record
+    ends with a CRC so incomplete journals are detected."""
+    data = bytearray(JournalMagic)
+    for offset, chunk in patches:
+        data += offset.to_bytes(8, 'little') + len(chunk).to_bytes(4, 'little') + chunk
+    data += zlib.crc32(data).to_bytes(4, 'little')
+    with open(journalPath(filename), 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+def readJournal(filename):
+    """Returns patches of a complete journal or None."""
+    try:
+        with open(journalPath(filename), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < 8 or not data.startswith(JournalMagic) or zlib.crc32(data[:-4]) != int.from_bytes(data[-4:], 'little'):
+        return None
+    patches = []
+    pos = len(JournalMagic)
+    while pos < len(data) - 4:
+        offset = int.from_bytes(data[pos:pos + 8], 'little')
+        size = int.from_bytes(data[pos + 8:pos + 12], 'little')
+        patches.append((offset, data[pos + 12:pos + 12 + size]))
+        pos += 12 + size
+    return patches
+
+def applyPatches(filename, patches):
+    with open(filename, 'r+b') as f:
+        for offset, chunk in patches:
+            f.seek(offset)
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+
+def recover(filename):
+    """Complete an interrupted in-place save of file, returns True if a
+    journal was replayed. Incomplete journals are discarded, as the file was
+    not modified before the journal was complete."""
+    path = journalPath(filename)
+    if not os.path.exists(path):
+        return False
+    patches = readJournal(filename)
+    if patches is not None:
+        applyPatches(filename, patches)
+    os.remove(path)
+    return patches is not None
+
+def locateLines(buffer, testvector, rows):
+    """Returns dict of row to (start, end) offsets of its line. Lazy test
+    vectors provide a line index, else lines of fixed length are assumed
+    (to be verified by the caller)."""
+    if isinstance(testvector, LazyTestVector):
+        return {row: (int(testvector.offsets[row]), int(testvector.ends[row])) for row in rows}
+    length = buffer.find(b"\n") + 1
+    spans = {}
+    for row in rows:
+        start = row * length
+        end = start + length - 1
+        if length and end < len(buffer) and buffer[end:end + 1] == b"\n":
+            spans[row] = (start, end)
+    return spans
+
+def scanLines(buffer, rows):
+    """Returns dict of row to (start, end) offsets of its line, scanning
+    the whole buffer."""
+    offsets, ends = lineIndex(buffer)
+    return {row: (int(offsets[row]), int(ends[row])) for row in rows if row < len(offsets)}
+
+def tokenSpans(line):
+    """Returns list of (start, stop) offsets of whitespace separated tokens."""
+    spans = []
+    pos = 0
+    for token in line.split():
+        pos = line.index(token, pos)
+        spans.append((pos, pos + len(token)))
+        pos += len(token)
+    return spans
+
+def patchLine(line, testvector, journal, row, cols, bx=None):
+    """Returns line with values of cols replaced, or None if the line does
+    not hold the values (and BX, if given) the row was read from."""
+    spans = tokenSpans(line)
+    if len(spans) != len(testvector.formats) + 1:
+        return None
+    tokens = [line[start:stop] for start, stop in spans]
+    try:
+        if bx is not None and int(tokens[0]) != bx:
+            return None
+        for col in range(len(testvector.formats)):
+            expected = journal.original.get((row, col))
+            if expected is None:
+                expected = testvector.value(row, col)
+            if int(tokens[col + 1], 16) != expected:
+                return None
+    except ValueError:
+        return None
+    result = bytearray(line)
+    for col in sorted(cols, reverse=True):
+        start, stop = spans[col + 1]
+        text = testvector.formats[col].format(testvector.value(row, col))
+        result[start:stop] = text.rjust(stop - start, '0').encode('ascii')
+    return bytes(result)
+
+def linePatches(buffer, testvector, journal, rows, spans):
+    """Returns sorted list of (start, end, line) tuples replacing the lines
+    of rows, or None if any line is missing or does not match."""
+    lazy = isinstance(testvector, LazyTestVector)
+    patches = []
+    for row in sorted(rows):
+        if row not in spans:
+            return None
+        start, end = spans[row]
+        bx = None if lazy else int(testvector.bx[row])
+        patched = patchLine(buffer[start:end], testvector, journal, row, rows[row], bx)
+        if patched is None:
+            return None
+        patches.append((start, end, patched))
+    return patches
+
+def save(filename, testvector, journal, copysize=64 * 1024 * 1024):
+    """Write edited cells back to file. Only the lines of modified rows are
+    touched: if their length does not change they are overwritten in place
+    (protected by a write-ahead journal), else the file is rewritten to a
+    temporary file streaming the unchanged parts and renamed. Returns
+    'in-place', 'rewrite' or None if there was nothing to save. Raises a
+    SaveError if the file does not match the test vector (e.g. it changed
+    on disk or rows were skipped reading it)."""
+    changes = journal.changes()
+    if not changes:
+        journal.markSaved()
+        return None
+    rows = collections.defaultdict(set)
+    for row, col in changes:
+        rows[row].add(col)
+    with open(filename, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            raise SaveError("file is empty")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        patches = linePatches(buffer, testvector, journal, rows, locateLines(buffer, testvector, rows))
+        if patches is None and not isinstance(testvector, LazyTestVector):
+            patches = linePatches(buffer, testvector, journal, rows, scanLines(buffer, rows))
+        if patches is None:
+            raise SaveError("lines of edited rows do not match, the file changed on disk or has invalid lines")
+        if all(end - start == len(patched) for start, end, patched in patches):
+            inplace = [(start, patched) for start, end, patched in patches]
+            writeJournal(filename, inplace)
+            applyPatches(filename, inplace)
+            os.remove(journalPath(filename))
+            mode = 'in-place'
+        else:
+            rewrite(filename, buffer, patches, copysize)
+            mode = 'rewrite'
+    finally:
+        buffer.close()
+    journal.markSaved()
+    return mode
+
+def rewrite(filename, buffer, patches, copysize):
+    """Atomically replace file by buffer with patches (start, end, bytes)
+    applied, unchanged parts are copied in blocks."""
+    directory, name = os.path.split(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(prefix=".{}.".format(name), dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pos = 0
+            for start, end, patched in patches:
+                for offset in range(pos, start, copysize):
+                    f.write(buffer[offset:min(offset + copysize, start)])
+                f.write(patched)
+                pos = end
+            for offset in range(pos, len(buffer), copysize):
+                f.write(buffer[offset:offset + copysize])
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(filename, tmp)
+        os.replace(tmp, filename)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def saveAs(filename, testvector, chunksize=65536):
+    """Write all rows of test vector to a new file (atomically replacing an
+    existing file)."""
+    directory, name = os.path.split(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(prefix=".{}.".format(name), dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            testvector.write(f, chunksize)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o666 & ~currentUmask())
+        os.replace(tmp, filename)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def currentUmask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
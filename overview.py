@@ -0,0 +1,143 @@
+import numpy as np
+
+from testvector import popcount
+
+# -----------------------------------------------------------------------------
+#  Overview summaries
+# -----------------------------------------------------------------------------
+
+class OverviewLevel:
+    """Summary of buckets of rows of every column: number of non-empty rows
+    and minimum/maximum number of set bits. Arrays have shape (buckets,
+    columns)."""
+
+    def __init__(self, columns):
+        self.count = np.zeros((0, columns), dtype=np.int32)
+        self.minimum = np.zeros((0, columns), dtype=np.uint16)
+        self.maximum = np.zeros((0, columns), dtype=np.uint16)
+
+    def __len__(self):
+        return len(self.count)
+
+    def assign(self, first, count, minimum, maximum):
+        """Replace buckets from bucket first on."""
+        self.count = np.concatenate((self.count[:first], count))
+        self.minimum = np.concatenate((self.minimum[:first], minimum))
+        self.maximum = np.concatenate((self.maximum[:first], maximum))
+
+class OverviewSummary:
+    """Multi-resolution occupancy summary of a test vector.
+
+    Level 0 holds buckets of bucketsize rows, every further level merges two
+    buckets of the previous level. Appending rows recomputes only the trailing
+    buckets of every level, so the summary can follow background loading and
+    live reloading without scanning all rows again.
+    """
+
+    bucketsize = 16
+
+    def __init__(self, testvector):
+        self.testvector = testvector
+        self.columns = len(testvector.formats)
+        self.widths = np.array([fmt.width for fmt in testvector.formats], dtype=np.float32)
+        self.clear()
+
+    def clear(self):
+        self.rows = 0
+        self.levels = [OverviewLevel(self.columns)]
+
+    def memoryUsage(self):
+        return sum(level.count.nbytes + level.minimum.nbytes + level.maximum.nbytes for level in self.levels)
+
+    def bits(self, start, stop):
+        """Returns number of set bits of every cell of rows start to stop,
+        array of shape (rows, columns)."""
+        bits = np.zeros((stop - start, self.columns), dtype=np.uint16)
+        for col in range(self.columns):
+            counts = popcount(self.testvector.column(col, start, stop))
+            bits[:, col] = counts.sum(axis=1) if counts.ndim > 1 else counts
+        return bits
+
+    def update(self, start=0, stop=None):
+        """Update summary for rows changed or appended from row start on, or
+        only for rows start to stop (exclusive) if given and no rows were
+        appended, e.g. after editing cells."""
+        rows = len(self.testvector)
+        if stop is not None and rows == self.rows:
+            self.updateRange(start, min(stop, rows))
+            return
+        first = min(start, self.rows) // self.bucketsize
+        bits = self.bits(first * self.bucketsize, rows)
+        if len(bits):
+            offsets = np.arange(0, len(bits), self.bucketsize)
+            count = np.add.reduceat(bits != 0, offsets, axis=0, dtype=np.int32)
+            minimum = np.minimum.reduceat(bits, offsets, axis=0)
+            maximum = np.maximum.reduceat(bits, offsets, axis=0)
+        else:
+            count = np.zeros((0, self.columns), dtype=np.int32)
+            minimum = maximum = np.zeros((0, self.columns), dtype=np.uint16)
+        self.levels[0].assign(first, count, minimum, maximum)
+        self.rows = rows
+        # Merge pairs of buckets into the next coarser level.
+        level = 0
+        while len(self.levels[level]) > 1:
+            child = self.levels[level]
+            if level + 1 == len(self.levels):
+                self.levels.append(OverviewLevel(self.columns))
+            first //= 2
+            offsets = np.arange(first * 2, len(child), 2)
+            self.levels[level + 1].assign(first,
+                np.add.reduceat(child.count, offsets, axis=0),
+                np.minimum.reduceat(child.minimum, offsets, axis=0),
+                np.maximum.reduceat(child.maximum, offsets, axis=0))
+            level += 1
+        del self.levels[level + 1:]
+
+    def updateRange(self, start, stop):
+        """Recompute buckets covering rows start to stop and their parents."""
+        if start >= stop:
+            return
+        first = start // self.bucketsize
+        last = -(-stop // self.bucketsize)
+        bits = self.bits(first * self.bucketsize, min(last * self.bucketsize, self.rows))
+        offsets = np.arange(0, len(bits), self.bucketsize)
+        summary = self.levels[0]
+        summary.count[first:last] = np.add.reduceat(bits != 0, offsets, axis=0, dtype=np.int32)
+        summary.minimum[first:last] = np.minimum.reduceat(bits, offsets, axis=0)
+        summary.maximum[first:last] = np.maximum.reduceat(bits, offsets, axis=0)
+        for level in range(1, len(self.levels)):
+            child = self.levels[level - 1]
+            first, last = first // 2, -(-last // 2)
+            low, high = first * 2, min(last * 2, len(child))
+            offsets = np.arange(0, high - low, 2)
+            summary = self.levels[level]
+            summary.count[first:last] = np.add.reduceat(child.count[low:high], offsets, axis=0)
+            summary.minimum[first:last] = np.minimum.reduceat(child.minimum[low:high], offsets, axis=0)
+            summary.maximum[first:last] = np.maximum.reduceat(child.maximum[low:high], offsets, axis=0)
+
+    def bucketSize(self, level):
+        return self.bucketsize << level
+
+    def summarize(self, bins):
+        """Returns (occupancy, minimum, maximum) arrays of shape (bins,
+        columns) over all rows. Occupancy is the fraction of non-empty rows,
+        minimum and maximum are fractions of bits set."""
+        if not self.rows:
+            empty = np.zeros((0, self.columns), dtype=np.float32)
+            return empty, empty, empty
+        # Use the coarsest level still providing a bucket per bin.
+        level = 0
+        while level + 1 < len(self.levels) and len(self.levels[level + 1]) >= bins:
+            level += 1
+        summary = self.levels[level]
+        size = self.bucketSize(level)
+        buckets = len(summary)
+        bins = min(bins, buckets)
+        offsets = (np.arange(bins) * buckets) // bins
+        count = np.add.reduceat(summary.count, offsets, axis=0)
+        minimum = np.minimum.reduceat(summary.minimum, offsets, axis=0)
+        maximum = np.maximum.reduceat(summary.maximum, offsets, axis=0)
+        starts = offsets * size
+        stops = np.minimum(np.append(offsets[1:], buckets) * size, self.rows)
+        occupancy = count / (stops - starts)[:, None].astype(np.float32)
+        return occupancy, np.minimum(minimum / self.widths, 1), np.minimum(maximum / self.widths, 1)
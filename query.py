@@ -0,0 +1,325 @@
+import re
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+#  Query language
+# -----------------------------------------------------------------------------
+#
+# Expressions select BX (rows) of a test vector, e.g.
+#
+#   muon[*].pt > 40 and muon[*].quality >= 12
+#   eg[0].iso == 1 and algorithms.123
+#   not (jet[*].et > 0x100) or bx < 10
+#
+# References are <name>[<index>].<attribute>, the index can be * to match any
+# object slot. Comparisons of * references are evaluated per slot and combined
+# slot wise by and/or, so the example above selects BX where the same muon has
+# pt > 40 and quality >= 12. Formats with a single instance may omit the index,
+# references without attribute evaluate to the raw value (non-zero is true).
+# not applies to the whole BX, so not (jet[*].et > 0x100) selects BX without
+# any such jet. Numbers are decimal (leading zeros allowed), hex (0x) or
+# binary (0b), below 2**64.
+# -----------------------------------------------------------------------------
+
+class QueryError(ValueError): pass
+
+TokenPattern = re.compile(r"""
+    \s*(?:
+        (?P<number>0[xX][0-9a-fA-F]+|0[bB][01]+|\d+)|
+        (?P<name>[A-Za-z_][A-Za-z0-9_]*)|
+        (?P<op>==|!=|<=|>=|<|>|\(|\)|\[|\]|\.|\*)
+    )""", re.VERBOSE)
+
+Keywords = ('and', 'or', 'not')
+
+Comparisons = {
+    '==': np.equal,
+    '!=': np.not_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+}
+
+def tokenize(expression):
+    """Returns list of (kind, value, position) tuples."""
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = TokenPattern.match(expression, pos)
+        if not match:
+            pos += len(expression[pos:]) - len(expression[pos:].lstrip())
+            raise QueryError("invalid character at position {}: {!r}".format(pos + 1, expression[pos]))
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind), match.start(kind)))
+        pos = match.end()
+    tokens.append(('end', None, len(expression)))
+    return tokens
+
+def parseNumber(token):
+    """Returns value of a number token, decimal unless prefixed by 0x or 0b
+    (leading zeros are allowed, e.g. 010 is ten)."""
+    kind, value, pos = token
+    base = {'0x': 16, '0b': 2}.get(value[:2].lower(), 10)
+    try:
+        number = int(value, base)
+    except ValueError:
+        raise QueryError("invalid number at position {}: {}".format(pos + 1, value))
+    if number >= 1 << 64:
+        raise QueryError("number out of range at position {}: {}".format(pos + 1, value))
+    return number
+
+class Context:
+    """Evaluation context, caches columns decoded from the test vector."""
+
+    def __init__(self, testvector):
+        self.testvector = testvector
+        self.rows = len(testvector)
+        self.cache = {}
+
+    def slots(self, name):
+        """Returns list of column indices of format name."""
+        return [col for col, fmt in enumerate(self.testvector.formats) if fmt.name == name]
+
+    def value(self, col, attribute):
+        key = (col, attribute)
+        if key not in self.cache:
+            fmt = self.testvector.formats[col]
+            column = self.testvector.column(col)
+            if attribute is None:
+                if column.ndim > 1:
+                    values = column.any(axis=1)
+                else:
+                    values = column.astype(np.uint64)
+            else:
+                values = fmt.attributeMap[attribute].decode(column)
+            self.cache[key] = values
+        return self.cache[key]
+
+class Node:
+    def evaluate(self, context):
+        raise NotImplementedError()
+
+class Number(Node):
+    def __init__(self, value):
+        self.value = value
+    def evaluate(self, context):
+        return np.uint64(self.value)
+
+class Bx(Node):
+    def evaluate(self, context):
+        return context.testvector.bx
+
+class Reference(Node):
+    """Reference to raw value or attribute of one or all (*) object slots."""
+
+    def __init__(self, name, index, attribute, pos):
+        self.name = name
+        self.index = index
+        self.attribute = attribute
+        self.pos = pos
+
+    def evaluate(self, context):
+        slots = context.slots(self.name)
+        if not slots:
+            raise QueryError("unknown object at position {}: {}".format(self.pos + 1, self.name))
+        fmt = context.testvector.formats[slots[0]]
+        if self.attribute is not None and self.attribute not in fmt.attributeMap:
+            raise QueryError("unknown attribute at position {}: {}.{}".format(self.pos + 1, self.name, self.attribute))
+        index = self.index
+        if index is None and len(slots) == 1:
+            index = 0
+        if index is None or index == '*':
+            return np.stack([context.value(col, self.attribute) for col in slots], axis=1)
+        if not 0 <= index < len(slots):
+            raise QueryError("index out of range at position {}: {}[{}]".format(self.pos + 1, self.name, index))
+        return context.value(slots[index], self.attribute)
+
+def truth(values):
+    """Returns boolean array of a value."""
+    if values.dtype != bool:
+        values = values != 0
+    return values
+
+def reduce(values):
+    """Reduce per slot values to one value per row."""
+    values = truth(values)
+    if values.ndim > 1:
+        values = values.any(axis=1)
+    return values
+
+class Compare(Node):
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+    def evaluate(self, context):
+        left = self.left.evaluate(context)
+        right = self.right.evaluate(context)
+        if np.ndim(left) > 1 and np.ndim(right) > 1 and np.shape(left) != np.shape(right):
+            raise QueryError("cannot compare objects with different number of slots")
+        left, right = align(np.asarray(left), np.asarray(right))
+        if left.dtype.kind != 'u' or right.dtype.kind != 'u':
+            left, right = signed(left), signed(right)
+        return Comparisons[self.op](left, right)
+
+def signed(values):
+    """Returns values as int64 for comparison with signed values, numbers
+    exceeding int64 become infinity (compared as float)."""
+    if values.ndim == 0 and values.dtype.kind == 'u' and values > np.iinfo(np.int64).max:
+        return np.float64(np.inf)
+    return values.astype(np.int64)
+
+def align(left, right):
+    """Add slot axis to per row values compared to per slot values."""
+    if np.ndim(left) == 1 and np.ndim(right) == 2:
+        left = left[:, None]
+    if np.ndim(right) == 1 and np.ndim(left) == 2:
+        right = right[:, None]
+    return left, right
+
+class Logical(Node):
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+    def evaluate(self, context):
+        left = truth(self.left.evaluate(context))
+        right = truth(self.right.evaluate(context))
+        # Per slot values of different objects are reduced first.
+        if left.ndim > 1 and right.ndim > 1 and left.shape != right.shape:
+            left, right = reduce(left), reduce(right)
+        left, right = align(left, right)
+        if self.op == 'and':
+            return left & right
+        return left | right
+
+class Not(Node):
+    def __init__(self, operand):
+        self.operand = operand
+    def evaluate(self, context):
+        return ~reduce(self.operand.evaluate(context))
+
+class Parser:
+    """Recursive descent parser building the expression tree."""
+
+    def __init__(self, expression):
+        self.tokens = tokenize(expression)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos]
+
+    def next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def accept(self, kind, value=None):
+        token = self.peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.pos += 1
+            return token
+        return None
+
+    def expect(self, kind, value=None):
+        token = self.accept(kind, value)
+        if not token:
+            self.error("expected {}".format(value or kind))
+        return token
+
+    def error(self, message):
+        kind, value, pos = self.peek()
+        found = "end of expression" if kind == 'end' else repr(value)
+        raise QueryError("{} at position {}, found {}".format(message, pos + 1, found))
+
+    def parse(self):
+        if self.peek()[0] == 'end':
+            self.error("empty expression")
+        node = self.parseOr()
+        self.expect('end')
+        return node
+
+    def parseOr(self):
+        node = self.parseAnd()
+        while self.accept('name', 'or'):
+            node = Logical('or', node, self.parseAnd())
+        return node
+
+    def parseAnd(self):
+        node = self.parseNot()
+        while self.accept('name', 'and'):
+            node = Logical('and', node, self.parseNot())
+        return node
+
+    def parseNot(self):
+        if self.accept('name', 'not'):
+            return Not(self.parseNot())
+        return self.parseCompare()
+
+    def parseCompare(self):
+        node = self.parseTerm()
+        token = self.peek()
+        if token[0] == 'op' and token[1] in Comparisons:
+            self.next()
+            node = Compare(token[1], node, self.parseTerm())
+        return node
+
+    def parseTerm(self):
+        if self.accept('op', '('):
+            node = self.parseOr()
+            self.expect('op', ')')
+            return node
+        token = self.accept('number')
+        if token:
+            return Number(parseNumber(token))
+        token = self.accept('name')
+        if not token or token[1] in Keywords:
+            if token:
+                self.pos -= 1
+            self.error("expected value")
+        name, pos = token[1], token[2]
+        if name == 'bx':
+            return Bx()
+        index = None
+        if self.accept('op', '['):
+            if self.accept('op', '*'):
+                index = '*'
+            else:
+                index = parseNumber(self.expect('number'))
+            self.expect('op', ']')
+        attribute = None
+        if self.accept('op', '.'):
+            token = self.accept('name') or self.accept('number')
+            if not token:
+                self.error("expected attribute")
+            # Bit attributes are named by decimal index, e.g. algorithms.007
+            attribute = str(parseNumber(token)) if token[0] == 'number' else token[1]
+        return Reference(name, index, attribute, pos)
+
+class Query:
+    """Compiled query expression, evaluate() returns a boolean row mask."""
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.node = Parser(expression).parse()
+
+    def evaluate(self, testvector):
+        values = self.node.evaluate(Context(testvector))
+        if np.ndim(values) == 0:
+            return np.full(len(testvector), bool(values))
+        return reduce(values)
+
+def compile(expression):
+    """Returns compiled query, raises QueryError on syntax errors."""
+    return Query(expression)
+
+def nextMatch(mask, row, backward=False):
+    """Returns next (or previous) matching row after row, or None."""
+    if backward:
+        rows = np.flatnonzero(mask[:max(0, row)])
+        return int(rows[-1]) if len(rows) else None
+    rows = np.flatnonzero(mask[row + 1:])
+    return int(rows[0]) + row + 1 if len(rows) else None
@@ -0,0 +1,81 @@
+import signal
+
+from testvector import TestVector, Diagnostics
+from cache import TestVectorCache
+import compressed
+import timing
+
+# -----------------------------------------------------------------------------
+#  Exceptions.
+# -----------------------------------------------------------------------------
+
+class FileReadError(RuntimeError): pass
+class NoSuchFileError(RuntimeError): pass
+class UnknownFileTypeError(RuntimeError): pass
+
+# -----------------------------------------------------------------------------
+#  Reading files
+# -----------------------------------------------------------------------------
+
+@timing.timed()
+def readTestVector(filename, cache=None, diagnostics=None):
+    """Returns test vector read from file (or cache) on the calling thread.
+    Problems are collected in diagnostics (if given) skipping invalid rows,
+    files are then parsed and not cached. Raises OSError, or ValueError on
+    invalid lines if diagnostics is None."""
+    if cache and diagnostics is None:
+        image = cache.load(filename)
+        if image is not None:
+            return image
+    image = TestVector()
+    with compressed.openFile(filename) as f:
+        image.read(f, diagnostics)
+    if diagnostics:
+        return image # do not cache files with problems
+    if cache:
+        try:
+            cache.store(filename, image)
+        except OSError:
+            pass
+    return image
+
+def initWorker():
+    """Leave handling of CTRL+C to the parent process."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def parseFile(task):
+    """Parse file in a worker process. The test vector is published to the
+    shared store (if enabled) and stored in the cache (or, for files with
+    problems or if both are disabled, in a handoff cache directory) to be
+    memory mapped by the GUI process, so columns are not sent through pipes.
+    Returns tuple of filename, directory holding the entry (None if storing
+    failed), diagnostics and error tuple (exception class name, message) or
+    None."""
+    filename, cache, handoff, shared = task
+    diagnostics = Diagnostics()
+    image = TestVector()
+    try:
+        key = shared.key(filename) if shared else None # identity before parsing
+        with compressed.openFile(filename) as f:
+            image.read(f, diagnostics)
+    except IOError:
+        return filename, None, None, ('FileReadError', filename)
+    except ValueError as exception:
+        return filename, None, None, ('UnknownFileTypeError', "{}: {}".format(filename, exception))
+    # Files with problems are not cached or shared, to report them on every load.
+    directory = None
+    for store in (shared, cache):
+        if store and not diagnostics:
+            try:
+                store.store(filename, image, key if store is shared else None)
+            except OSError:
+                continue
+            directory = directory or store.directory
+    if directory is None:
+        handoff = TestVectorCache(handoff, maxsize=float('inf'))
+        try:
+            handoff.store(filename, image)
+        except OSError:
+            return filename, None, diagnostics, None
+        directory = handoff.directory
+    return filename, directory, diagnostics, None
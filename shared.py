@@ -0,0 +1,220 @@
+import atexit
+import collections
+import contextlib
+import errno
+import itertools
+import os
+import re
+import shutil
+import tempfile
+import time
+import weakref
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None # no locking on Windows
+
+from cache import TestVectorCache
+
+# -----------------------------------------------------------------------------
+#  Shared test vector store
+# -----------------------------------------------------------------------------
+
+def defaultSharedDir():
+    """Returns default shared directory, can be set by TESTVECTOR_SHARED_DIR.
+    Uses /dev/shm (memory backed) where available."""
+    path = os.environ.get('TESTVECTOR_SHARED_DIR')
+    if path:
+        return path
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    user = os.getuid() if hasattr(os, 'getuid') else os.environ.get('USERNAME', 'user')
+    return os.path.join(base, 'testvector-editor-{}'.format(user))
+
+def isAlive(pid):
+    """Returns True if process pid exists (always on other than POSIX)."""
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+# Stores of this process, references are released on exit.
+Stores = weakref.WeakSet()
+
+@atexit.register
+def closeStores():
+    for store in list(Stores):
+        store.close()
+
+class SharedStore(TestVectorCache):
+    """Parsed test vectors published in memory for other documents and
+    processes, attached zero-copy (memory mapped copy-on-write).
+
+    Entries use the layout of TestVectorCache, keyed by file identity
+    (device, inode, size and mtime) instead of a content hash. Every process
+    holding an entry owns a file in its users directory, the entry is removed
+    once the last holder releases it. Holders of exited processes (or
+    entries never attached within grace seconds) are removed by collect().
+    Plain files are used instead of multiprocessing.shared_memory, as its
+    resource tracker unlinks segments on exit of any attaching process
+    (before Python 3.13).
+    """
+
+    version = 1
+    grace = 60.0 # seconds
+    entryPattern = re.compile(r'^\d+(-[0-9a-f]+){4}$')
+    reserve = 0.5 # fraction of free space to leave for others
+
+    serials = itertools.count()
+
+    def __init__(self, directory=None):
+        super(SharedStore, self).__init__(directory or defaultSharedDir(), maxsize=float('inf'))
+        self.holder = "{}-{}".format(os.getpid(), next(self.serials))
+        self.references = collections.Counter()
+        Stores.add(self)
+
+    def __getstate__(self):
+        # References are held per process, see reader.parseFile().
+        state = dict(self.__dict__)
+        state['references'] = collections.Counter()
+        state['holder'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.holder = "{}-{}".format(os.getpid(), next(self.serials))
+
+    def key(self, filename):
+        """Returns key of file identity, changes on every write."""
+        st = os.stat(filename)
+        return "{}-{:x}-{:x}-{:x}-{:x}".format(self.version, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    @contextlib.contextmanager
+    def locked(self):
+        """Context holding the lock of the store directory."""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'a') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def usersPath(self, key):
+        return os.path.join(self.path(key), 'users')
+
+    def users(self, key):
+        """Returns list of holders (pid-serial) of entry key."""
+        try:
+            return os.listdir(self.usersPath(key))
+        except OSError:
+            return []
+
+    def attach(self, filename):
+        """Returns tuple of key and test vector of the published file, or None.
+        The entry is held until release(key)."""
+        try:
+            key = self.key(filename)
+        except OSError:
+            return None
+        with self.locked():
+            if not os.path.isfile(os.path.join(self.path(key), 'meta.json')):
+                return None
+            self.acquire(key)
+        testvector = self.loadEntry(key)
+        if testvector is None:
+            self.release(key)
+            return None
+        return key, testvector
+
+    def acquire(self, key):
+        """Add a reference to entry key, call with the lock held."""
+        if not self.references[key]:
+            os.makedirs(self.usersPath(key), exist_ok=True)
+            open(os.path.join(self.usersPath(key), self.holder), 'w').close()
+        self.references[key] += 1
+
+    def release(self, key):
+        """Drop a reference to entry key, the entry is removed if it was the
+        last one. Mapped columns stay valid on POSIX."""
+        if not self.references[key]:
+            return
+        self.references[key] -= 1
+        if self.references[key]:
+            return
+        del self.references[key]
+        with self.locked():
+            try:
+                os.remove(os.path.join(self.usersPath(key), self.holder))
+            except OSError:
+                pass
+            if not self.users(key):
+                shutil.rmtree(self.path(key), ignore_errors=True)
+
+    def close(self):
+        """Release all references held."""
+        for key in list(self.references):
+            self.references[key] = 1
+            self.release(key)
+
+    def store(self, filename, testvector, key=None):
+        """Publish parsed test vector, without holding it (see attach()).
+        Raises OSError if the store lacks space. Existing entries are kept."""
+        key = key or self.key(filename)
+        if os.path.isfile(os.path.join(self.path(key), 'meta.json')):
+            return
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        size = testvector.bx.nbytes + sum(fmt.empty(1).nbytes for fmt in testvector.formats) * len(testvector)
+        if size > shutil.disk_usage(self.directory).free * self.reserve:
+            raise OSError(errno.ENOSPC, "not enough space to share {}".format(filename))
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=self.directory)
+        try:
+            self.writeEntry(tmp, filename, testvector)
+            with self.locked():
+                if os.path.isdir(self.path(key)):
+                    shutil.rmtree(tmp, ignore_errors=True)
+                else:
+                    os.rename(tmp, self.path(key))
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.collect()
+
+    def evict(self):
+        self.collect()
+
+    def collect(self):
+        """Remove holders of exited processes, entries without holders older
+        than grace seconds and stale temporary directories. Other files and
+        directories are never touched."""
+        if not os.path.isdir(self.directory):
+            return
+        now = time.time()
+        with self.locked():
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if not (self.entryPattern.match(name) or name.startswith('.tmp-')) or not os.path.isdir(path):
+                    continue # not created by the store
+                try:
+                    age = now - os.stat(path).st_mtime
+                except OSError:
+                    continue
+                if name.startswith('.tmp-'):
+                    if age > self.grace:
+                        shutil.rmtree(path, ignore_errors=True)
+                    continue
+                users = []
+                for user in self.users(name):
+                    pid = user.split('-')[0]
+                    if pid.isdigit() and not isAlive(int(pid)):
+                        try:
+                            os.remove(os.path.join(self.usersPath(name), user))
+                        except OSError:
+                            pass
+                    else:
+                        users.append(user)
+                if not users and age > self.grace:
+                    shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,45 @@
+import io
+import os
+import sys
+
+import pytest
+
+Root = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+sys.path.insert(0, Root)
+sys.path.insert(0, os.path.join(Root, 'benchmarks'))
+
+from generate import generate
+from testvector import TestVector
+
+def baselineRead(data):
+    """Reference line parser (the original TestVector.read), returns list of
+    (bx, values) tuples. Raises ValueError on invalid lines."""
+    formats = TestVector().formats
+    rows = []
+    for line in data.decode('ascii').splitlines():
+        items = line.strip().split()
+        if not items:
+            continue
+        bx = int(items.pop(0))
+        rows.append((bx, [int(items.pop(0), 16) for fmt in formats]))
+    return rows
+
+def rowsOf(testvector):
+    """Returns list of (bx, values) tuples of test vector."""
+    bx = testvector.bx # computed on access by lazy test vectors
+    return [(int(bx[row]), [testvector.value(row, col) for col in range(len(testvector.formats))])
+        for row in range(len(testvector))]
+
+@pytest.fixture(scope='session')
+def sample():
+    """Synthetic test vector file content (one orbit)."""
+    f = io.StringIO()
+    generate(f, orbits=1, seed=1)
+    return f.getvalue().encode('ascii')
+
+@pytest.fixture
+def sampleFile(tmp_path, sample):
+    filename = tmp_path / 'sample.txt'
+    filename.write_bytes(sample)
+    return str(filename)
@@ -0,0 +1,40 @@
+import io
+
+import numpy as np
+import pytest
+
+import testvector
+import tvtool
+
+@pytest.fixture(scope='module')
+def vector(sample):
+    vector = testvector.TestVector()
+    vector.read(io.BytesIO(sample))
+    return vector
+
+def bitsSet(vector, col, bit):
+    return np.array([row for row in range(len(vector)) if vector.value(row, col) >> bit & 1])
+
+def test_rows(vector):
+    col = vector.index('algorithms[0]')
+    index = vector.bitIndex(col)
+    for bit in (0, 63, 64, 511):
+        expected = bitsSet(vector, col, bit)
+        assert np.array_equal(index.rows(bit), expected)
+        assert index.count(bit) == len(expected)
+        assert np.array_equal(index.rows(bit, 100, 1000), expected[(expected >= 100) & (expected < 1000)])
+
+def test_bit_out_of_range(vector):
+    index = vector.bitIndex(vector.index('algorithms[0]'))
+    for bit in (-1, 512):
+        with pytest.raises(ValueError, match="bit {} out of range".format(bit)):
+            index.rows(bit)
+        with pytest.raises(ValueError, match="bit {} out of range".format(bit)):
+            index.count(bit)
+
+def test_tvtool_bit_out_of_range(sampleFile):
+    for bit in ('600', '-1'):
+        options = tvtool.parse_args(['bits', '--bit', bit, sampleFile])
+        filename, output, error, warning = tvtool.process((sampleFile, options))
+        assert output is None
+        assert error == "bit {} out of range, expected 0 to 511".format(bit)
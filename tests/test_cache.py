@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+
+import cache
+from conftest import rowsOf
+import testvector
+
+def load(filename):
+    vector = testvector.TestVector()
+    with open(filename, 'rb') as f:
+        vector.read(f)
+    return vector
+
+def setMtime(filename, mtime):
+    os.utime(filename, ns=(mtime, mtime))
+
+def test_store_load(tmp_path, sampleFile):
+    store = cache.TestVectorCache(str(tmp_path / 'cache'))
+    assert store.load(sampleFile) is None
+    vector = load(sampleFile)
+    store.store(sampleFile, vector)
+    assert store.contains(sampleFile)
+    cached = store.load(sampleFile)
+    assert rowsOf(cached) == rowsOf(vector)
+    assert (cached.offset, cached.checksum, cached.lines) == (vector.offset, vector.checksum, vector.lines)
+
+def test_key_invalidation(tmp_path, sampleFile, sample):
+    store = cache.TestVectorCache(str(tmp_path / 'cache'))
+    mtime = os.stat(sampleFile).st_mtime_ns
+    key = store.key(sampleFile)
+    store.store(sampleFile, load(sampleFile), key)
+    # Same size and mtime, different content.
+    with open(sampleFile, 'r+b') as f:
+        f.write(b'0001')
+    setMtime(sampleFile, mtime)
+    assert store.key(sampleFile) != key
+    assert store.load(sampleFile) is None
+    # Same content, different mtime.
+    with open(sampleFile, 'wb') as f:
+        f.write(sample)
+    setMtime(sampleFile, mtime)
+    assert store.key(sampleFile) == key
+    setMtime(sampleFile, mtime + 1)
+    assert store.key(sampleFile) != key
+    assert not store.contains(sampleFile)
+    # Appended lines change the size.
+    setMtime(sampleFile, mtime)
+    with open(sampleFile, 'ab') as f:
+        f.write(sample.splitlines(keepends=True)[0])
+    setMtime(sampleFile, mtime)
+    assert store.key(sampleFile) != key
+
+def test_key_of_path(tmp_path, sampleFile, sample):
+    store = cache.TestVectorCache(str(tmp_path / 'cache'))
+    copy = str(tmp_path / 'copy.txt')
+    with open(copy, 'wb') as f:
+        f.write(sample)
+    setMtime(copy, os.stat(sampleFile).st_mtime_ns)
+    assert store.key(copy) != store.key(sampleFile)
+
+def test_clear_keeps_other_files(tmp_path, sampleFile):
+    directory = tmp_path / 'cache'
+    store = cache.TestVectorCache(str(directory))
+    store.store(sampleFile, load(sampleFile))
+    index = testvector.LazyTestVector()
+    index.open(sampleFile, store.indexPath(sampleFile))
+    index.close()
+    (directory / '.tmp-interrupted').mkdir()
+    (directory / 'notes.txt').write_text("keep")
+    (directory / 'project').mkdir()
+    (directory / 'project' / 'meta.json').write_text("{}")
+    assert len(store.entries()) == 2
+    store.clear()
+    assert store.entries() == []
+    assert sorted(os.listdir(directory)) == ['notes.txt', 'project']
+    assert store.load(sampleFile) is None
+
+def test_evict(tmp_path, sample):
+    directory = tmp_path / 'cache'
+    filenames = []
+    for i in range(3):
+        filename = str(tmp_path / '{}.txt'.format(i))
+        with open(filename, 'wb') as f:
+            f.write(sample)
+        filenames.append(filename)
+    store = cache.TestVectorCache(str(directory), maxsize=float('inf'))
+    vector = load(filenames[0])
+    for filename in filenames:
+        store.store(filename, vector)
+    lazy = testvector.LazyTestVector()
+    lazy.open(filenames[0], store.indexPath(filenames[0]))
+    lazy.close()
+    (directory / 'notes.txt').write_text("keep")
+    entries = {path: size for used, size, path in store.entries()}
+    assert len(entries) == 4
+    # Least recently used first: the index, then entries of files 0 to 2.
+    paths = [store.indexPath(filenames[0])] + [store.path(store.key(filename)) for filename in filenames]
+    for age, path in enumerate(reversed(paths)):
+        used = os.path.join(path, 'meta.json') if os.path.isdir(path) else path
+        os.utime(used, (1e9 - age * 100, 1e9 - age * 100))
+    store.maxsize = entries[paths[2]] + entries[paths[3]]
+    store.evict()
+    assert sorted(path for used, size, path in store.entries()) == sorted(paths[2:])
+    assert (directory / 'notes.txt').exists()
+    assert rowsOf(store.load(filenames[2])) == rowsOf(vector)
+    assert np.array_equal(store.load(filenames[1]).bx, vector.bx)
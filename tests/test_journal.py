@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+from conftest import baselineRead, rowsOf
+import journal
+import testvector
+
+def load(filename, cls=testvector.TestVector):
+    vector = cls()
+    with open(filename, 'rb') as f:
+        vector.read(f)
+    return vector
+
+def edit(vector):
+    """Apply a few edits, returns the journal and the expected rows."""
+    edits = journal.EditJournal(vector)
+    edits.set(3, 0, 0x123456789)
+    edits.set(3, vector.index('finor[0]'), 1)
+    edits.set(100, vector.index('eg[2]'), 0x7654321)
+    edits.set(len(vector) - 1, vector.index('algorithms[0]'), 1 << 511)
+    return edits, rowsOf(vector)
+
+def test_save_in_place(sampleFile):
+    vector = load(sampleFile)
+    edits, expected = edit(vector)
+    size = os.path.getsize(sampleFile)
+    assert journal.save(sampleFile, vector, edits) == 'in-place'
+    assert not edits.isModified()
+    assert not os.path.exists(journal.journalPath(sampleFile))
+    assert os.path.getsize(sampleFile) == size
+    assert rowsOf(load(sampleFile)) == expected
+
+def test_save_lazy(sampleFile):
+    vector = load(sampleFile, testvector.LazyTestVector)
+    edits, expected = edit(vector)
+    assert journal.save(sampleFile, vector, edits) == 'in-place'
+    vector.close()
+    assert rowsOf(load(sampleFile)) == expected
+
+def test_save_rewrite(tmp_path, sample):
+    # Unpadded values grow, the file is rewritten.
+    lines = [b' '.join(item.lstrip(b'0') or b'0' for item in line.split()) for line in sample.splitlines()]
+    filename = str(tmp_path / 'unpadded.txt')
+    with open(filename, 'wb') as f:
+        f.write(b'\n'.join(lines) + b'\n')
+    vector = load(filename)
+    edits, expected = edit(vector)
+    assert journal.save(filename, vector, edits) == 'rewrite'
+    assert rowsOf(load(filename)) == expected
+    data = open(filename, 'rb').read().splitlines()
+    assert data[4:100] == lines[4:100] # other lines are untouched
+
+def test_nothing_to_save(sampleFile):
+    vector = load(sampleFile)
+    edits = journal.EditJournal(vector)
+    edits.set(3, 0, 1)
+    edits.undo()
+    assert journal.save(sampleFile, vector, edits) is None
+
+def test_changed_on_disk(sampleFile, sample):
+    vector = load(sampleFile)
+    edits, expected = edit(vector)
+    lines = sample.splitlines(keepends=True)
+    lines[3] = lines[3].replace(b'0', b'1', 1)
+    with open(sampleFile, 'wb') as f:
+        f.write(b''.join(lines))
+    with pytest.raises(journal.SaveError):
+        journal.save(sampleFile, vector, edits)
+    assert open(sampleFile, 'rb').read() == b''.join(lines)
+    assert edits.isModified()
+
+def interrupt(monkeypatch):
+    """Let applyPatches() fail halfway through the first patch."""
+    def applyPatches(filename, patches):
+        with open(filename, 'r+b') as f:
+            offset, chunk = patches[0]
+            f.seek(offset)
+            f.write(chunk[:len(chunk) // 2])
+        raise KeyboardInterrupt()
+    monkeypatch.setattr(journal, 'applyPatches', applyPatches)
+
+def test_recover_interrupted_save(sampleFile, monkeypatch):
+    vector = load(sampleFile)
+    edits, expected = edit(vector)
+    interrupt(monkeypatch)
+    with pytest.raises(KeyboardInterrupt):
+        journal.save(sampleFile, vector, edits)
+    monkeypatch.undo()
+    assert os.path.exists(journal.journalPath(sampleFile))
+    assert journal.recover(sampleFile)
+    assert not os.path.exists(journal.journalPath(sampleFile))
+    assert rowsOf(load(sampleFile)) == expected
+    assert not journal.recover(sampleFile)
+
+def test_discard_incomplete_journal(sampleFile, sample, monkeypatch):
+    vector = load(sampleFile)
+    edits, expected = edit(vector)
+    interrupt(monkeypatch)
+    with pytest.raises(KeyboardInterrupt):
+        journal.save(sampleFile, vector, edits)
+    monkeypatch.undo()
+    # Interrupted while writing the journal, the file is untouched then.
+    path = journal.journalPath(sampleFile)
+    data = open(path, 'rb').read()
+    with open(path, 'wb') as f:
+        f.write(data[:len(data) // 2])
+    with open(sampleFile, 'wb') as f:
+        f.write(sample)
+    assert not journal.recover(sampleFile)
+    assert not os.path.exists(path)
+    assert rowsOf(load(sampleFile)) == baselineRead(sample)
@@ -0,0 +1,58 @@
+import io
+
+import pytest
+
+from conftest import baselineRead, rowsOf
+import testvector
+
+def readBytes(data, blocksize=None):
+    vector = testvector.TestVector()
+    if blocksize:
+        vector.blocksize = blocksize
+    vector.read(io.BytesIO(data))
+    return vector
+
+def test_fixed_layout(sample):
+    vector = testvector.TestVector()
+    assert vector.parseFixed(sample) is not None
+    assert rowsOf(readBytes(sample)) == baselineRead(sample)
+
+def test_block_boundaries(sample):
+    # Blocks ending within lines, the rest is carried to the next block.
+    assert rowsOf(readBytes(sample, blocksize=10007)) == baselineRead(sample)
+
+def test_variable_layout(sample):
+    # Unpadded values and extra whitespace defeat the fixed layout path.
+    lines = []
+    for i, line in enumerate(sample.splitlines()):
+        items = line.split()
+        if i % 3 == 0:
+            items = [items[0]] + [item.lstrip(b'0') or b'0' for item in items[1:]]
+        indent = b'  ' if i % 2 else b''
+        lines.append(indent + b' \t'.join(items))
+    data = b'\n'.join(lines) + b'\n'
+    assert testvector.TestVector().parseFixed(data) is None
+    assert rowsOf(readBytes(data)) == baselineRead(data)
+
+def test_last_line_without_newline(sample):
+    data = sample.rstrip(b'\n')
+    assert rowsOf(readBytes(data)) == baselineRead(data)
+
+def test_text_file_object(sample):
+    vector = testvector.TestVector()
+    vector.read(io.StringIO(sample.decode('ascii')))
+    assert rowsOf(vector) == baselineRead(sample)
+
+def test_empty_lines(sample):
+    lines = sample.splitlines(keepends=True)
+    data = b''.join(lines[:10]) + b'\n\n' + b''.join(lines[10:20])
+    assert rowsOf(readBytes(data)) == baselineRead(data)
+
+def test_empty():
+    assert len(readBytes(b'')) == 0
+
+def test_wrong_token_count(sample):
+    line = sample.splitlines()[0]
+    data = sample + line.rsplit(b' ', 1)[0] + b'\n'
+    with pytest.raises(ValueError, match="line {}:".format(len(sample.splitlines()) + 1)):
+        readBytes(data)
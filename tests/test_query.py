@@ -0,0 +1,108 @@
+import io
+import re
+
+import numpy as np
+import pytest
+
+import query
+import testvector
+
+@pytest.fixture(scope='module')
+def vector(sample):
+    vector = testvector.TestVector()
+    vector.read(io.BytesIO(sample))
+    return vector
+
+def select(vector, expression):
+    return query.compile(expression).evaluate(vector)
+
+def attribute(vector, label, name):
+    return vector.decode(vector.index(label))[name]
+
+def test_numbers(vector):
+    pt = attribute(vector, 'muon[1]', 'pt')
+    expected = pt > 10
+    assert expected.any() and not expected.all()
+    for number in ('10', '010', '0010', '0xa', '0XA', '0b1010', '0B01010'):
+        assert np.array_equal(select(vector, 'muon[1].pt > {}'.format(number)), expected), number
+
+def test_leading_zero_index(vector):
+    assert np.array_equal(select(vector, 'muon[01].pt > 10'), select(vector, 'muon[1].pt > 10'))
+
+def test_bit_attribute(vector):
+    algorithms = vector.index('algorithms[0]')
+    expected = vector.bitIndex(algorithms).rows(7)
+    assert len(expected)
+    for expression in ('algorithms.7', 'algorithms.007', 'algorithms[0].07'):
+        assert np.array_equal(np.flatnonzero(select(vector, expression)), expected), expression
+
+def test_slots(vector):
+    pt = np.stack([attribute(vector, 'muon[{}]'.format(i), 'pt') for i in range(8)], axis=1)
+    quality = np.stack([attribute(vector, 'muon[{}]'.format(i), 'quality') for i in range(8)], axis=1)
+    expected = ((pt > 40) & (quality >= 12)).any(axis=1)
+    assert np.array_equal(select(vector, 'muon[*].pt > 40 and muon[*].quality >= 12'), expected)
+    assert np.array_equal(select(vector, 'not (muon[*].pt > 40) or bx < 0x10'),
+        ~(pt > 40).any(axis=1) | (vector.bx < 16))
+
+def test_not(vector):
+    selected = query.Query('jet[*].et > 0x100').evaluate(vector)
+    expected = ~selected
+    assert expected.any() and not expected.all()
+    assert np.array_equal(select(vector, 'not (jet[*].et > 0x100)'), expected)
+    assert np.array_equal(select(vector, 'not not (jet[*].et > 0x100)'), selected)
+    assert np.array_equal(select(vector, 'not jet[*].et > 0x100 and bx < 100'), expected & (vector.bx < 100))
+
+def test_large_numbers(vector):
+    assert not select(vector, 'bx > 18446744073709551615').any()
+    assert select(vector, 'bx < 0xffffffffffffffff').all()
+    assert not select(vector, 'bx >= 0x8000000000000000').any()
+    assert select(vector, 'bx != 9223372036854775808').all()
+    assert select(vector, '18446744073709551615 > bx').all()
+    assert not select(vector, 'muon[0] > 18446744073709551615').any()
+
+def test_constant(vector):
+    assert select(vector, '1 == 01').all()
+    assert not select(vector, '0x10 != 16').any()
+
+@pytest.mark.parametrize('expression, message', [
+    ('', "empty expression at position 1"),
+    ('muon[1].pt >', "expected value at position 13, found end of expression"),
+    ('muon[1].pt > 0x', "expected end at position 15, found 'x'"),
+    ('muon[1].pt > 0b2', "expected end at position 15, found 'b2'"),
+    ('muon[1].pt > 12ab', "expected end at position 16, found 'ab'"),
+    ('muon[1].pt $ 1', "invalid character at position 12: '$'"),
+    ('muon[1. > 1', "expected ] at position 7, found '.'"),
+    ('(bx > 1', "expected ) at position 8, found end of expression"),
+    ('bx > and', "expected value at position 6, found 'and'"),
+])
+def test_syntax_errors(expression, message):
+    with pytest.raises(query.QueryError, match=re.escape(message)):
+        query.compile(expression)
+
+def test_number_out_of_range():
+    for number in ('18446744073709551616', '0x10000000000000000', '0b1' + '0' * 64):
+        with pytest.raises(query.QueryError, match="number out of range at position 6: " + number):
+            query.compile('bx > ' + number)
+
+def test_invalid_number():
+    with pytest.raises(query.QueryError, match="invalid number at position 6: 0b"):
+        query.parseNumber(('number', '0b', 5))
+
+@pytest.mark.parametrize('expression, message', [
+    ('muon[08].pt > 1', "index out of range at position 1: muon[8]"),
+    ('muon[09].pt > 1', "index out of range at position 1: muon[9]"),
+    ('bx == 1 or moon[1] > 1', "unknown object at position 12: moon"),
+    ('muon[1].ptt > 1', "unknown attribute at position 1: muon.ptt"),
+    ('algorithms.0512', "unknown attribute at position 1: algorithms.512"),
+    ('muon[*].pt > eg[*].et', "cannot compare objects with different number of slots"),
+])
+def test_evaluation_errors(vector, expression, message):
+    with pytest.raises(query.QueryError, match=re.escape(message)):
+        select(vector, expression)
+
+def test_next_match():
+    mask = np.array([False, True, False, True])
+    assert query.nextMatch(mask, 1) == 3
+    assert query.nextMatch(mask, 3) is None
+    assert query.nextMatch(mask, 3, backward=True) == 1
+    assert query.nextMatch(mask, 1, backward=True) is None
@@ -0,0 +1,114 @@
+import os
+import pickle
+import subprocess
+import sys
+
+from conftest import rowsOf
+import shared
+import testvector
+
+def load(filename):
+    vector = testvector.TestVector()
+    with open(filename, 'rb') as f:
+        vector.read(f)
+    return vector
+
+def exitedPid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+def test_attach(tmp_path, sampleFile):
+    store = shared.SharedStore(str(tmp_path / 'shared'))
+    assert store.attach(sampleFile) is None
+    vector = load(sampleFile)
+    store.store(sampleFile, vector)
+    key, attached = store.attach(sampleFile)
+    assert key == store.key(sampleFile)
+    assert rowsOf(attached) == rowsOf(vector)
+    assert store.users(key) == [store.holder]
+    store.release(key)
+    assert not os.path.exists(store.path(key))
+
+def test_key_invalidation(tmp_path, sampleFile, sample):
+    store = shared.SharedStore(str(tmp_path / 'shared'))
+    store.store(sampleFile, load(sampleFile))
+    key = store.key(sampleFile)
+    mtime = os.stat(sampleFile).st_mtime_ns
+    # Written again, same content.
+    with open(sampleFile, 'wb') as f:
+        f.write(sample)
+    os.utime(sampleFile, ns=(mtime, mtime + 1))
+    assert store.key(sampleFile) != key
+    assert store.attach(sampleFile) is None
+    os.utime(sampleFile, ns=(mtime, mtime))
+    assert store.key(sampleFile) == key
+    # Replaced by a new file, the inode changes.
+    replaced = sampleFile + '.new'
+    with open(replaced, 'wb') as f:
+        f.write(sample)
+    os.utime(replaced, ns=(mtime, mtime))
+    os.replace(replaced, sampleFile)
+    assert store.key(sampleFile) != key
+    assert store.attach(sampleFile) is None
+
+def test_references(tmp_path, sampleFile):
+    directory = str(tmp_path / 'shared')
+    first, second = shared.SharedStore(directory), shared.SharedStore(directory)
+    first.store(sampleFile, load(sampleFile))
+    key, vector = first.attach(sampleFile)
+    first.attach(sampleFile)
+    second.attach(sampleFile)
+    assert sorted(first.users(key)) == sorted([first.holder, second.holder])
+    first.release(key)
+    assert sorted(first.users(key)) == sorted([first.holder, second.holder])
+    first.release(key)
+    first.release(key) # not held anymore
+    assert first.users(key) == [second.holder]
+    second.close()
+    assert not os.path.exists(first.path(key))
+    assert rowsOf(vector) == rowsOf(load(sampleFile)) # mapped columns stay valid
+
+def test_collect(tmp_path, sampleFile):
+    store = shared.SharedStore(str(tmp_path / 'shared'))
+    store.store(sampleFile, load(sampleFile))
+    key = store.key(sampleFile)
+    # Entries are kept for grace seconds without holders.
+    store.collect()
+    assert os.path.exists(store.path(key))
+    os.makedirs(store.usersPath(key))
+    dead = '{}-0'.format(exitedPid())
+    open(os.path.join(store.usersPath(key), dead), 'w').close()
+    alive = '{}-99'.format(os.getpid())
+    open(os.path.join(store.usersPath(key), alive), 'w').close()
+    os.mkdir(os.path.join(store.directory, '.tmp-stale'))
+    os.mkdir(os.path.join(store.directory, 'project'))
+    store.grace = 0
+    store.collect()
+    assert store.users(key) == [alive]
+    assert not os.path.exists(os.path.join(store.directory, '.tmp-stale'))
+    os.remove(os.path.join(store.usersPath(key), alive))
+    store.collect()
+    assert not os.path.exists(store.path(key))
+    assert os.path.isdir(os.path.join(store.directory, 'project'))
+
+def test_clear_keeps_other_files(tmp_path, sampleFile):
+    store = shared.SharedStore(str(tmp_path / 'shared'))
+    store.store(sampleFile, load(sampleFile))
+    (tmp_path / 'shared' / 'notes.txt').write_text("keep")
+    assert len(store.entries()) == 1
+    store.clear()
+    assert sorted(os.listdir(store.directory)) == ['.lock', 'notes.txt']
+
+def test_pickle(tmp_path, sampleFile):
+    store = shared.SharedStore(str(tmp_path / 'shared'))
+    store.store(sampleFile, load(sampleFile))
+    key, vector = store.attach(sampleFile)
+    copy = pickle.loads(pickle.dumps(store))
+    assert copy.holder != store.holder
+    assert not copy.references
+    copy.attach(sampleFile)
+    store.release(key)
+    assert copy.users(key) == [copy.holder]
+    copy.close()
+    assert not os.path.exists(store.path(key))
@@ -0,0 +1,100 @@
+import io
+import re
+
+import pytest
+
+from conftest import baselineRead, rowsOf
+import testvector
+
+def validate(data, blocksize=None):
+    vector = testvector.TestVector()
+    if blocksize:
+        vector.blocksize = blocksize
+    diagnostics = testvector.Diagnostics()
+    vector.read(io.BytesIO(data), diagnostics)
+    return vector, diagnostics
+
+def replaceToken(line, index, token):
+    """Returns line (with newline) with token index replaced."""
+    items = line.split()
+    items[index] = token
+    return b' '.join(items) + b'\n'
+
+def test_clean(sample):
+    vector, diagnostics = validate(sample)
+    assert len(diagnostics) == 0
+    assert diagnostics.skipped == 0
+    assert rowsOf(vector) == baselineRead(sample)
+
+def test_fixed_layout_problems(sample):
+    # Same line layout, problems are found by the fast path.
+    lines = sample.splitlines(keepends=True)
+    lines[5] = replaceToken(lines[5], -1, b'2') # finor is a single bit
+    lines[7] = replaceToken(lines[7], 21, b'80000000') # reserved bits of tau[0]
+    vector, diagnostics = validate(b''.join(lines))
+    assert rowsOf(vector) == baselineRead(b''.join(lines[:5] + lines[6:]))
+    assert [(item.line, item.severity, item.kind) for item in diagnostics] == [
+        (6, 'error', "value exceeds width"),
+        (8, 'warning', "reserved bits set"),
+    ]
+    assert diagnostics.skipped == 1
+
+def test_invalid_lines(sample):
+    lines = sample.splitlines(keepends=True)
+    bad = {
+        3: (replaceToken(lines[3], 1, b'000000000000zz00'), 'error', "invalid hex value"),
+        10: (b' '.join(lines[10].split()[:-1]) + b'\n', 'error', "wrong token count"),
+        20: (replaceToken(lines[20], 0, b'12a4'), 'error', "invalid BX number"),
+        30: (replaceToken(lines[30], 1, b'1' + lines[30].split(b' ')[1]), 'error', "value exceeds width"),
+    }
+    for row, (line, severity, kind) in bad.items():
+        lines[row] = line
+    data = b''.join(lines)
+    valid = b''.join(line for row, line in enumerate(lines) if row not in bad)
+    for blocksize in (None, 4096):
+        vector, diagnostics = validate(data, blocksize)
+        assert rowsOf(vector) == baselineRead(valid)
+        assert [(item.line, item.severity, item.kind) for item in diagnostics] == [
+            (row + 1, severity, kind) for row, (line, severity, kind) in sorted(bad.items())]
+        assert diagnostics.skipped == len(bad)
+        assert diagnostics.errors == len(bad)
+
+def test_bx_order(sample):
+    lines = sample.splitlines(keepends=True)
+    lines[4], lines[5] = lines[5], lines[4]
+    lines[9] = replaceToken(lines[9], 0, b'3564')
+    data = b''.join(lines)
+    vector, diagnostics = validate(data)
+    assert rowsOf(vector) == baselineRead(data)
+    assert [(item.line, item.kind) for item in diagnostics] == [
+        (6, "non-monotonic BX"), (10, "BX out of range"), (11, "non-monotonic BX")]
+    assert diagnostics.warnings == 3
+    assert diagnostics.skipped == 0
+
+def test_strict_errors(sample):
+    # Strict reads raise on the first problem, located by file line.
+    lines = sample.splitlines(keepends=True)
+    cases = [
+        (replaceToken(lines[2000], 1, b'1' + lines[2000].split()[1]), "line 2001: value exceeds width of muon[0]"),
+        (replaceToken(lines[2000], 9, b'100000000'), "line 2001: value exceeds width of eg[0]"),
+        (replaceToken(lines[2000], 9, b'0000zz00'), "line 2001: invalid hex value for eg[0]"),
+    ]
+    for line, message in cases:
+        for layout in (b'', b'\n'): # fixed layout, empty line before
+            data = b''.join(lines[:10]) + layout + b''.join(lines[10:2000]) + line + b''.join(lines[2001:])
+            vector = testvector.TestVector()
+            vector.blocksize = 65536
+            expected = message.replace('2001', '2002') if layout else message
+            with pytest.raises(ValueError, match=re.escape(expected)):
+                vector.read(io.BytesIO(data))
+
+def test_strict_errors_fixed_layout(sample):
+    # Every muon[0] value has 17 digits, the layout stays fixed.
+    lines = [replaceToken(line, 1, b'0' + line.split()[1]) for line in sample.splitlines()]
+    lines[2000] = replaceToken(lines[2000], 1, b'1' + lines[2000].split()[1][1:])
+    data = b''.join(lines)
+    vector = testvector.TestVector()
+    assert vector.parseFixed(data[:len(lines[0]) * 10]) is not None
+    vector.blocksize = 65536
+    with pytest.raises(ValueError, match=re.escape("line 2001: value exceeds width of muon[0]")):
+        vector.read(io.BytesIO(data))
@@ -1,4 +1,13 @@
+import collections
+import io
 import math
+import mmap
+import os
+import zlib
+
+import numpy as np
+
+import timing
 
 # -----------------------------------------------------------------------------
 #  Test Vector
@@ -9,22 +18,64 @@ class Attribute:
         self.name = name
         self.msb = slice[0]
         self.lsb = slice[-1]
-    @property
-    def bitwidth(self):
-        return (self.msb - self.lsb) + 1
-    @property
-    def bitmask(self):
-        return ((1 << self.bitwidth) - 1) << self.lsb
-    @property
-    def charwidth(self):
-        return int(math.ceil(self.bitwidth / 4.))
+        self.bitwidth = (self.msb - self.lsb) + 1
+        self.bitmask = ((1 << self.bitwidth) - 1) << self.lsb
+        self.charwidth = int(math.ceil(self.bitwidth / 4.))
     def get(self, value):
         return (value & self.bitmask) >> self.lsb
+    def decode(self, column):
+        """Returns array of attribute values for a whole column."""
+        mask = np.uint64((1 << self.bitwidth) - 1)
+        if column.ndim == 1:
+            return (column.astype(np.uint64) >> np.uint64(self.lsb)) & mask
+        word, shift = divmod(self.lsb, 64)
+        values = column[:, word] >> np.uint64(shift)
+        if shift + self.bitwidth > 64:
+            values |= column[:, word + 1] << np.uint64(64 - shift)
+        return values & mask
+
+class BitAttributes:
+    """Attribute tables of a bit vector format (one attribute per bit), built
+    by Format.compile() on first access instead of on import."""
+    def __init__(self, name):
+        self.name = name
+    def __get__(self, instance, owner):
+        owner.attributes = vector_attributes(owner.width)
+        owner.compile()
+        return getattr(owner, self.name)
 
 class Format:
     width = 32
     name = None
     attributes = []
+    bitattributes = False # attributes are bits, created on first use
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.bitattributes:
+            cls.bitvector = True
+            cls.reservedbits = 0
+            for name in ('attributes', 'names', 'attributeMap', 'shifts', 'masks'):
+                setattr(cls, name, BitAttributes(name))
+        else:
+            cls.compile()
+    @classmethod
+    def compile(cls):
+        """Precompute attribute names, shifts and masks used for batch
+        decoding, called on class creation."""
+        cls.names = [attr.name for attr in cls.attributes]
+        cls.attributeMap = {attr.name: attr for attr in cls.attributes}
+        cls.shifts = np.array([attr.lsb for attr in cls.attributes], dtype=np.uint64)
+        cls.masks = np.array([(1 << attr.bitwidth) - 1 for attr in cls.attributes], dtype=np.uint64)
+        # Bit vector formats have one single bit attribute per bit.
+        cls.bitvector = bool(cls.attributes) and cls.names == [str(i) for i in range(cls.width)]
+        # Bits which must be zero: reserved attributes and, for formats
+        # with attributes, bits not covered by any attribute.
+        cls.reservedbits = 0
+        if cls.attributes:
+            cls.reservedbits = (1 << cls.width) - 1
+            for attr in cls.attributes:
+                if attr.name != "reserved":
+                    cls.reservedbits &= ~attr.bitmask
     def __init__(self, index):
         self.index = index
     def format(self, value):
@@ -36,6 +87,114 @@ class Format:
     @property
     def charwidth(self):
         return int(math.ceil(self.width / 4.))
+    @property
+    def words(self):
+        """Number of 64 bit words used to store a wide (> 64 bit) value."""
+        return int(math.ceil(self.width / 64.))
+    @property
+    def dtype(self):
+        return np.uint32 if self.width <= 32 else np.uint64
+    @property
+    def storagebits(self):
+        """Number of bits of a stored value."""
+        return self.words * 64 if self.width > 64 else np.dtype(self.dtype).itemsize * 8
+    def maskArray(self, mask):
+        """Returns bit mask as scalar of the column type, or as array of 64 bit
+        words for wide formats, to be applied to whole columns."""
+        if self.width > 64:
+            return np.array([(mask >> (64 * i)) & 0xffffffffffffffff for i in range(self.words)], dtype=np.uint64)
+        return self.dtype(mask)
+    def violations(self, column, mask):
+        """Returns boolean array of values with any bit of mask set."""
+        if not mask:
+            return np.zeros(len(column), dtype=bool)
+        masked = column & self.maskArray(mask)
+        return masked.any(axis=1) if masked.ndim > 1 else masked != 0
+    def empty(self, count):
+        """Returns a zero initialized column for count values."""
+        if self.width > 64:
+            return np.zeros((count, self.words), dtype=np.uint64)
+        return np.zeros(count, dtype=self.dtype)
+    def item(self, value):
+        """Returns column entry as Python int, wide values are stored as
+        little endian sequence of 64 bit words."""
+        if self.width > 64:
+            return int.from_bytes(value.astype('<u8').tobytes(), 'little')
+        return int(value)
+    def fromItem(self, value):
+        """Returns column entry for Python int, inverse of item(). Raises a
+        ValueError if the value exceeds the format width."""
+        if value < 0 or value >> self.width:
+            raise ValueError("value exceeds {} bit width of {}".format(self.width, self.label()))
+        if self.width > 64:
+            return np.array([(value >> (64 * i)) & 0xffffffffffffffff for i in range(self.words)], dtype=np.uint64)
+        return self.dtype(value)
+    def formatColumn(self, column):
+        """Returns array of zero padded hex strings (bytes) for a whole
+        column, vectorized counterpart of format()."""
+        count = len(column)
+        digits = self.charwidth
+        if column.ndim == 1:
+            shifts = np.arange(digits - 1, -1, -1, dtype=np.uint64) * np.uint64(4)
+            nibbles = (column.astype(np.uint64)[:, None] >> shifts) & np.uint64(0xf)
+        else:
+            octets = np.ascontiguousarray(column, dtype='<u8').view(np.uint8)[:, ::-1]
+            nibbles = np.stack((octets >> 4, octets & 0xf), axis=2).reshape(count, -1)[:, -digits:]
+        chars = np.ascontiguousarray(_DIGITS[nibbles])
+        return chars.view('S{}'.format(digits)).reshape(count)
+    def values(self, value):
+        """Returns list of attribute values of a single value."""
+        return [(value >> attr.lsb) & ((1 << attr.bitwidth) - 1) for attr in self.attributes]
+    def decode(self, column):
+        """Returns dict of attribute name to array of values for a whole
+        column, e.g. decode(column)['pt']."""
+        return dict(zip(self.names, self.decodeArray(column).T))
+    def decodeArray(self, column):
+        """Returns array of shape (count, attributes) holding all attribute
+        values for a whole column."""
+        if self.bitvector:
+            octets = np.ascontiguousarray(column, dtype='<u8').view(np.uint8)
+            return np.unpackbits(octets, axis=1, bitorder='little')[:, :self.width]
+        if column.ndim == 1:
+            return (column.astype(np.uint64)[:, None] >> self.shifts) & self.masks
+        if not self.attributes:
+            return np.zeros((len(column), 0), dtype=np.uint64)
+        return np.stack([attr.decode(column) for attr in self.attributes], axis=1)
+    def parse(self, tokens, lines=None):
+        """Returns column array decoded from sequence of hex tokens (bytes)."""
+        chars = np.array(tokens)
+        if (np.char.str_len(chars) != chars.dtype.itemsize).any():
+            chars = np.char.rjust(chars, chars.dtype.itemsize, b'0')
+        return self.fromhex(chars.view(np.uint8).reshape(len(tokens), -1), lines)
+    def fromhex(self, chars, lines=None):
+        """Returns column array decoded from array of ASCII hex digits of shape
+        (count, digits), raises a ValueError on invalid digits or values
+        exceeding the format width (located by line numbers of rows, if
+        given)."""
+        nibbles = _HEX[chars]
+        invalid = nibbles == 0xff
+        if invalid.any():
+            row = int(np.flatnonzero(invalid.any(axis=1))[0])
+            raise rowError("invalid hex value for {}: {!r}".format(self.label(), chars[row].tobytes()), row, lines)
+        return self.fromnibbles(nibbles, lines)
+    def fromnibbles(self, nibbles, lines=None):
+        """Returns column array from array of hex digit values of shape
+        (count, digits), most significant digit first."""
+        count = len(nibbles)
+        # Align to storage size, leading digits beyond width must be zero.
+        size = (self.words * 8 if self.width > 64 else np.dtype(self.dtype).itemsize) * 2
+        if nibbles.shape[1] > size:
+            excess = nibbles[:, :nibbles.shape[1] - size]
+            if excess.any():
+                row = int(np.flatnonzero(excess.any(axis=1))[0])
+                raise rowError("value exceeds width of {}".format(self.label()), row, lines)
+            nibbles = nibbles[:, nibbles.shape[1] - size:]
+        elif nibbles.shape[1] < size:
+            nibbles = np.pad(nibbles, ((0, 0), (size - nibbles.shape[1], 0)))
+        octets = (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]
+        if self.width > 64:
+            return octets.view('>u8')[:, ::-1].astype(np.uint64)
+        return octets.view('>u{}'.format(size // 2)).reshape(count).astype(self.dtype)
 
 class MuonFormat(Format):
     width = 64
@@ -124,18 +283,216 @@ def vector_attributes(width):
 class ExternalFormat(Format):
     name = "external"
     width = 256
-    attributes = vector_attributes(width)
+    bitattributes = True
 
 class AlgorithmsFormat(Format):
     name = "algorithms"
     width = 512
-    attributes = vector_attributes(width)
+    bitattributes = True
 
 class FinorFormat(Format):
     name = "finor"
     width = 1
 
+# Hex digit lookup table, 0xff marks invalid characters.
+_HEX = np.full(256, 0xff, dtype=np.uint8)
+for _i, _c in enumerate(b"0123456789abcdef"):
+    _HEX[_c] = _i
+    _HEX[ord(chr(_c).upper())] = _i
+
+# Hex digit characters used for vectorized formatting.
+_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+# Whitespace lookup table used for vectorized tokenizing.
+_SPACE = np.zeros(256, dtype=bool)
+_SPACE[list(b" \t\r\n\v\f")] = True
+
+def popcount(words):
+    """Returns number of set bits of every element of an unsigned integer
+    array."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    octets = np.ascontiguousarray(words).view(np.uint8).reshape(words.shape + (-1,))
+    return np.unpackbits(octets, axis=-1).sum(axis=-1, dtype=np.uint8)
+
+class BitIndex:
+    """Inverted index of a bit vector column (external, algorithms).
+
+    Holds one bitset over all rows per bit, stored as array of shape (width,
+    words) of little endian 64 bit words, so counting and locating rows of a
+    bit are popcount and scan operations over rows / 64 words.
+    """
+
+    chunksize = 1024 # rows transposed at once (fits in cache), multiple of 64
+
+    def __init__(self, column, width):
+        self.size = len(column)
+        self.width = width
+        words = (self.size + 63) // 64
+        self.bitmaps = np.zeros((width, words), dtype=np.uint64)
+        octets = self.bitmaps.view(np.uint8)
+        for start in range(0, self.size, self.chunksize):
+            chunk = np.ascontiguousarray(column[start:start + self.chunksize], dtype='<u8')
+            bits = np.unpackbits(chunk.view(np.uint8), axis=1, bitorder='little')[:, :width]
+            packed = np.packbits(np.ascontiguousarray(bits.T), axis=1, bitorder='little')
+            octets[:, start // 8:start // 8 + packed.shape[1]] = packed
+
+    def words(self, start, stop):
+        """Returns bitsets of all bits restricted to rows start to stop
+        (exclusive)."""
+        stop = min(stop, self.size)
+        if start >= stop:
+            return np.zeros((self.width, 0), dtype=np.uint64)
+        first, last = start // 64, (stop - 1) // 64
+        words = self.bitmaps[:, first:last + 1].copy()
+        words[:, 0] &= np.uint64(0xffffffffffffffff) << np.uint64(start % 64)
+        words[:, -1] &= np.uint64(0xffffffffffffffff) >> np.uint64(63 - (stop - 1) % 64)
+        return words
+
+    def counts(self, start=0, stop=None):
+        """Returns array of number of rows every bit is set in."""
+        stop = self.size if stop is None else stop
+        return popcount(self.words(start, stop)).sum(axis=1, dtype=np.int64)
+
+    def check(self, bit):
+        """Raises a ValueError if bit is out of range."""
+        if not 0 <= bit < self.width:
+            raise ValueError("bit {} out of range, expected 0 to {}".format(bit, self.width - 1))
+
+    def count(self, bit):
+        self.check(bit)
+        return int(popcount(self.bitmaps[bit]).sum(dtype=np.int64))
+
+    def rows(self, bit, start=0, stop=None):
+        """Returns array of rows the bit is set in."""
+        self.check(bit)
+        stop = self.size if stop is None else stop
+        words = self.words(start, stop)[bit]
+        offset = (start // 64) * 64
+        nonzero = np.flatnonzero(words)
+        bits = np.unpackbits(words[nonzero].astype('<u8').view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+        rows, positions = np.nonzero(bits)
+        return offset + nonzero[rows] * 64 + positions
+
+    def fired(self, start=0, stop=None):
+        """Returns array of bits set in any row of range start to stop."""
+        stop = self.size if stop is None else stop
+        return np.flatnonzero(self.words(start, stop).any(axis=1))
+
+# BX numbers are within an orbit of 3564 bunch crossings.
+BxPerOrbit = 3564
+
+class Diagnostic(collections.namedtuple('Diagnostic', 'line column severity kind message')):
+    """Problem found while parsing, line and column are 1-based."""
+
+    def __str__(self):
+        return "line {}:{}: {}: {}".format(self.line, self.column, self.severity, self.message)
+
+class Diagnostics:
+    """Collects problems found by a validating parse. Rows with errors are
+    skipped, rows with warnings are loaded. At most maxcount diagnostics of
+    every kind are kept, all of them are counted."""
+
+    maxcount = 100
+
+    def __init__(self):
+        self.items = []
+        self.counts = collections.Counter()
+        self.severities = {}
+        self.skipped = 0 # rows not loaded
+        self.lastbx = None # BX of the last row of the previous block
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def __iter__(self):
+        return iter(sorted(self.items))
+
+    def add(self, line, column, severity, kind, message):
+        self.counts[kind] += 1
+        self.severities[kind] = severity
+        if self.counts[kind] <= self.maxcount:
+            self.items.append(Diagnostic(int(line), int(column), severity, kind, message))
+
+    def count(self, severity):
+        return sum(count for kind, count in self.counts.items() if self.severities[kind] == severity)
+
+    @property
+    def errors(self):
+        return self.count('error')
+
+    @property
+    def warnings(self):
+        return self.count('warning')
+
+    def summary(self):
+        """Returns one line summary, e.g. '2 errors, 10 warnings (...)'."""
+        if not self.counts:
+            return "no problems found"
+        first = {}
+        for item in sorted(self.items):
+            first.setdefault(item.kind, item)
+        kinds = ", ".join("{} {} (first at line {}:{})".format(count, kind, first[kind].line, first[kind].column)
+            for kind, count in self.counts.most_common())
+        text = "{} errors, {} warnings: {}".format(self.errors, self.warnings, kinds)
+        if self.skipped:
+            text += "; {} rows skipped".format(self.skipped)
+        return text
+
+class Event:
+    """Lightweight row proxy, provides events[row][col] access."""
+
+    def __init__(self, testvector, row):
+        self.testvector = testvector
+        self.row = row
+
+    def __len__(self):
+        return len(self.testvector.formats)
+
+    def __getitem__(self, col):
+        return self.testvector.value(self.row, col)
+
+    def __iter__(self):
+        for col in range(len(self)):
+            yield self[col]
+
+class EventList:
+    """Sequence of events backed by the columns of a test vector."""
+
+    def __init__(self, testvector):
+        self.testvector = testvector
+
+    def __len__(self):
+        return len(self.testvector)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("event index out of range")
+        return Event(self.testvector, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield Event(self.testvector, row)
+
+def residentBytes(array):
+    """Returns bytes of array, zero for memory mapped (file backed) arrays
+    which are paged in and out by the operating system."""
+    if isinstance(array, np.memmap):
+        return 0
+    return array.nbytes
+
 class TestVector:
+    """Test vector with columnar storage, one NumPy array per format.
+
+    Narrow formats are stored as uint32/uint64 arrays, wide formats (external,
+    algorithms) as arrays of shape (rows, words) of little endian 64 bit words.
+    """
+
+    blocksize = 8 * 1024 * 1024
 
     def __init__(self):
         self.formats = []
@@ -151,17 +508,920 @@ class TestVector:
         self.addFormat(ExternalFormat)
         self.addFormat(AlgorithmsFormat)
         self.addFormat(FinorFormat)
-        self.events = []
+        self.clear()
 
     def addFormat(self, cls, count=1):
         self.formats += [cls(i) for i in range(count)]
 
-    def read(self, f):
-        self.events = []
-        for line in f:
-            items = line.strip().split()
-            bx = int(items.pop(0)) # ignore
-            data = []
-            for fmt in self.formats:
-                data.append(int(items.pop(0), 16))
-            self.events.append(data)
+    def __len__(self):
+        return self._size
+
+    @property
+    def events(self):
+        return EventList(self)
+
+    def clear(self):
+        """Remove all events."""
+        self._size = 0
+        self._bx = np.zeros(0, dtype=np.int64)
+        self._columns = [fmt.empty(0) for fmt in self.formats]
+        self.bx = self._bx
+        self.columns = list(self._columns)
+        self.bitIndices = {}
+        self.resetParseState()
+
+    def memoryUsage(self):
+        """Returns bytes of memory held by rows (including reserved capacity
+        and bit indices), memory mapped arrays are not counted."""
+        size = residentBytes(self._bx)
+        for column in self._columns:
+            size += column.nbytes if isinstance(column, SparseColumn) else residentBytes(column)
+        return size + sum(index.bitmaps.nbytes for index in self.bitIndices.values())
+
+    def resetParseState(self):
+        """Reset state used for parsing lines appended after reading."""
+        self.offset = 0 # size of complete lines parsed
+        self.checksum = 0 # CRC32 of complete lines parsed
+        self.lines = 0 # number of complete lines parsed
+        self.partial = 0 # rows parsed from a trailing incomplete line
+
+    def column(self, col, start=0, stop=None):
+        """Returns array of all values of a column, or of rows start to stop
+        (exclusive)."""
+        if start or stop is not None:
+            return self.columns[col][start:stop]
+        return self.columns[col]
+
+    def columnRange(self, cols, start, stop):
+        """Returns list of arrays of columns cols holding rows start to stop
+        (exclusive)."""
+        return [self.column(col, start, stop) for col in cols]
+
+    def value(self, row, col):
+        """Returns a single value as Python int."""
+        return self.formats[col].item(self.columns[col][row])
+
+    def setValue(self, row, col, value):
+        """Set a single value from Python int, raises a ValueError if the
+        value exceeds the format width."""
+        self._columns[col][row] = self.formats[col].fromItem(value)
+        self.bitIndices.pop(col, None)
+
+    def formatLines(self, start, stop):
+        """Returns rows start to stop (exclusive) as lines of text (bytes)
+        in file layout, BX zero padded to four digits."""
+        count = max(0, min(stop, len(self)) - start)
+        bx = self.bx[start:start + count]
+        digits = max(4, len(str(int(bx.max())))) if count else 4
+        powers = 10 ** np.arange(digits - 1, -1, -1, dtype=np.int64)
+        parts = [((bx[:, None] // powers) % 10 + ord("0")).astype(np.uint8)]
+        for col, fmt in enumerate(self.formats):
+            chars = fmt.formatColumn(self.column(col, start, start + count))
+            parts.append(np.full((count, 1), ord(" "), dtype=np.uint8))
+            parts.append(chars.view(np.uint8).reshape(count, -1))
+        parts.append(np.full((count, 1), ord("\n"), dtype=np.uint8))
+        return np.hstack(parts).tobytes()
+
+    def write(self, f, chunksize=65536):
+        """Write all rows to binary file object in chunks."""
+        for start in range(0, len(self), chunksize):
+            f.write(self.formatLines(start, start + chunksize))
+
+    def formatRange(self, col, start, stop):
+        """Returns list of formatted values of a column for rows start to
+        stop (exclusive)."""
+        fmt = self.formats[col]
+        return fmt.formatColumn(self.columns[col][start:stop]).astype(str).tolist()
+
+    def index(self, label):
+        """Returns column index of format label, e.g. 'muon[3]'."""
+        for col, fmt in enumerate(self.formats):
+            if fmt.label() == label:
+                return col
+        raise KeyError(label)
+
+    def decode(self, col):
+        """Returns dict of attribute arrays for a whole column, e.g.
+        decode(index('muon[3]'))['pt'] for the pt of muon 3 of every BX."""
+        return self.formats[col].decode(self.column(col))
+
+    def bitIndex(self, col):
+        """Returns inverted bit index of a bit vector column, built on first
+        use, e.g. bitIndex(index('algorithms[0]')).rows(42) for all rows
+        algorithm 42 fired in."""
+        index = self.bitIndices.get(col)
+        if index is None:
+            fmt = self.formats[col]
+            if not fmt.bitvector:
+                raise ValueError("not a bit vector column: {}".format(fmt.label()))
+            index = BitIndex(self.column(col), fmt.width)
+            self.bitIndices[col] = index
+        return index
+
+    def nextNonEmpty(self, row, columns=None, backward=False):
+        """Returns next (or previous) row after row with a non-zero value in
+        any of columns (default all), or None."""
+        columns = range(len(self.formats)) if columns is None else columns
+        chunksize = 4096
+        if backward:
+            stop = max(0, min(row, len(self)))
+            while stop > 0:
+                start = max(0, stop - chunksize)
+                rows = self.nonEmptyRows(columns, start, stop)
+                if len(rows):
+                    return int(rows[-1])
+                stop = start
+        else:
+            start = max(0, row + 1)
+            while start < len(self):
+                stop = min(len(self), start + chunksize)
+                rows = self.nonEmptyRows(columns, start, stop)
+                if len(rows):
+                    return int(rows[0])
+                start = stop
+        return None
+
+    def nonEmptyRows(self, columns, start, stop):
+        """Returns rows start to stop with a non-zero value in any of
+        columns."""
+        mask = np.zeros(max(0, stop - start), dtype=bool)
+        for col in columns:
+            values = self.column(col, start, stop)
+            mask |= values.any(axis=1) if values.ndim > 1 else values != 0
+        return np.flatnonzero(mask) + start
+
+    def assign(self, bx, columns):
+        """Replace all events by BX array and list of column arrays, arrays
+        are used without copying."""
+        self._size = len(bx)
+        self._bx = bx
+        self._columns = list(columns)
+        self.bx = self._bx
+        self.columns = list(self._columns)
+        self.bitIndices = {}
+
+    def extend(self, bx, columns):
+        """Append parsed rows, grows storage by doubling its capacity."""
+        count = len(bx)
+        size = self._size + count
+        if size > len(self._bx):
+            capacity = max(size, 2 * len(self._bx))
+            self._bx = np.resize(self._bx, capacity)
+            for i, fmt in enumerate(self.formats):
+                column = fmt.empty(capacity)
+                column[:self._size] = self._columns[i][:self._size]
+                self._columns[i] = column
+        self._bx[self._size:size] = bx
+        for i, column in enumerate(columns):
+            self._columns[i][self._size:size] = column
+        self._size = size
+        self.bx = self._bx[:size]
+        self.columns = [column[:size] for column in self._columns]
+        self.bitIndices = {}
+
+    def truncate(self, size):
+        """Remove all events from row size on."""
+        self._size = min(size, self._size)
+        self.bx = self._bx[:self._size]
+        self.columns = [column[:self._size] for column in self._columns]
+        self.bitIndices = {}
+
+    @timing.timed()
+    def read(self, f, diagnostics=None):
+        """Read test vector from file object. Raises a ValueError on the first
+        problem, or if diagnostics is given collects all problems and skips
+        invalid rows."""
+        self.clear()
+        for bx, columns in self.parse(f, diagnostics=diagnostics):
+            self.extend(bx, columns)
+
+    def update(self, f, diagnostics=None):
+        """Parse lines appended to binary file object since the last read.
+        Returns the first row that changed or was appended, or None if the
+        previously parsed content changed and the file must be read again."""
+        remaining = self.offset
+        checksum = 0
+        f.seek(0)
+        while remaining:
+            data = f.read(min(self.blocksize, remaining))
+            if not data:
+                return None
+            checksum = zlib.crc32(data, checksum)
+            remaining -= len(data)
+        if checksum != self.checksum:
+            return None
+        # Rows of a previously incomplete last line are parsed again.
+        start = len(self) - self.partial
+        self.truncate(start)
+        self.partial = 0
+        for bx, columns in self.parse(f, partial=False, diagnostics=diagnostics):
+            self.extend(bx, columns)
+        return start
+
+    def parse(self, f, blocksize=None, partial=True, diagnostics=None):
+        """Parse file object (text or binary) in blocks, yields tuples of BX
+        array and list of column arrays for every block. Parsing continues
+        the parse state (offset, checksum) of previous reads. A trailing line
+        without newline is skipped if partial is False. Problems are
+        collected in diagnostics (if given) instead of raising ValueError."""
+        for block in iterblocks(f, blocksize or self.blocksize, partial):
+            if diagnostics is None:
+                bx, columns, lines = self.parseBlock(block, self.lines)
+            else:
+                bx, columns, lines = self.validateBlock(block, self.lines, diagnostics)
+            if block.endswith(b"\n"):
+                self.offset += len(block)
+                self.checksum = zlib.crc32(block, self.checksum)
+                self.lines += lines
+            else:
+                self.partial = len(bx)
+            if len(bx):
+                yield bx, columns
+
+    @timing.timed()
+    def parseBlock(self, data, lineno=0):
+        """Parse block of complete lines, returns tuple of BX array, list of
+        column arrays and number of lines in block."""
+        if data and not data.endswith(b"\n"):
+            data += b"\n"
+        result = self.parseFixed(data, lineno=lineno)
+        if result is not None:
+            return result
+        stride = len(self.formats) + 1
+        counts = tokenCounts(data)
+        tokens = data.split()
+        if len(tokens) != np.count_nonzero(counts) * stride:
+            for i, count in enumerate(counts):
+                if count and count != stride:
+                    raise ValueError("line {}: expected {} items, got {}".format(lineno + i + 1, stride, count))
+        if not tokens:
+            return np.zeros(0, dtype=np.int64), [fmt.empty(0) for fmt in self.formats], len(counts)
+        try:
+            bx = np.array(tokens[0::stride]).astype(np.int64)
+        except ValueError:
+            raise ValueError("invalid BX number")
+        lines = lineno + 1 + np.flatnonzero(counts)
+        columns = [fmt.parse(tokens[i + 1::stride], lines) for i, fmt in enumerate(self.formats)]
+        return bx, columns, len(counts)
+
+    @timing.timed()
+    def validateBlock(self, data, lineno, diagnostics):
+        """Error tolerant counterpart of parseBlock(), problems are added to
+        diagnostics and rows with errors are skipped."""
+        if data and not data.endswith(b"\n"):
+            data += b"\n"
+        try:
+            result = self.parseFixed(data, spans=True)
+        except ValueError:
+            result = None # value exceeding its format, checked per line
+        if result is not None:
+            bx, columns, count, spans = result
+            lines = np.arange(lineno + 1, lineno + count + 1)
+            position = lambda row, token: spans[token][0] + 1
+        else:
+            bx, columns, count, lines, position = self.parseTolerant(data, lineno, diagnostics)
+        bx, columns = self.validateRows(bx, columns, lines, position, diagnostics)
+        return bx, columns, count
+
+    def parseTolerant(self, data, lineno, diagnostics):
+        """Parse block line by line, returns BX array, list of column arrays
+        of valid rows, number of lines, line numbers of rows and a function
+        returning the column of a token of a row."""
+        stride = len(self.formats) + 1
+        lines = data.split(b"\n")[:-1]
+        valid = []
+        tokens = []
+        for i, line in enumerate(lines):
+            items = line.split()
+            if not items:
+                continue
+            if len(items) != stride:
+                diagnostics.add(lineno + i + 1, tokenColumn(line, min(len(items), stride)), 'error', "wrong token count",
+                    "expected {} items, got {}".format(stride, len(items)))
+                diagnostics.skipped += 1
+                continue
+            valid.append(i)
+            tokens.extend(items)
+        valid = np.array(valid, dtype=np.int64)
+        invalid = np.zeros(len(valid), dtype=bool)
+        def report(rows, token, kind, message):
+            for row in rows[:diagnostics.maxcount]:
+                i = valid[row]
+                diagnostics.add(lineno + i + 1, tokenColumn(lines[i], token), 'error', kind, message.format(tokens[row * stride + token].decode('ascii', 'replace')))
+            if len(rows) > diagnostics.maxcount:
+                diagnostics.counts[kind] += len(rows) - diagnostics.maxcount
+        bx = np.zeros(len(valid), dtype=np.int64)
+        if len(valid):
+            chars = np.array(tokens[0::stride])
+            digits = np.char.isdigit(chars)
+            report(np.flatnonzero(~digits), 0, "invalid BX number", "invalid BX number {!r}")
+            invalid |= ~digits
+            bx[digits] = chars[digits].astype(np.int64)
+        nibbles = []
+        for i, fmt in enumerate(self.formats):
+            if not len(valid):
+                nibbles.append(None)
+                continue
+            chars = np.array(tokens[i + 1::stride])
+            if (np.char.str_len(chars) != chars.dtype.itemsize).any():
+                chars = np.char.rjust(chars, chars.dtype.itemsize, b'0')
+            values = _HEX[chars.view(np.uint8).reshape(len(valid), -1)]
+            bad = (values == 0xff).any(axis=1)
+            report(np.flatnonzero(bad & ~invalid), i + 1, "invalid hex value", "invalid hex value {{!r}} for {}".format(fmt.label()))
+            invalid |= bad
+            # Leading digits beyond the storage size must be zero.
+            excess = values.shape[1] - fmt.storagebits // 4
+            if excess > 0:
+                bad = ((values[:, :excess] != 0) & (values[:, :excess] != 0xff)).any(axis=1)
+                report(np.flatnonzero(bad & ~invalid), i + 1, "value exceeds width", "value {{!r}} exceeds width of {}".format(fmt.label()))
+                invalid |= bad
+            nibbles.append(values)
+        diagnostics.skipped += int(np.count_nonzero(invalid))
+        keep = ~invalid
+        columns = []
+        for fmt, values in zip(self.formats, nibbles):
+            columns.append(fmt.empty(0) if values is None else fmt.fromnibbles(values[keep]))
+        rows = valid[keep]
+        position = lambda row, token: tokenColumn(lines[rows[row]], token)
+        return bx[keep], columns, len(lines), lineno + rows + 1, position
+
+    def validateRows(self, bx, columns, lines, position, diagnostics):
+        """Check parsed rows for BX order and range, values exceeding their
+        width (errors, rows are removed) and reserved bits (warnings).
+        Returns BX array and list of column arrays of valid rows."""
+        invalid = np.zeros(len(bx), dtype=bool)
+        def report(rows, token, severity, kind, message):
+            for row in rows[:diagnostics.maxcount]:
+                diagnostics.add(int(lines[row]), position(row, token), severity, kind, message(row))
+            if len(rows) > diagnostics.maxcount:
+                diagnostics.counts[kind] += len(rows) - diagnostics.maxcount
+                diagnostics.severities[kind] = severity
+        for i, fmt in enumerate(self.formats):
+            if fmt.width < fmt.storagebits:
+                bad = fmt.violations(columns[i], ((1 << fmt.storagebits) - 1) & ~((1 << fmt.width) - 1))
+                rows = np.flatnonzero(bad)
+                report(rows, i + 1, 'error', "value exceeds width", lambda row: "value exceeds width of {}".format(fmt.label()))
+                invalid |= bad
+            if fmt.reservedbits:
+                rows = np.flatnonzero(fmt.violations(columns[i], fmt.reservedbits) & ~invalid)
+                report(rows, i + 1, 'warning', "reserved bits set", lambda row: "reserved bits of {} set".format(fmt.label()))
+        rows = np.flatnonzero(bx >= BxPerOrbit)
+        report(rows, 0, 'warning', "BX out of range", lambda row: "BX {} exceeds orbit of {} BX".format(bx[row], BxPerOrbit))
+        if len(bx):
+            previous = np.concatenate(([-1 if diagnostics.lastbx is None else diagnostics.lastbx], bx[:-1]))
+            # A BX of 0 starts the next orbit.
+            rows = np.flatnonzero((bx <= previous) & (bx != 0))
+            report(rows, 0, 'warning', "non-monotonic BX", lambda row: "BX {} follows BX {}".format(bx[row], previous[row]))
+            diagnostics.lastbx = int(bx[-1])
+        if invalid.any():
+            diagnostics.skipped += int(np.count_nonzero(invalid))
+            keep = ~invalid
+            return bx[keep], [column[keep] for column in columns]
+        return bx, columns
+
+    def parseFixed(self, data, spans=False, lineno=0):
+        """Fast path for blocks where every line has an identical layout, the
+        block is then sliced as 2D character array. Returns None if the block
+        does not have a fixed layout. Token spans of the layout are returned
+        in addition if spans is True. Raises a ValueError for values exceeding
+        their format, lineno is the number of lines before the block."""
+        buf = np.frombuffer(data, dtype=np.uint8)
+        length = data.find(b"\n") + 1
+        if not length or len(buf) % length:
+            return None
+        rows = buf.reshape(-1, length)
+        if not (rows[:, -1] == ord("\n")).all():
+            return None
+        # Token spans of the first line are the template for all other lines.
+        space = _SPACE[rows[0]]
+        edges = np.flatnonzero(np.diff(np.concatenate(([True], space, [True])).astype(np.int8)))
+        tokens = edges.reshape(-1, 2)
+        if len(tokens) != len(self.formats) + 1:
+            return None
+        if not _SPACE[rows[:, space]].all():
+            return None
+        digits = rows[:, tokens[0][0]:tokens[0][1]] - ord("0")
+        if (digits > 9).any():
+            return None
+        bx = np.zeros(len(rows), dtype=np.int64)
+        for i in range(digits.shape[1]):
+            bx = bx * 10 + digits[:, i]
+        # Separators map to 0xff as well, so every invalid digit shows up as
+        # deviation from the template.
+        nibbles = _HEX[rows[:, tokens[1][0]:]]
+        if ((nibbles == 0xff) != space[tokens[1][0]:]).any():
+            return None
+        lines = np.arange(lineno + 1, lineno + len(rows) + 1)
+        columns = []
+        for fmt, (start, stop) in zip(self.formats, tokens[1:] - tokens[1][0]):
+            columns.append(fmt.fromnibbles(nibbles[:, start:stop], lines))
+        if spans:
+            return bx, columns, len(rows), tokens
+        return bx, columns, len(rows)
+
+def iterblocks(f, blocksize, partial=True):
+    """Yields blocks of bytes read from file object, every block ends at a line
+    boundary (except a last line without newline, if partial is True)."""
+    rest = b""
+    while True:
+        data = f.read(blocksize)
+        if isinstance(data, str):
+            data = data.encode('ascii')
+        if not data:
+            break
+        data = rest + data
+        end = data.rfind(b"\n") + 1
+        if not end:
+            rest = data
+            continue
+        rest = data[end:]
+        yield data[:end]
+    if rest and partial:
+        yield rest
+
+def rowError(message, row, lines=None):
+    """Returns ValueError of a row of a block, located by line number if the
+    array of line numbers of rows is given."""
+    if lines is None:
+        return ValueError("{} in row {}".format(message, row))
+    return ValueError("line {}: {}".format(int(lines[row]), message))
+
+def tokenColumn(line, token):
+    """Returns 1-based column of token of a line (or of its end)."""
+    pos = 0
+    for i, item in enumerate(line.split()):
+        pos = line.index(item, pos)
+        if i == token:
+            return pos + 1
+        pos += len(item)
+    return len(line.rstrip()) + 1
+
+def tokenCounts(data):
+    """Returns array of token counts for every line in block of bytes."""
+    if not data:
+        return np.zeros(0, dtype=np.int64)
+    buf = np.frombuffer(data, dtype=np.uint8)
+    space = _SPACE[buf]
+    starts = ~space
+    starts[1:] &= space[:-1]
+    ends = np.flatnonzero(buf == ord("\n"))
+    if not data.endswith(b"\n"):
+        ends = np.append(ends, len(buf) - 1)
+    total = np.searchsorted(np.flatnonzero(starts), ends, side='right')
+    return np.diff(total, prepend=0)
+
+class SparseColumn:
+    """Column storing non-zero values only, as sorted row indices plus values
+    (CSR style). Indexing supports rows and contiguous slices, slices and
+    conversion to an array return dense values with zeros filled in."""
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.size = 0
+        self.count = 0
+        self._rows = np.zeros(0, dtype=np.int32)
+        self._values = fmt.empty(0)
+
+    @classmethod
+    def fromDense(cls, fmt, column):
+        sparse = cls(fmt)
+        sparse.append(column)
+        return sparse
+
+    @property
+    def rows(self):
+        return self._rows[:self.count]
+
+    @property
+    def values(self):
+        return self._values[:self.count]
+
+    @property
+    def ndim(self):
+        return self._values.ndim
+
+    @property
+    def dtype(self):
+        return self._values.dtype
+
+    @property
+    def nbytes(self):
+        return self._rows.nbytes + self._values.nbytes
+
+    def __len__(self):
+        return self.size
+
+    def density(self):
+        """Returns fraction of non-zero rows."""
+        return self.count / self.size if self.size else 0.
+
+    def append(self, column):
+        """Append dense column values, grows storage by doubling its capacity."""
+        nonzero = column.any(axis=1) if column.ndim > 1 else column != 0
+        rows = np.flatnonzero(nonzero)
+        count = self.count + len(rows)
+        if count > len(self._rows):
+            capacity = max(count, 2 * len(self._rows))
+            self._rows = np.resize(self._rows, capacity)
+            values = self.fmt.empty(capacity)
+            values[:self.count] = self._values[:self.count]
+            self._values = values
+        self._rows[self.count:count] = rows + self.size
+        self._values[self.count:count] = column[rows]
+        self.count = count
+        self.size += len(column)
+
+    def truncate(self, size):
+        self.size = min(size, self.size)
+        self.count = int(np.searchsorted(self.rows, self.size))
+
+    def dense(self, start=0, stop=None):
+        """Returns dense array of rows start to stop (exclusive)."""
+        stop = self.size if stop is None else min(stop, self.size)
+        start = min(start, stop)
+        column = self.fmt.empty(stop - start)
+        rows = self.rows
+        first, last = np.searchsorted(rows, (start, stop))
+        column[rows[first:last] - start] = self._values[first:last]
+        return column
+
+    def __array__(self, dtype=None, copy=None):
+        column = self.dense()
+        return column if dtype is None else column.astype(dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.size)
+            if step != 1:
+                return self.dense()[key]
+            return self.dense(start, stop)
+        row = int(key)
+        if row < 0:
+            row += self.size
+        if not 0 <= row < self.size:
+            raise IndexError("row index out of range")
+        pos = int(np.searchsorted(self.rows, row))
+        if pos < self.count and self._rows[pos] == row:
+            return self._values[pos]
+        return self.fmt.empty(1)[0]
+
+    def set(self, row, value):
+        """Set value of a single row, inserting or removing its entry."""
+        pos = int(np.searchsorted(self.rows, row))
+        present = pos < self.count and self._rows[pos] == row
+        if np.any(value):
+            if not present:
+                if self.count == len(self._rows):
+                    capacity = max(1, 2 * len(self._rows))
+                    self._rows = np.resize(self._rows, capacity)
+                    values = self.fmt.empty(capacity)
+                    values[:self.count] = self._values[:self.count]
+                    self._values = values
+                self._rows[pos + 1:self.count + 1] = self._rows[pos:self.count].copy()
+                self._values[pos + 1:self.count + 1] = self._values[pos:self.count].copy()
+                self._rows[pos] = row
+                self.count += 1
+            self._values[pos] = value
+        elif present:
+            self._rows[pos:self.count - 1] = self._rows[pos + 1:self.count].copy()
+            self._values[pos:self.count - 1] = self._values[pos + 1:self.count].copy()
+            self.count -= 1
+
+    def nextRow(self, row, backward=False):
+        """Returns next (or previous) non-zero row after row, or None."""
+        rows = self.rows
+        if backward:
+            pos = int(np.searchsorted(rows, row)) - 1
+            return int(rows[pos]) if pos >= 0 else None
+        pos = int(np.searchsorted(rows, row, side='right'))
+        return int(rows[pos]) if pos < self.count else None
+
+class SparseTestVector(TestVector):
+    """Test vector storing columns sparse, only non-zero values are kept.
+
+    A column is converted to dense storage once its fraction of non-zero rows
+    exceeds threshold. Sparse values carry a 4 byte row index, memory breaks
+    even at about 50 % occupancy and formatting a chunk of rows is about 20 %
+    slower (measured by benchmarks/bench_sparse.py), so columns are kept
+    sparse only while saving at least half of the memory. Columns returned by
+    column() are always dense arrays.
+    """
+
+    threshold = 0.25
+    minrows = 1024 # rows appended before deciding on dense storage
+
+    def clear(self):
+        super(SparseTestVector, self).clear()
+        self._columns = [SparseColumn(fmt) for fmt in self.formats]
+        self.columns = list(self._columns)
+
+    @classmethod
+    def fromTestVector(cls, testvector):
+        """Returns sparse copy of a test vector."""
+        sparse = cls()
+        sparse.assign(testvector.bx, [testvector.column(col) for col in range(len(testvector.formats))])
+        sparse.offset = testvector.offset
+        sparse.checksum = testvector.checksum
+        sparse.lines = testvector.lines
+        sparse.partial = testvector.partial
+        return sparse
+
+    def isSparse(self, col):
+        return isinstance(self._columns[col], SparseColumn)
+
+    def column(self, col, start=0, stop=None):
+        column = self.columns[col]
+        if isinstance(column, SparseColumn):
+            return column.dense(start, stop)
+        return super(SparseTestVector, self).column(col, start, stop)
+
+    def setValue(self, row, col, value):
+        column = self._columns[col]
+        if isinstance(column, SparseColumn):
+            column.set(row, self.formats[col].fromItem(value))
+            self.bitIndices.pop(col, None)
+        else:
+            super(SparseTestVector, self).setValue(row, col, value)
+
+    def nbytes(self):
+        """Returns memory used by the BX and value arrays."""
+        return self._bx.nbytes + sum(column.nbytes for column in self._columns)
+
+    def assign(self, bx, columns):
+        self.clear()
+        self.extend(np.asarray(bx), [np.asarray(column) for column in columns])
+
+    def extend(self, bx, columns):
+        count = len(bx)
+        size = self._size + count
+        if size > len(self._bx):
+            capacity = max(size, 2 * len(self._bx))
+            self._bx = np.resize(self._bx, capacity)
+        self._bx[self._size:size] = bx
+        for i, column in enumerate(columns):
+            storage = self._columns[i]
+            if isinstance(storage, SparseColumn):
+                storage.append(column)
+                if size >= self.minrows and storage.density() > self.threshold:
+                    dense = self.formats[i].empty(len(self._bx))
+                    dense[:size] = storage.dense()
+                    self._columns[i] = dense
+                continue
+            if len(storage) < size:
+                dense = self.formats[i].empty(len(self._bx))
+                dense[:self._size] = storage[:self._size]
+                self._columns[i] = storage = dense
+            storage[self._size:size] = column
+        self._size = size
+        self.bx = self._bx[:size]
+        self.columns = [column if isinstance(column, SparseColumn) else column[:size] for column in self._columns]
+        self.bitIndices = {}
+
+    def truncate(self, size):
+        self._size = min(size, self._size)
+        for column in self._columns:
+            if isinstance(column, SparseColumn):
+                column.truncate(self._size)
+        self.bx = self._bx[:self._size]
+        self.columns = [column if isinstance(column, SparseColumn) else column[:self._size] for column in self._columns]
+        self.bitIndices = {}
+
+    def nextNonEmpty(self, row, columns=None, backward=False):
+        columns = range(len(self.formats)) if columns is None else columns
+        sparse = [col for col in columns if self.isSparse(col)]
+        dense = [col for col in columns if not self.isSparse(col)]
+        rows = [self.columns[col].nextRow(row, backward) for col in sparse]
+        if dense:
+            rows.append(super(SparseTestVector, self).nextNonEmpty(row, dense, backward))
+        rows = [row for row in rows if row is not None]
+        if not rows:
+            return None
+        return max(rows) if backward else min(rows)
+
+class LazyTestVector(TestVector):
+    """Test vector decoding rows on demand from a memory mapped file.
+
+    A line offset index is built in one pass over the mapped file (or loaded
+    from a persisted index), decoded rows are kept in a bounded LRU cache.
+    """
+
+    cachesize = 4096
+    indexblocksize = 64 * 1024 * 1024
+
+    def __init__(self):
+        self.filename = None
+        self.mmap = None
+        super(LazyTestVector, self).__init__()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def clear(self):
+        self.resetParseState()
+        self.cache = collections.OrderedDict()
+        self.bitIndices = {}
+        self.offsets = np.zeros(0, dtype=np.int64)
+        self.ends = np.zeros(0, dtype=np.int64)
+        self.edits = {} # edited rows, row to list of values
+
+    def memoryUsage(self):
+        """Returns bytes of the line index, the row cache (estimated) and bit
+        indices, the mapped file is not counted."""
+        size = residentBytes(self.offsets) + residentBytes(self.ends)
+        size += len(self.cache) * len(self.formats) * 40
+        return size + sum(index.bitmaps.nbytes for index in self.bitIndices.values())
+
+    @timing.timed()
+    def open(self, filename, index=None):
+        """Map file and load line offset index from file index (if valid) or
+        build the index and persist it to file index."""
+        self.close()
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if index and self.loadIndex(index):
+            return
+        self.buildIndex()
+        if index:
+            try:
+                self.saveIndex(index)
+            except OSError:
+                pass
+
+    def close(self):
+        self.clear()
+        if self.mmap is not None:
+            self.mmap.close()
+            self.mmap = None
+
+    def read(self, f, diagnostics=None):
+        """Read test vector from binary file object. Regular files are mapped
+        (see open()), other file objects (e.g. decompressed streams) are
+        copied to anonymous memory. Rows are decoded on demand, so problems
+        are not collected in diagnostics but raised on access."""
+        name = getattr(f, 'name', None)
+        if isinstance(f, io.BufferedReader) and isinstance(name, str) and f.seekable() and not f.tell():
+            self.open(name)
+            return
+        self.close()
+        data = f.read()
+        if data:
+            self.mmap = mmap.mmap(-1, len(data))
+            self.mmap.write(data)
+        self.buildIndex()
+
+    def update(self, f, diagnostics=None):
+        return None # not supported, the file must be opened again
+
+    def buildIndex(self):
+        """Build line offset index, empty lines are skipped."""
+        if self.mmap is None:
+            return
+        self.offsets, self.ends = lineIndex(self.mmap, self.indexblocksize)
+
+    def stat(self):
+        st = os.stat(self.filename)
+        return np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+    def saveIndex(self, filename):
+        """Persist line offset index."""
+        with open(filename, 'wb') as f:
+            np.savez(f, stat=self.stat(), offsets=self.offsets, ends=self.ends)
+
+    def loadIndex(self, filename):
+        """Load persisted line offset index, returns False if the index does
+        not exist or does not match the mapped file."""
+        try:
+            with np.load(filename) as index:
+                if not np.array_equal(index['stat'], self.stat()):
+                    return False
+                self.offsets = index['offsets']
+                self.ends = index['ends']
+        except (OSError, ValueError, KeyError):
+            return False
+        return True
+
+    def row(self, row):
+        """Returns list of decoded values of a row, cached in LRU."""
+        values = self.edits.get(row) or self.cache.get(row)
+        if values is not None:
+            if row in self.cache:
+                self.cache.move_to_end(row)
+            return values
+        line = self.mmap[self.offsets[row]:self.ends[row]]
+        items = line.split()
+        if len(items) != len(self.formats) + 1:
+            raise ValueError("line {}: expected {} items, got {}".format(row + 1, len(self.formats) + 1, len(items)))
+        values = [int(item, 16) for item in items[1:]]
+        self.cache[row] = values
+        if len(self.cache) > self.cachesize:
+            self.cache.popitem(last=False)
+        return values
+
+    def value(self, row, col):
+        return self.row(row)[col]
+
+    def setValue(self, row, col, value):
+        """Edited rows are kept in memory, on top of the mapped file."""
+        self.formats[col].fromItem(value) # validate
+        values = list(self.row(row))
+        values[col] = value
+        self.edits[row] = values
+        self.bitIndices.pop(col, None)
+
+    def applyEdits(self, col, column, start=0):
+        """Apply edited values to column holding rows from row start on."""
+        fmt = self.formats[col]
+        for row, values in self.edits.items():
+            if start <= row < start + len(column):
+                column[row - start] = fmt.fromItem(values[col])
+        return column
+
+    def formatLines(self, start, stop):
+        start, stop, _ = slice(start, stop).indices(len(self))
+        if start >= stop:
+            return b""
+        testvector = TestVector()
+        testvector.read(MappedFile(self.mmap[self.offsets[start]:self.ends[stop - 1]]))
+        for col in range(len(self.formats)):
+            self.applyEdits(col, testvector.columns[col], start)
+        return testvector.formatLines(0, len(testvector))
+
+    def formatRange(self, col, start, stop):
+        fmt = self.formats[col]
+        return [fmt.format(self.value(row, col)) for row in range(start, min(stop, len(self)))]
+
+    def blocks(self):
+        """Parse the mapped file block wise, see TestVector.parse()."""
+        self.resetParseState()
+        return self.parse(MappedFile(self.mmap))
+
+    def column(self, col, start=0, stop=None):
+        """Returns array of all values of a column, decoded block wise from
+        the mapped file."""
+        if start or stop is not None:
+            start, stop, _ = slice(start, stop).indices(len(self))
+            if start >= stop:
+                return self.formats[col].empty(0)
+            # Parse only the lines of the requested rows.
+            testvector = TestVector()
+            testvector.read(MappedFile(self.mmap[self.offsets[start]:self.ends[stop - 1]]))
+            return self.applyEdits(col, testvector.column(col), start)
+        arrays = [columns[col] for bx, columns in self.blocks()]
+        return self.applyEdits(col, np.concatenate(arrays) if arrays else self.formats[col].empty(0))
+
+    def columnRange(self, cols, start, stop):
+        """Returns list of arrays of columns cols, the lines of rows start to
+        stop (exclusive) are parsed once for all columns."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        if start >= stop:
+            return [self.formats[col].empty(0) for col in cols]
+        testvector = TestVector()
+        testvector.read(MappedFile(self.mmap[self.offsets[start]:self.ends[stop - 1]]))
+        return [self.applyEdits(col, testvector.column(col), start) for col in cols]
+
+    @property
+    def bx(self):
+        arrays = [bx for bx, columns in self.blocks()]
+        return np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64)
+
+def lineIndex(buffer, blocksize=64 * 1024 * 1024):
+    """Returns arrays of start and end offsets of all non-empty lines of a
+    buffer, scanned block wise for newlines."""
+    size = len(buffer)
+    if not size:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    buf = np.frombuffer(buffer, dtype=np.uint8)
+    ends = []
+    for start in range(0, size, blocksize):
+        block = buf[start:start + blocksize]
+        ends.append(np.flatnonzero(block == ord("\n")) + start)
+    ends = np.concatenate(ends)
+    if buf[-1] != ord("\n"):
+        ends = np.append(ends, size)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # Skip empty lines (taking CR LF line endings into account).
+    lengths = ends - starts
+    valid = lengths > 0
+    if len(ends):
+        valid &= ~((lengths == 1) & (buf[np.minimum(starts, size - 1)] == ord("\r")))
+    offsets = starts[valid].astype(np.int64)
+    ends = ends[valid].astype(np.int64)
+    del buf
+    return offsets, ends
+
+class MappedFile:
+    """Minimal read only file object over a memory map."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.pos = 0
+
+    def read(self, size=-1):
+        if self.buffer is None:
+            return b""
+        end = len(self.buffer) if size < 0 else self.pos + size
+        data = self.buffer[self.pos:end]
+        self.pos += len(data)
+        return data
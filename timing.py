@@ -0,0 +1,153 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# -----------------------------------------------------------------------------
+#  Timing instrumentation
+# -----------------------------------------------------------------------------
+
+# Environment variable enabling timing, holds the path of the output file.
+EnvironmentVariable = 'TESTVECTOR_PROFILE'
+
+class TimingStat:
+    """Call count and latency (seconds) of an instrumented function."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+        self.last = 0.
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.last = elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.
+
+    def toDict(self):
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1e3,
+            'mean_ms': self.mean * 1e3,
+            'max_ms': self.max * 1e3,
+        }
+
+class Recorder:
+    """Collects statistics per name and complete events for a Chrome trace
+    (loadable by chrome://tracing or Perfetto). Only the first MaxEvents
+    events are kept, statistics cover all calls."""
+
+    MaxEvents = 200000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+            self.events = []
+            self.dropped = 0
+
+    def record(self, name, start, elapsed):
+        with self.lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = TimingStat()
+            stat.add(elapsed)
+            if len(self.events) < self.MaxEvents:
+                self.events.append((name, start, elapsed, threading.get_ident()))
+            else:
+                self.dropped += 1
+
+    def summary(self):
+        """Returns list of (name, stat) tuples sorted by total time."""
+        with self.lock:
+            return sorted(self.stats.items(), key=lambda item: -item[1].total)
+
+    def toDict(self):
+        """Returns Chrome trace (JSON object format) with statistics as
+        additional key, ignored by trace viewers."""
+        pid = os.getpid()
+        with self.lock:
+            events = [{
+                'name': name,
+                'ph': 'X',
+                'ts': (start - self.origin) * 1e6,
+                'dur': elapsed * 1e6,
+                'pid': pid,
+                'tid': tid,
+            } for name, start, elapsed, tid in self.events]
+            stats = {name: stat.toDict() for name, stat in self.stats.items()}
+            dropped = self.dropped
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'stats': stats,
+            'droppedEvents': dropped,
+        }
+
+    def dump(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.toDict(), f)
+
+recorder = None
+
+# Functions marked by timed(), instrumented by enable().
+registry = []
+
+def timed(name=None):
+    """Function decorator marking a function or method for instrumentation,
+    recorded by its qualified name if no name is given. The function is
+    returned unchanged, so there is no overhead unless enable() is called
+    (before creating instances whose bound methods are connected)."""
+    def decorator(func):
+        registry.append((func, name or func.__qualname__))
+        return func
+    return decorator
+
+def instrument(func, name):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            recorder.record(name, start, time.perf_counter() - start)
+    return wrapper
+
+def owner(func):
+    """Returns module or class defining func, found by its qualified name."""
+    result = sys.modules[func.__module__]
+    for part in func.__qualname__.split('.')[:-1]:
+        result = getattr(result, part)
+    return result
+
+def enable():
+    """Replace all functions marked by timed() by instrumented wrappers,
+    returns the recorder."""
+    global recorder
+    if recorder is None:
+        recorder = Recorder()
+        for func, name in registry:
+            target = owner(func)
+            attr = func.__name__
+            if vars(target).get(attr) is func:
+                setattr(target, attr, instrument(func, name))
+    return recorder
+
+def isEnabled():
+    return recorder is not None
+
+def fromEnvironment():
+    """Returns output path set by the environment variable or None."""
+    return os.environ.get(EnvironmentVariable) or None
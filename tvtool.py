@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""Headless command line tool for test vector files (no Qt required).
+
+Commands process any number of files (or directories) using a process pool,
+results are written to stdout in input order as soon as they are available.
+
+  tvtool.py summary data/*.txt
+  tvtool.py validate -j 16 data/
+  tvtool.py decode --objects muon,eg --query "muon[*].pt > 40" sample.txt
+  tvtool.py bits --bit 42 --range 0:3564 sample.txt
+  tvtool.py export -o out/ data/
+  tvtool.py export --format csv --decoded --objects muon --range 0:3564 sample.txt
+"""
+
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import os
+import signal
+import sys
+
+import numpy as np
+
+from testvector import TestVector, Diagnostics, popcount
+from reader import readTestVector
+from cache import TestVectorCache
+from shared import SharedStore
+import compressed
+import export as exporting
+import query
+
+__version__ = "1.0.0"
+
+# -----------------------------------------------------------------------------
+#  Helpers
+# -----------------------------------------------------------------------------
+
+def findFiles(paths, pattern="*.txt"):
+    """Returns list of files, directories are searched recursively for files
+    matching pattern (also if compressed, e.g. sample.txt.gz for *.txt)."""
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                filenames.extend(os.path.join(root, name) for name in sorted(files) if fnmatch.fnmatch(compressed.stripExtension(name), pattern))
+        else:
+            filenames.append(path)
+    return filenames
+
+def selectColumns(testvector, objects):
+    """Returns column indices of objects given by name or label."""
+    if not objects:
+        return list(range(len(testvector.formats)))
+    columns = []
+    for col, fmt in enumerate(testvector.formats):
+        if fmt.name in objects or fmt.label() in objects:
+            columns.append(col)
+    return columns
+
+# -----------------------------------------------------------------------------
+#  Commands, executed by worker processes
+# -----------------------------------------------------------------------------
+
+def summary(testvector, filename, options, diagnostics=None):
+    """Returns rows, BX range and number of non-empty cells per object."""
+    objects = {}
+    for col, fmt in enumerate(testvector.formats):
+        column = testvector.column(col)
+        nonzero = column.any(axis=1) if column.ndim > 1 else column != 0
+        objects[fmt.name] = objects.get(fmt.name, 0) + int(nonzero.sum())
+    result = {
+        'filename': filename,
+        'rows': len(testvector),
+        'bx': [int(testvector.bx[0]), int(testvector.bx[-1])] if len(testvector) else None,
+        'objects': objects,
+    }
+    for col in selectColumns(testvector, {'algorithms'}):
+        fired = popcount(testvector.column(col)).sum(axis=1)
+        result['algorithms'] = {'fired': int(fired.sum()), 'rows': int((fired != 0).sum())}
+    if options.json:
+        return json.dumps(result)
+    counts = " ".join("{}={}".format(name, count) for name, count in objects.items())
+    return "{}: {} rows, {} algorithm bits fired in {} rows, {}".format(
+        filename, result['rows'], result['algorithms']['fired'], result['algorithms']['rows'], counts)
+
+def validate(testvector, filename, options, diagnostics=None):
+    """Returns problems found in a file with line and column."""
+    diagnostics = diagnostics or Diagnostics()
+    if options.json:
+        return json.dumps({
+            'filename': filename,
+            'valid': not diagnostics.errors,
+            'rows': len(testvector),
+            'errors': diagnostics.errors,
+            'warnings': diagnostics.warnings,
+            'skipped': diagnostics.skipped,
+            'counts': dict(diagnostics.counts),
+            'diagnostics': [item._asdict() for item in diagnostics],
+        })
+    lines = ["{}:{}:{}: {}: {}".format(filename, item.line, item.column, item.severity, item.message) for item in diagnostics]
+    if diagnostics:
+        lines.append("{}: {} rows, {}".format(filename, len(testvector), diagnostics.summary()))
+    else:
+        lines.append("{}: OK ({} rows)".format(filename, len(testvector)))
+    return "\n".join(lines)
+
+def decode(testvector, filename, options, diagnostics=None):
+    """Returns decoded attributes of non-empty cells, one line per cell."""
+    columns = selectColumns(testvector, options.objects)
+    if options.query:
+        rows = np.flatnonzero(query.compile(options.query).evaluate(testvector))
+    else:
+        rows = np.arange(len(testvector))
+    cells = []
+    for col in columns:
+        fmt = testvector.formats[col]
+        column = testvector.column(col)[rows]
+        nonzero = column.any(axis=1) if column.ndim > 1 else column != 0
+        selected = np.flatnonzero(nonzero)
+        if fmt.bitvector:
+            bits = fmt.decodeArray(column[selected])
+            for i, row in enumerate(rows[selected]):
+                cells.append((row, col, {'bits': np.flatnonzero(bits[i]).tolist()}))
+        else:
+            values = fmt.decodeArray(column[selected]) if fmt.attributes else None
+            for i, row in enumerate(rows[selected]):
+                if values is None:
+                    attributes = {'value': fmt.item(column[selected[i]])}
+                else:
+                    attributes = dict(zip(fmt.names, values[i].tolist()))
+                cells.append((row, col, attributes))
+    cells.sort(key=lambda cell: (cell[0], cell[1]))
+    lines = []
+    for row, col, attributes in cells:
+        label = testvector.formats[col].label()
+        bx = int(testvector.bx[row])
+        if options.json:
+            lines.append(json.dumps({'filename': filename, 'row': int(row), 'bx': bx, 'object': label, 'attributes': attributes}))
+        else:
+            if 'bits' in attributes:
+                text = "bits={}".format(",".join(map(str, attributes['bits'])))
+            else:
+                text = " ".join("{}=0x{:x}".format(name, value) for name, value in attributes.items())
+            lines.append("{}:{}:{} {} {}".format(filename, row + 1, bx, label, text))
+    return "\n".join(lines)
+
+def parseRange(text):
+    """Returns (start, stop) tuple of row range 'start:stop', both optional."""
+    start, _, stop = (text or ':').partition(':')
+    return int(start or 0), int(stop) if stop else None
+
+def bits(testvector, filename, options, diagnostics=None):
+    """Returns per bit counts of bit vector columns, or the rows a single
+    bit is set in, using the inverted bit index."""
+    start, stop = parseRange(options.range)
+    stop = len(testvector) if stop is None else min(stop, len(testvector))
+    lines = []
+    for col in selectColumns(testvector, options.objects or {'algorithms'}):
+        fmt = testvector.formats[col]
+        if not fmt.bitvector:
+            continue
+        index = testvector.bitIndex(col)
+        if options.bit is not None:
+            rows = index.rows(options.bit, start, stop)
+            if options.json:
+                lines.append(json.dumps({'filename': filename, 'object': fmt.label(), 'bit': options.bit, 'rows': rows.tolist(), 'bx': testvector.bx[rows].tolist()}))
+            else:
+                lines.append("{}: {}.{} set in {} rows: {}".format(filename, fmt.label(), options.bit, len(rows), " ".join(map(str, rows + 1))))
+            continue
+        counts = index.counts(start, stop)
+        if options.json:
+            fired = np.flatnonzero(counts)
+            lines.append(json.dumps({'filename': filename, 'object': fmt.label(), 'counts': dict(zip(fired.tolist(), counts[fired].tolist()))}))
+        else:
+            for bit in np.flatnonzero(counts):
+                lines.append("{}: {}.{} {}".format(filename, fmt.label(), bit, counts[bit]))
+    return "\n".join(lines)
+
+def export(testvector, filename, options, diagnostics=None):
+    """Writes raw or decoded columns to a CSV file, a compressed .npz file or
+    a directory of .npy files in the output directory. Without a test vector
+    the file is converted block by block using constant memory."""
+    fields = exporting.exportFields(TestVector().formats, options.objects, options.decoded)
+    start, stop = parseRange(options.range)
+    writer = exporting.Writers[options.format]
+    name = os.path.splitext(compressed.stripExtension(os.path.basename(filename)))[0] + writer.extension
+    path = os.path.join(options.output, name)
+    if testvector is not None:
+        columns = {field.col for field in fields}
+        rows = exporting.export(exporting.iterRows(testvector, columns, start, stop), fields, writer(path, fields))
+    else:
+        with compressed.openFile(filename) as f:
+            rows = exporting.export(exporting.iterFile(f, start, stop, diagnostics=diagnostics), fields, writer(path, fields))
+    if options.json:
+        return json.dumps({'filename': filename, 'output': path, 'rows': rows, 'fields': len(fields)})
+    return "{}: {} rows written to {}".format(filename, rows, path)
+
+Commands = {
+    'summary': summary,
+    'validate': validate,
+    'decode': decode,
+    'bits': bits,
+    'export': export,
+}
+
+# Commands reading files themselves block by block (unless cached).
+Streaming = {'export'}
+
+def process(task):
+    """Worker entry point, returns (filename, output, error, warning) tuple."""
+    filename, options = task
+    diagnostics = Diagnostics() if options.command == 'validate' or options.skip_invalid else None
+    # Attach to test vectors published by viewers (not when validating).
+    shared = SharedStore() if options.shared and diagnostics is None else None
+    attached = shared.attach(filename) if shared else None
+    try:
+        if attached:
+            testvector = attached[1]
+        elif options.command in Streaming and not options.cache:
+            testvector = None
+        else:
+            testvector = readTestVector(filename, TestVectorCache() if options.cache else None, diagnostics)
+        text = Commands[options.command](testvector, filename, options, diagnostics)
+    except (OSError, ValueError, KeyError, query.QueryError) as exception:
+        return filename, None, str(exception), None
+    finally:
+        if attached:
+            shared.release(attached[0])
+    if diagnostics and options.command == 'validate':
+        return filename, text, diagnostics.summary() if diagnostics.errors else None, None
+    return filename, text, None, diagnostics.summary() if diagnostics else None
+
+def initWorker():
+    """Leave handling of CTRL+C to the parent process."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def run(filenames, options, output=sys.stdout):
+    """Process files and write results to output, returns number of failed
+    files."""
+    tasks = [(filename, options) for filename in filenames]
+    failed = 0
+    jobs = min(options.jobs or os.cpu_count() or 1, len(tasks))
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs, initializer=initWorker)
+        results = pool.imap(process, tasks, chunksize=1)
+    else:
+        pool = None
+        results = map(process, tasks)
+    try:
+        for filename, text, error, warning in results:
+            if text:
+                print(text, file=output, flush=True)
+            if warning is not None:
+                print("{}: warning: {}".format(filename, warning), file=sys.stderr, flush=True)
+            if error is not None:
+                failed += 1
+                # Failed validations already listed their diagnostics.
+                if text is None:
+                    if options.json:
+                        print(json.dumps({'filename': filename, 'error': error}), file=output, flush=True)
+                    else:
+                        print("{}: error: {}".format(filename, error), file=sys.stderr, flush=True)
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+    return failed
+
+# -----------------------------------------------------------------------------
+#  Parsing command line arguments
+# -----------------------------------------------------------------------------
+
+def parse_args(args=None):
+    """Parse command line arguments."""
+    argp = argparse.ArgumentParser(prog="tvtool", description="Process test vector files without GUI.")
+    argp.add_argument('-V', '--version', action='version', version='%(prog)s {}'.format(__version__))
+    commands = argp.add_subparsers(dest='command', metavar='<command>')
+    commands.required = True
+    parsers = {
+        'summary': commands.add_parser('summary', help="print rows and object counts"),
+        'validate': commands.add_parser('validate', help="report all problems of files with line and column"),
+        'decode': commands.add_parser('decode', help="print decoded attributes of non-empty objects"),
+        'bits': commands.add_parser('bits', help="print per bit counts of external and algorithms"),
+        'export': commands.add_parser('export', help="write raw or decoded columns to .csv, .npz or .npy files"),
+    }
+    for parser in parsers.values():
+        parser.add_argument('paths', nargs='+', metavar='<path>', help="test vector file or directory")
+        parser.add_argument('-j', '--jobs', type=int, default=0, help="number of worker processes (default: number of cores)")
+        parser.add_argument('--pattern', default="*.txt", help="file name pattern used in directories (default: *.txt)")
+        parser.add_argument('--json', action='store_true', help="write one JSON object per line")
+        parser.add_argument('--cache', action='store_true', help="use the parsed test vector cache")
+        parser.add_argument('--shared', action='store_true', help="use test vectors published in shared memory by viewers (see viewer.py --shared)")
+        parser.add_argument('--skip-invalid', action='store_true', help="skip invalid rows instead of failing (always on for validate)")
+    parsers['decode'].add_argument('--objects', type=lambda s: set(s.split(',')), help="comma separated object names or labels, e.g. muon,eg[0]")
+    parsers['decode'].add_argument('--query', help="decode only BX matching query expression")
+    parsers['bits'].add_argument('--objects', type=lambda s: set(s.split(',')), help="comma separated bit vector objects (default: algorithms)")
+    parsers['bits'].add_argument('--bit', type=int, help="print rows the bit is set in instead of counts")
+    parsers['bits'].add_argument('--range', metavar='<start>:<stop>', help="restrict to rows start to stop (exclusive, zero based)")
+    parsers['export'].add_argument('-o', '--output', default='.', help="output directory (default: current directory)")
+    parsers['export'].add_argument('--format', choices=sorted(exporting.Writers), default='npz', help="output format, npy writes a directory per file (default: npz)")
+    parsers['export'].add_argument('--decoded', action='store_true', help="write decoded attributes, e.g. muon[2].pt, instead of raw values")
+    parsers['export'].add_argument('--objects', type=lambda s: set(s.split(',')), help="comma separated object names or labels, e.g. muon,eg[0]")
+    parsers['export'].add_argument('--range', metavar='<start>:<stop>', help="restrict to rows start to stop (exclusive, zero based)")
+    return argp.parse_args(args)
+
+# -----------------------------------------------------------------------------
+#  Main routine
+# -----------------------------------------------------------------------------
+
+def main():
+    """Main routine."""
+    options = parse_args()
+    if options.command == 'decode' and options.query:
+        try:
+            query.compile(options.query)
+        except query.QueryError as exception:
+            print("tvtool: invalid query: {}".format(exception), file=sys.stderr)
+            return 2
+    if options.command == 'export':
+        os.makedirs(options.output, exist_ok=True)
+    filenames = findFiles(options.paths, options.pattern)
+    try:
+        failed = run(filenames, options)
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # Output closed early, e.g. piped to head.
+        sys.stderr.close()
+        return 1
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())